@@ -2,16 +2,18 @@
 from __future__ import unicode_literals
 
 import base64
+import logging
 import re
 import struct
 import time
 import urllib.parse
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import date, datetime
 from datetime import time as datetime_time
 from datetime import timedelta
 from functools import partial, reduce
-from operator import or_
+from operator import attrgetter, or_
 from uuid import UUID
 
 import bleach
@@ -23,14 +25,24 @@ from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.gis.db import models
 from django.contrib.gis.geos import Point
-from django.contrib.postgres.search import SearchQuery, TrigramSimilarity
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
 from django.core.cache import caches
-from django.core.exceptions import PermissionDenied
-from django.db.models import Count, F, Prefetch, Q, QuerySet, Sum
-from django.db.models.functions import Greatest
+from django.core.exceptions import FieldDoesNotExist, PermissionDenied
+from django.db.models import (
+    CharField,
+    Count,
+    F,
+    FloatField,
+    Prefetch,
+    Q,
+    QuerySet,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Collate, Extract, Greatest, Power
 from django.db.transaction import atomic
 from django.db.utils import IntegrityError
-from django.http import Http404, HttpResponsePermanentRedirect
+from django.http import Http404, HttpResponsePermanentRedirect, StreamingHttpResponse
 from django.urls import NoReverseMatch
 from django.utils import timezone, translation
 from django.utils.encoding import force_text
@@ -49,6 +61,7 @@ from munigeo.models import AdministrativeDivision
 from rest_framework import (
     filters,
     generics,
+    ISO_8601,
     mixins,
     permissions,
     relations,
@@ -59,7 +72,7 @@ from rest_framework import (
 from rest_framework.decorators import action
 from rest_framework.exceptions import APIException, NotFound, ParseError
 from rest_framework.exceptions import PermissionDenied as DRFPermissionDenied
-from rest_framework.fields import DateTimeField
+from rest_framework.fields import DateTimeField, SkipField
 from rest_framework.filters import BaseFilterBackend
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
@@ -76,10 +89,12 @@ from rest_framework_bulk import (
 from events import utils
 from events.api_pagination import LargeResultsSetPagination
 from events.auth import ApiKeyAuth, ApiKeyUser
+from events.autosuggest import AUTOSUGGEST_MODELS, get_autosuggest_index
 from events.custom_elasticsearch_search_backend import (
     CustomEsSearchQuerySet as SearchQuerySet,
 )
 from events.extensions import apply_select_and_prefetch, get_extensions_from_request
+from events.keywords import similar_keywords
 from events.models import (
     DataSource,
     Event,
@@ -98,12 +113,16 @@ from events.models import (
     Video,
 )
 from events.permissions import GuestDelete, GuestGet, GuestPost
-from events.renderers import DOCXRenderer
+from events.renderers import DOCXRenderer, StreamedList
 from events.translation import EventTranslationOptions, PlaceTranslationOptions
+from events.url_builder import get_url_builder
 from helevents.api import UserSerializer
 from helevents.models import User
 from registrations.models import Registration, SeatReservationCode, SignUp
 
+# Per module logger
+logger = logging.getLogger(__name__)
+
 env = environ.Env()
 
 
@@ -349,9 +368,22 @@ class JSONLDRelatedField(relations.HyperlinkedRelatedField):
                     for x in context["include"]
                     if x != "sub_events" and x != "super_event"
                 ]
-            return self.related_serializer(
+            # the same places and keywords recur across the listed events
+            memo = context.get("expansion_memo")
+            key = (
+                self.related_serializer,
+                obj.pk,
+                tuple(context.get("include", ())),
+                self.hide_ld_context,
+            )
+            if memo is not None and key in memo:
+                return memo[key]
+            data = self.related_serializer(
                 obj, hide_ld_context=self.hide_ld_context, context=context
             ).data
+            if memo is not None:
+                memo[key] = data
+            return data
         link = super(JSONLDRelatedField, self).to_representation(obj)
         if link is None:
             return None
@@ -372,6 +404,14 @@ class JSONLDRelatedField(relations.HyperlinkedRelatedField):
 
         return super().to_internal_value(urllib.parse.unquote(url))
 
+    def get_url(self, obj, view_name, request, format):
+        if format:
+            return super().get_url(obj, view_name, request, format)
+        lookup_value = getattr(obj, self.lookup_field)
+        if lookup_value in (None, ""):
+            return None
+        return get_url_builder(request).build(view_name, lookup_value)
+
     def is_expanded(self):
         return getattr(self, "expanded", False)
 
@@ -669,10 +709,8 @@ class LinkedEventsSerializer(TranslatedModelSerializer, MPTTModelSerializer):
         ret = super(LinkedEventsSerializer, self).to_representation(obj)
         if "id" in ret and "request" in self.context:
             try:
-                ret["@id"] = reverse(
-                    self.view_name,
-                    kwargs={"pk": ret["id"]},
-                    request=self.context["request"],
+                ret["@id"] = get_url_builder(self.context["request"]).build(
+                    self.view_name, ret["id"]
                 )
             except NoReverseMatch:
                 ret["@id"] = str(ret["id"])
@@ -865,9 +903,193 @@ class JSONAPIViewMixin(object):
         context["include"] = [x.strip() for x in include.split(",") if x]
         context["srs"] = self.srs
         context.setdefault("skip_fields", set()).add("origin_id")
+        # expanded related objects by serializer, pk and include
+        context["expansion_memo"] = {}
         return context
 
 
+def parse_fieldset_param(params, name):
+    val = params.get(name, None)
+    if not val:
+        return None
+    return {field.strip() for field in val.split(",") if field.strip()}
+
+
+def _select_related_paths(select_related, prefix=""):
+    for name, nested in select_related.items():
+        yield prefix + name
+        yield from _select_related_paths(nested, prefix + name + "__")
+
+
+def prune_queryset(queryset, fieldset, required_fields=()):
+    """
+    Defers the columns and drops the select_related and prefetch_related
+    lookups that the serializer fields in fieldset do not need. Fields that
+    are not model fields may need anything, so then the queryset is returned
+    as is.
+    """
+    model = queryset.model
+    try:
+        translated_fields = translator.get_options_for_model(model).fields.keys()
+    except NotRegistered:
+        translated_fields = ()
+    columns = set()
+    relations = set()
+    for name in set(fieldset) | set(required_fields):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return queryset
+        relations.add(name)
+        if field.concrete and not field.many_to_many:
+            columns.add(name)
+            if name in translated_fields:
+                columns.update(
+                    "%s_%s" % (name, lang) for lang in utils.get_fixed_lang_codes()
+                )
+
+    def is_needed(lookup):
+        if isinstance(lookup, Prefetch):
+            lookup = lookup.prefetch_through
+        return lookup.split("__")[0] in relations
+
+    prefetches = [
+        lookup for lookup in queryset._prefetch_related_lookups if is_needed(lookup)
+    ]
+    queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+    if isinstance(queryset.query.select_related, dict):
+        selects = [
+            path
+            for path in _select_related_paths(queryset.query.select_related)
+            if is_needed(path)
+        ]
+        queryset = queryset.select_related(None).select_related(*selects)
+    return queryset.only(*columns)
+
+
+class SparseFieldsetMixin(object):
+    """
+    Lets list requests restrict the fields of the listed objects with
+    fields= or exclude_fields=. The other fields are dropped from the
+    serializer, and their columns and prefetches from the queryset.
+    """
+
+    # model fields that the serializer uses whatever the fields, by field
+    sparse_fieldset_requires = {"": ("id", "publisher")}
+
+    def get_sparse_fieldset(self):
+        """Returns the names of the fields to serialize, or None for all."""
+        if getattr(self, "action", None) != "list":
+            return None
+        if hasattr(self, "_sparse_fieldset"):
+            return self._sparse_fieldset
+        params = self.request.query_params
+        fields = parse_fieldset_param(params, "fields")
+        exclude_fields = parse_fieldset_param(params, "exclude_fields")
+        fieldset = None
+        if fields is not None or exclude_fields is not None:
+            serializer = self.get_serializer_class()(
+                context=self.get_serializer_context()
+            )
+            all_fields = (
+                set(serializer.fields)
+                | set(getattr(serializer, "translated_fields", ()))
+                | set(getattr(serializer, "geo_fields", ()))
+            )
+            unknown = ((fields or set()) | (exclude_fields or set())) - all_fields
+            if unknown:
+                raise ParseError(
+                    "Unknown fields %s. Supported fields: %s"
+                    % (", ".join(sorted(unknown)), ", ".join(sorted(all_fields)))
+                )
+            fieldset = (fields or all_fields) - (exclude_fields or set())
+            fieldset.add("id")
+        self._sparse_fieldset = fieldset
+        return fieldset
+
+    def prune_queryset(self, queryset):
+        fieldset = self.get_sparse_fieldset()
+        if fieldset is None:
+            return queryset
+        required_fields = set()
+        for field in ("",) + tuple(fieldset):
+            required_fields.update(self.sparse_fieldset_requires.get(field, ()))
+        return prune_queryset(queryset, fieldset, required_fields)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_sparse_fieldset()
+        if fieldset is not None:
+            child = getattr(serializer, "child", serializer)
+            for name in list(child.fields):
+                if name not in fieldset:
+                    del child.fields[name]
+            for attr in ("translated_fields", "geo_fields"):
+                if hasattr(child, attr):
+                    setattr(
+                        child,
+                        attr,
+                        [name for name in getattr(child, attr) if name in fieldset],
+                    )
+        return serializer
+
+
+class StreamingListMixin(object):
+    """
+    Streams list pages of at least settings.STREAMING_PAGE_SIZE objects: the
+    page is fetched, serialized and encoded a chunk of objects at a time, so
+    that the whole page is never held in memory at once.
+    """
+
+    streaming_chunk_size = 100
+
+    def get_streaming_renderer(self):
+        """Returns the accepted renderer if it can stream the list, else None."""
+        min_page_size = settings.STREAMING_PAGE_SIZE
+        paginator = self.paginator
+        if not min_page_size or not hasattr(paginator, "paginate_queryset_lazily"):
+            return None
+        if (paginator.get_page_size(self.request) or 0) < min_page_size:
+            return None
+        renderer = self.request.accepted_renderer
+        if not hasattr(renderer, "render_stream"):
+            return None
+        if not renderer.can_stream(
+            self.request.accepted_media_type, self.get_renderer_context()
+        ):
+            return None
+        return renderer
+
+    def iter_representations(self, page):
+        serializer = self.get_serializer([], many=True)
+        start = 0
+        while True:
+            objects = list(page[start : start + self.streaming_chunk_size])
+            yield from serializer.to_representation(objects)
+            if len(objects) < self.streaming_chunk_size:
+                return
+            start += self.streaming_chunk_size
+
+    def list(self, request, *args, **kwargs):
+        renderer = self.get_streaming_renderer()
+        if renderer is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginator.paginate_queryset_lazily(queryset, request, view=self)
+        data = self.paginator.get_paginated_data(
+            StreamedList(self.iter_representations(page))
+        )
+        content_type = request.accepted_media_type
+        if renderer.charset:
+            content_type = "%s; charset=%s" % (content_type, renderer.charset)
+        return StreamingHttpResponse(
+            renderer.render_stream(
+                data, request.accepted_media_type, self.get_renderer_context()
+            ),
+            content_type=content_type,
+        )
+
+
 class EditableLinkedEventsObjectSerializer(LinkedEventsSerializer):
     def create(self, validated_data):
         if "data_source" not in validated_data:
@@ -1041,6 +1263,7 @@ class KeywordDeprecatedException(APIException):
 
 class KeywordListViewSet(
     JSONAPIViewMixin,
+    SparseFieldsetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
@@ -1085,7 +1308,9 @@ class KeywordListViewSet(
                 else ["fi", "sv", "en"]
             )
             tri = [TrigramSimilarity(f"name_{i}", val) for i in langs]
-            queryset = queryset.annotate(simile=Greatest(*tri)).filter(simile__gt=0.2)
+            # rank only the keywords found with the trigram indexes
+            ids = [keyword_id for keyword_id, _ in similar_keywords(val)]
+            queryset = queryset.filter(id__in=ids).annotate(simile=Greatest(*tri))
             self.ordering_fields = ("simile", *self.ordering_fields)
             self.ordering = ("-simile", *self.ordering)
         else:
@@ -1105,7 +1330,7 @@ class KeywordListViewSet(
                 alt_labels__name__icontains=val
             )
             queryset = queryset.filter(qset).distinct()
-        return queryset
+        return self.prune_queryset(queryset)
 
 
 register_view(KeywordRetrieveViewSet, "keyword")
@@ -1723,7 +1948,12 @@ class PlaceSerializer(EditableLinkedEventsObjectSerializer, GeoModelSerializer):
 
     class Meta:
         model = Place
-        exclude = ("n_events_changed",)
+        exclude = (
+            "n_events_changed",
+            "search_vector_fi",
+            "search_vector_sv",
+            "search_vector_en",
+        )
 
 
 class PlaceFilter(django_filters.rest_framework.FilterSet):
@@ -1815,6 +2045,7 @@ class PlaceDeletedException(APIException):
 class PlaceListViewSet(
     GeoModelAPIView,
     JSONAPIViewMixin,
+    SparseFieldsetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
@@ -1840,6 +2071,18 @@ class PlaceListViewSet(
         "name",
     )  # we want to display tprek before osoite etc.
 
+    @staticmethod
+    def get_base_queryset():
+        return Place.objects.select_related(
+            "image",
+            "data_source",
+            "created_by",
+            "last_modified_by",
+            "publisher",
+            "parent",
+            "replaced_by",
+        ).prefetch_related("divisions", "divisions__type", "divisions__municipality")
+
     def get_queryset(self):
         """
         Return Place queryset.
@@ -1854,15 +2097,7 @@ class PlaceListViewSet(
         show_all_places (places without events are included)
         show_deleted (deleted places are included)
         """
-        queryset = Place.objects.select_related(
-            "image",
-            "data_source",
-            "created_by",
-            "last_modified_by",
-            "publisher",
-            "parent",
-            "replaced_by",
-        ).prefetch_related("divisions", "divisions__type", "divisions__municipality")
+        queryset = self.get_base_queryset()
         data_source = self.request.query_params.get("data_source")
         # Filter by data source, multiple sources separated by comma
         if data_source:
@@ -1889,7 +2124,7 @@ class PlaceListViewSet(
                 "name", val
             ) | _text_qset_by_translated_field("street_address", val)
             queryset = queryset.filter(qset)
-        return queryset
+        return self.prune_queryset(queryset)
 
 
 register_view(PlaceRetrieveViewSet, "place")
@@ -2327,7 +2562,7 @@ class ImageSerializer(EditableLinkedEventsObjectSerializer):
         return data
 
 
-class ImageViewSet(JSONAPIViewMixin, viewsets.ModelViewSet):
+class ImageViewSet(JSONAPIViewMixin, StreamingListMixin, viewsets.ModelViewSet):
     queryset = Image.objects.all().select_related(
         "publisher", "data_source", "created_by", "last_modified_by", "license"
     )
@@ -2385,6 +2620,272 @@ class VideoSerializer(serializers.ModelSerializer):
         exclude = ["id", "event"]
 
 
+# emitted by field emitters that raise SkipField
+_SKIPPED = object()
+
+
+def _generic_emitter(field):
+    """Emits the field like Serializer.to_representation does."""
+
+    def emit(obj):
+        try:
+            attribute = field.get_attribute(obj)
+        except SkipField:
+            return _SKIPPED
+        if isinstance(attribute, relations.PKOnlyObject):
+            if attribute.pk is None:
+                return None
+        elif attribute is None:
+            return None
+        return field.to_representation(attribute)
+
+    return emit
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = getattr(field, "timezone", field.default_timezone())
+    if not isinstance(output_format, str) or output_format.lower() != ISO_8601:
+        return field.to_representation
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if not isinstance(value, datetime) or timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _column_converter(field):
+    """Returns the to_representation of the field, shortcut for common types."""
+    field_type = type(field)
+    if field_type in (
+        serializers.CharField,
+        serializers.URLField,
+        serializers.EmailField,
+        serializers.SlugField,
+    ):
+        return str
+    if field_type is serializers.IntegerField:
+        return int
+    if field_type is serializers.BooleanField:
+        return (
+            lambda value: value
+            if value is True or value is False
+            else field.to_representation(value)
+        )
+    if field_type in (DateTimeField, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if field_type is EnumChoiceField:
+        labels = {}
+        for value, label in field.choices:
+            labels.setdefault(str(value), field.prefix + str(label))
+        return lambda value: labels.get(str(value)) or field.to_representation(value)
+    return field.to_representation
+
+
+def _column_emitter(field, attname):
+    convert = _column_converter(field)
+
+    def emit(obj):
+        value = getattr(obj, attname)
+        if value is None:
+            return None
+        return convert(value)
+
+    return emit
+
+
+def _link_builder(field, url_builder):
+    """Returns a function building the JSON-LD link of an unexpanded field."""
+    view_name = field.view_name
+    lookup_field = field.lookup_field
+
+    def link(value):
+        pk = getattr(value, lookup_field)
+        if pk in (None, ""):
+            return None
+        try:
+            return {"@id": url_builder.build(view_name, pk)}
+        except NoReverseMatch:
+            # let the field report the misconfiguration
+            return field.to_representation(value)
+
+    return link
+
+
+def _link_emitter(field, attname, url_builder):
+    link = _link_builder(field, url_builder)
+
+    def emit(obj):
+        pk = getattr(obj, attname)
+        if pk is None:
+            return None
+        return link(relations.PKOnlyObject(pk=pk))
+
+    return emit
+
+
+def _many_links_emitter(field, source, url_builder):
+    link = _link_builder(field.child_relation, url_builder)
+
+    def emit(obj):
+        if obj.pk is None:
+            return []
+        related = getattr(obj, source)
+        if hasattr(related, "all"):
+            related = related.all()
+        return [link(value) for value in related]
+
+    return emit
+
+
+def _is_link(field):
+    return (
+        isinstance(field, JSONLDRelatedField)
+        and not field.is_expanded()
+        and field.lookup_field == "pk"
+        and "request" in field.context
+        and not field.context.get("format")
+    )
+
+
+def _compile_model_field(field, model_field, url_builder):
+    if not model_field.is_relation:
+        if type(field).get_attribute is serializers.Field.get_attribute:
+            return _column_emitter(field, model_field.attname)
+    elif _is_link(field):
+        return _link_emitter(field, model_field.attname, url_builder)
+    elif type(field) is relations.PrimaryKeyRelatedField and field.pk_field is None:
+        return attrgetter(model_field.attname)
+    return _generic_emitter(field)
+
+
+def _compile_field(field, model, url_builder):
+    """Returns a function emitting the field of an object."""
+    if field.source == "*" or len(field.source_attrs) != 1:
+        return _generic_emitter(field)
+    source = field.source_attrs[0]
+    if isinstance(field, relations.ManyRelatedField):
+        if _is_link(field.child_relation):
+            return _many_links_emitter(field, source, url_builder)
+        return _generic_emitter(field)
+    try:
+        model_field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return _generic_emitter(field)
+    if not model_field.concrete or model_field.many_to_many:
+        return _generic_emitter(field)
+    return _compile_model_field(field, model_field, url_builder)
+
+
+def _linked_data_emitter(serializer):
+    """Returns a function adding the JSON-LD keys like LinkedEventsSerializer."""
+    context = serializer.context
+    has_request = "request" in context
+    url_builder = get_url_builder(context.get("request"))
+    view_name = getattr(serializer, "view_name", None)
+    add_context = not serializer.hide_ld_context and serializer.instance is not None
+
+    def emit(obj, ret):
+        if "id" in ret and has_request:
+            try:
+                ret["@id"] = url_builder.build(view_name, ret["id"])
+            except NoReverseMatch:
+                ret["@id"] = str(ret["id"])
+        if add_context:
+            jsonld_context = getattr(obj, "jsonld_context", None)
+            if isinstance(jsonld_context, (dict, list)):
+                ret["@context"] = jsonld_context
+            else:
+                ret["@context"] = "http://schema.org"
+        ret["@type"] = getattr(obj, "jsonld_type", obj.__class__.__name__)
+
+    return emit
+
+
+def compile_representation(serializer):
+    """
+    Returns a function serializing objects like the to_representation of the
+    LinkedEventsSerializer, with the field lookups, skipped fields and URL
+    prefixes resolved once for all the objects. The serializer is only read.
+    """
+    model = serializer.Meta.model
+    url_builder = get_url_builder(serializer.context.get("request"))
+    admin_fields = set(serializer.only_admin_visible_fields)
+    skip_fields = set(serializer.skip_fields) - admin_fields
+    # the id is needed for @id even if it is skipped
+    late_skip_fields = skip_fields & {"id", "@id", "@context", "@type"}
+    emitters = [
+        (
+            field.field_name,
+            field.field_name in admin_fields,
+            _compile_field(field, model, url_builder),
+        )
+        for field in serializer._readable_fields
+        if field.field_name not in skip_fields - late_skip_fields
+    ]
+    languages = utils.get_fixed_lang_codes()
+    translated_fields = [
+        (name, [(lang, "%s_%s" % (name, lang)) for lang in languages])
+        for name in serializer.translated_fields
+        if name not in skip_fields
+    ]
+    add_linked_data = _linked_data_emitter(serializer)
+    user = serializer.user
+    admin_tree_ids = serializer.admin_tree_ids
+
+    def represent(obj):
+        show_admin_fields = bool(
+            user
+            and hasattr(obj, "publisher")
+            and obj.publisher
+            and obj.publisher.tree_id in admin_tree_ids
+        )
+        ret = OrderedDict()
+        for name, admin_only, emit in emitters:
+            if admin_only and not show_admin_fields:
+                continue
+            value = emit(obj)
+            if value is not _SKIPPED:
+                ret[name] = value
+        for name, keys in translated_fields:
+            values = {}
+            for lang, key in keys:
+                value = getattr(obj, key, None)
+                if value is not None:
+                    values[lang] = value
+            ret[name] = values or None
+        add_linked_data(obj, ret)
+        for name in late_skip_fields:
+            ret.pop(name, None)
+        return ret
+
+    return represent
+
+
+class EventListSerializer(BulkListSerializer):
+    """
+    Serializes GET lists with compile_representation instead of the field
+    machinery of DRF, which dominates the response time of large pages.
+    The output is the same as that of the child serializer.
+    """
+
+    def to_representation(self, data):
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return super().to_representation(data)
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        represent = compile_representation(self.child)
+        finish = self.child.event_fields_to_representation
+        return [finish(obj, represent(obj)) for obj in iterable]
+
+
 class EventSerializer(
     BulkSerializerMixin, EditableLinkedEventsObjectSerializer, GeoModelAPIView
 ):
@@ -2767,7 +3268,9 @@ class EventSerializer(
 
     def to_representation(self, obj):
         ret = super(EventSerializer, self).to_representation(obj)
+        return self.event_fields_to_representation(obj, ret)
 
+    def event_fields_to_representation(self, obj, ret):
         if obj.deleted:
             keys_to_preserve = [
                 "id",
@@ -2786,10 +3289,10 @@ class EventSerializer(
             ret["start_time_obj"] = obj.start_time
             ret["location"] = obj.location
 
-        if obj.start_time and not obj.has_start_time:
+        if "start_time" in ret and obj.start_time and not obj.has_start_time:
             # Return only the date part
             ret["start_time"] = obj.start_time.astimezone(LOCAL_TZ).strftime("%Y-%m-%d")
-        if obj.end_time and not obj.has_end_time:
+        if "end_time" in ret and obj.end_time and not obj.has_end_time:
             # If we're storing only the date part, do not pretend we have the exact time.
             # Timestamp is of the form %Y-%m-%dT00:00:00, so we report the previous date.
             ret["end_time"] = (
@@ -2800,8 +3303,8 @@ class EventSerializer(
             # Unless the event is short, then no need for end time
             if obj.start_time and obj.end_time - obj.start_time <= timedelta(days=1):
                 ret["end_time"] = None
-        del ret["has_start_time"]
-        del ret["has_end_time"]
+        ret.pop("has_start_time", None)
+        ret.pop("has_end_time", None)
         if hasattr(obj, "days_left"):
             ret["days_left"] = int(obj.days_left)
         if self.skip_empties:
@@ -2816,9 +3319,9 @@ class EventSerializer(
         request = self.context.get("request")
         if request:
             if not request.user.is_authenticated:
-                del ret["publication_status"]
+                ret.pop("publication_status", None)
 
-        if ret["sub_events"]:
+        if ret.get("sub_events"):
             sub_events_relation = self.fields["sub_events"].child_relation
             undeleted_sub_events = []
             for sub_event in obj.sub_events.filter(deleted=False):
@@ -2832,7 +3335,7 @@ class EventSerializer(
     class Meta:
         model = Event
         exclude = ()
-        list_serializer_class = BulkListSerializer
+        list_serializer_class = EventListSerializer
 
 
 def _format_images_v0_1(data):
@@ -2851,8 +3354,8 @@ class EventSerializerV0_1(EventSerializer):
         kwargs.setdefault("context", {}).setdefault("include", []).append("image")
         super(EventSerializerV0_1, self).__init__(*args, **kwargs)
 
-    def to_representation(self, obj):
-        ret = super(EventSerializerV0_1, self).to_representation(obj)
+    def event_fields_to_representation(self, obj, ret):
+        ret = super(EventSerializerV0_1, self).event_fields_to_representation(obj, ret)
         _format_images_v0_1(ret)
         return ret
 
@@ -3158,17 +3661,7 @@ def _filter_event_queryset(queryset, params, srs=None):
                 # check all languages for each field
                 qset |= _text_qset_by_translated_field(location_field, val)
 
-            langs = (
-                ["fi", "sv"]
-                if re.search("[\u00C0-\u00FF]", val)
-                else ["fi", "sv", "en"]
-            )
-            tri = [TrigramSimilarity(f"name_{i}", val) for i in langs]
-            keywords = (
-                Keyword.objects.annotate(simile=Greatest(*tri))
-                .filter(simile__gt=0.2)
-                .order_by("-simile")[:3]
-            )
+            keywords = [keyword_id for keyword_id, _ in similar_keywords(val)[:3]]
             if keywords:
                 qset |= Q(keywords__in=keywords)
             qsets.append(qset)
@@ -3631,7 +4124,13 @@ class EventDeletedException(APIException):
     default_code = "gone"
 
 
-class EventViewSet(JSONAPIViewMixin, BulkModelViewSet, viewsets.ReadOnlyModelViewSet):
+class EventViewSet(
+    JSONAPIViewMixin,
+    SparseFieldsetMixin,
+    StreamingListMixin,
+    BulkModelViewSet,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = Event.objects.all()
     # This exclude is, atm, a bit overkill, considering it causes a massive query and no such events exist.
     # queryset = queryset.exclude(super_event_type=Event.SuperEventType.RECURRING, sub_events=None)
@@ -3664,6 +4163,21 @@ class EventViewSet(JSONAPIViewMixin, BulkModelViewSet, viewsets.ReadOnlyModelVie
     )
     ordering = ("-last_modified_time",)
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [DOCXRenderer]
+    # the nested relations of included objects, fetched for the whole page at once
+    include_prefetches = {
+        "location": (
+            "location__divisions",
+            "location__divisions__type",
+            "location__divisions__municipality",
+        ),
+        "keywords": ("keywords__alt_labels",),
+        "audience": ("audience__alt_labels",),
+    }
+    sparse_fieldset_requires = {
+        "": ("id", "publisher", "deleted"),
+        "start_time": ("has_start_time",),
+        "end_time": ("has_end_time", "start_time"),
+    }
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -3686,6 +4200,12 @@ class EventViewSet(JSONAPIViewMixin, BulkModelViewSet, viewsets.ReadOnlyModelVie
     def get_serializer_class(self):
         return EventViewSet.get_serializer_class_for_version(self.request.version)
 
+    def get_sparse_fieldset(self):
+        # the docx renderer needs all the fields
+        if self.request.accepted_renderer.format == "docx":
+            return None
+        return super().get_sparse_fieldset()
+
     def get_serializer_context(self):
         context = super(EventViewSet, self).get_serializer_context()
         context.setdefault("skip_fields", set()).update(
@@ -3698,21 +4218,14 @@ class EventViewSet(JSONAPIViewMixin, BulkModelViewSet, viewsets.ReadOnlyModelVie
         queryset = super().get_queryset()
         context = self.get_serializer_context()
         # prefetch extra if the user want them included
-        if "include" in context:
-            for included in context["include"]:
-                if included == "location":
-                    queryset = queryset.prefetch_related(
-                        "location__divisions",
-                        "location__divisions__type",
-                        "location__divisions__municipality",
-                    )
-                if included == "keywords":
-                    queryset = queryset.prefetch_related(
-                        "keywords__alt_labels", "audience__alt_labels"
-                    )
-        return apply_select_and_prefetch(
+        for included in context.get("include", ()):
+            queryset = queryset.prefetch_related(
+                *self.include_prefetches.get(included, ())
+            )
+        queryset = apply_select_and_prefetch(
             queryset=queryset, extensions=get_extensions_from_request(self.request)
         )
+        return self.prune_queryset(queryset)
 
     def get_object(self):
         # Overridden to prevent queryset filtering from being applied
@@ -4039,21 +4552,80 @@ class EventViewSet(JSONAPIViewMixin, BulkModelViewSet, viewsets.ReadOnlyModelVie
 register_view(EventViewSet, "event")
 
 
+def hydrate_search_results(results):
+    """
+    Loads the objects of the search results with one query per model, with
+    the same related objects as the list endpoints of the models. Results
+    whose objects no longer exist, i.e. are missing from a stale search index,
+    are left out and logged.
+    """
+    querysets = {
+        Event: EventViewSet.queryset.all(),
+        Place: PlaceListViewSet.get_base_queryset(),
+    }
+    pks_by_model = {}
+    for result in results:
+        pks_by_model.setdefault(result.model, []).append(result.pk)
+    objects = {
+        model: querysets.get(model, model.objects.all()).in_bulk(pks)
+        for model, pks in pks_by_model.items()
+    }
+    hydrated = []
+    for result in results:
+        obj = objects[result.model].get(result.pk)
+        if obj is not None:
+            result.object = obj
+            hydrated.append(result)
+    if len(hydrated) < len(results):
+        logger.warning(
+            "%d search results dropped, their objects no longer exist"
+            % (len(results) - len(hydrated))
+        )
+    return hydrated
+
+
+class SearchListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # serialize the objects of each model at once, in the order of the results
+        results = list(data)
+        version = self.context["request"].version
+        positions_by_model = {}
+        for position, search_result in enumerate(results):
+            positions_by_model.setdefault(search_result.model, []).append(position)
+        ret = [None] * len(results)
+        for model, positions in positions_by_model.items():
+            ser_class = get_serializer_for_model(model, version=version)
+            assert ser_class is not None, "Serializer for %s not found" % model
+            objs = [results[position].object for position in positions]
+            model_data = ser_class(objs, many=True, context=self.context).data
+            for position, obj_data in zip(positions, model_data):
+                ret[position] = self.child.add_result_fields(
+                    results[position], obj_data
+                )
+        return ret
+
+
 class SearchSerializer(serializers.Serializer):
+    class Meta:
+        list_serializer_class = SearchListSerializer
+
+    def add_result_fields(self, search_result, data):
+        data["resource_type"] = search_result.model._meta.model_name
+        data["score"] = search_result.score
+        return data
+
     def to_representation(self, search_result):
         model = search_result.model
         version = self.context["request"].version
         ser_class = get_serializer_for_model(model, version=version)
         assert ser_class is not None, "Serializer for %s not found" % model
         data = ser_class(search_result.object, context=self.context).data
-        data["resource_type"] = model._meta.model_name
-        data["score"] = search_result.score
-        return data
+        return self.add_result_fields(search_result, data)
 
 
 class SearchSerializerV0_1(SearchSerializer):
-    def to_representation(self, search_result):
-        ret = super(SearchSerializerV0_1, self).to_representation(search_result)
+    def add_result_fields(self, search_result, data):
+        ret = super(SearchSerializerV0_1, self).add_result_fields(search_result, data)
         if "resource_type" in ret:
             ret["object_type"] = ret["resource_type"]
             del ret["resource_type"]
@@ -4061,6 +4633,164 @@ class SearchSerializerV0_1(SearchSerializer):
 
 
 DATE_DECAY_SCALE = "30d"
+# Relevancy multiplier of events ending DATE_DECAY_SCALE from now, as in the
+# default gauss decay of Elasticsearch
+DATE_DECAY = 0.5
+
+
+def haystack_search(models, q_val=None, input_val=None, params=None):
+    """Searches the haystack index of the active language."""
+    queryset = SearchQuerySet()
+    if input_val:
+        queryset = queryset.filter(autosuggest=input_val)
+    else:
+        queryset = queryset.filter(text=AutoQuery(q_val))
+
+    division, start, end = parse_search_filters(params)
+    if len(models) == 1 and Event in models:
+        if division:
+            queryset = filter_division(queryset, "location__divisions", division)
+        if start:
+            queryset = queryset.filter(Q(end_time__gt=start) | Q(start_time__gte=start))
+        if end:
+            queryset = queryset.filter(Q(end_time__lt=end) | Q(start_time__lte=end))
+
+        if not start and not end and hasattr(queryset.query, "add_decay_function"):
+            # If no time-based filters are set, make the relevancy score
+            # decay the further in the future the event is.
+            now = datetime.utcnow()
+            queryset = queryset.filter(end_time__gt=now).decay(
+                {"gauss": {"end_time": {"origin": now, "scale": DATE_DECAY_SCALE}}}
+            )
+
+    if len(models) == 1 and Place in models:
+        if division:
+            queryset = filter_division(queryset, "divisions", division)
+
+    if len(models) > 0:
+        queryset = queryset.models(*list(models))
+    return queryset
+
+
+def parse_search_filters(params):
+    division = params.get("division", None)
+    if division:
+        division = division.split(",")
+    start = params.get("start", None)
+    if start:
+        start = utils.parse_time(start, is_start=True)[0]
+    end = params.get("end", None)
+    if end:
+        end = utils.parse_time(end, is_start=False)[0]
+    return division, start, end
+
+
+class PostgresSearchResult(object):
+    """A row of postgres_search, in place of a haystack SearchResult."""
+
+    def __init__(self, model, pk, score):
+        self.model = model
+        self.pk = pk
+        self.score = score
+        self.object = None
+
+
+SEARCH_MODELS = OrderedDict(
+    [
+        ("event", Event),
+        ("place", Place),
+    ]
+)
+
+
+def postgres_search_query(lang_code, q_val=None, input_val=None):
+    config = settings.FULLTEXT_SEARCH_LANGUAGES.get(lang_code)
+    if config is None:
+        raise ParseError(
+            "Search is not supported in %s. Supported languages: %s"
+            % (lang_code, ",".join(settings.FULLTEXT_SEARCH_LANGUAGES))
+        )
+    if q_val:
+        return SearchQuery(q_val, config=config, search_type="websearch")
+    # autocomplete entries match the words starting with the terms
+    terms = regex.findall(r"\w+", input_val)
+    if not terms:
+        return None
+    return SearchQuery(
+        " & ".join("%s:*" % term for term in terms), config=config, search_type="raw"
+    )
+
+
+def postgres_date_decay(now):
+    """The gauss decay of the relevancy of events ending after now."""
+    scale = parse_duration_string(DATE_DECAY_SCALE)
+    seconds_left = Extract(
+        F("end_time") - Value(now),
+        "epoch",
+        output_field=FloatField(),
+    )
+    return Power(
+        Value(DATE_DECAY, output_field=FloatField()),
+        Power(seconds_left / Value(scale, output_field=FloatField()), 2),
+    )
+
+
+def filter_postgres_event_search(queryset, score, division, start, end):
+    if division:
+        queryset = filter_division(queryset, "location__divisions", division)
+    if start:
+        queryset = queryset.filter(Q(end_time__gt=start) | Q(start_time__gte=start))
+    if end:
+        queryset = queryset.filter(Q(end_time__lt=end) | Q(start_time__lte=end))
+    if not start and not end:
+        now = timezone.now()
+        queryset = queryset.filter(end_time__gt=now)
+        score = score * postgres_date_decay(now)
+    return queryset, score
+
+
+def postgres_search(models, lang_code, q_val=None, input_val=None, params=None):
+    """
+    Searches the full-text search vectors of the language, with the filters
+    and the relevancy decay of haystack_search. Returns the values of
+    (resource type, id, score) in the order of descending score.
+    """
+    query = postgres_search_query(lang_code, q_val, input_val)
+    if query is None:
+        return Event.objects.none()
+    division, start, end = parse_search_filters(params)
+    vector = "search_vector_%s" % lang_code
+    querysets = []
+    for resource_type, model in SEARCH_MODELS.items():
+        if models and model not in models:
+            continue
+        score = SearchRank(F(vector), query)
+        if model is Event:
+            queryset = Event.objects.filter(
+                publication_status=PublicationStatus.PUBLIC, deleted=False
+            )
+        else:
+            queryset = Place.objects.filter(deleted=False)
+        queryset = queryset.filter(**{vector: query})
+
+        if len(models) == 1 and model is Event:
+            queryset, score = filter_postgres_event_search(
+                queryset, score, division, start, end
+            )
+        if len(models) == 1 and model is Place and division:
+            queryset = filter_division(queryset, "divisions", division)
+
+        querysets.append(
+            queryset.annotate(
+                resource_type=Value(resource_type, output_field=CharField()),
+                result_id=F("id"),
+                score=score,
+            ).values_list("resource_type", "result_id", "score")
+        )
+    queryset = (
+        querysets[0].union(*querysets[1:]) if len(querysets) > 1 else querysets[0]
+    )
+    return queryset.order_by("-score", "result_id")
 
 
 class SearchViewSet(
@@ -4071,6 +4801,16 @@ class SearchViewSet(
             return SearchSerializerV0_1
         return SearchSerializer
 
+    def get_search_results(self, rows):
+        if settings.SEARCH_ENGINE != "postgres":
+            return hydrate_search_results(rows)
+        return hydrate_search_results(
+            [
+                PostgresSearchResult(SEARCH_MODELS[resource_type], pk, score)
+                for resource_type, pk, score in rows
+            ]
+        )
+
     def list(self, request, *args, **kwargs):
         languages = utils.get_fixed_lang_codes()
 
@@ -4093,78 +4833,321 @@ class SearchViewSet(
         if input_val and q_val:
             raise ParseError("Supply either 'q' or 'input', not both")
 
+        models = {
+            SEARCH_MODELS[t]
+            for t in params.get("type", "").split(",")
+            if t in SEARCH_MODELS
+        }
+        if self.request.version == "v0.1":
+            if len(models) == 0:
+                models.add(Event)
+
+        if settings.SEARCH_ENGINE == "postgres":
+            self.object_list = postgres_search(
+                models, self.lang_code, q_val, input_val, params
+            )
+            return self.get_search_response()
+
         old_language = translation.get_language()[:2]
         translation.activate(self.lang_code)
+        try:
+            self.object_list = haystack_search(models, q_val, input_val, params)
+            return self.get_search_response()
+        finally:
+            translation.activate(old_language)
 
-        queryset = SearchQuerySet()
-        if input_val:
-            queryset = queryset.filter(autosuggest=input_val)
-        else:
-            queryset = queryset.filter(text=AutoQuery(q_val))
-
-        models = None
-        types = params.get("type", "").split(",")
-        if types:
-            models = set()
-            for t in types:
-                if t == "event":
-                    models.add(Event)
-                elif t == "place":
-                    models.add(Place)
+    def get_search_response(self):
+        page = self.paginate_queryset(self.object_list)
+        if page is not None:
+            serializer = self.get_serializer(self.get_search_results(page), many=True)
+            return self.get_paginated_response(serializer.data)
 
-        if self.request.version == "v0.1":
-            if len(models) == 0:
-                models.add(Event)
+        serializer = self.get_serializer(
+            self.get_search_results(self.object_list), many=True
+        )
+        return Response(serializer.data)
+
+
+register_view(SearchViewSet, "search", base_name="search")
+
+
+# An empty /change/ response is held at most this many seconds, polling for
+# new changes every CHANGE_FEED_POLL_INTERVAL seconds
+CHANGE_FEED_MAX_WAIT = 10
+CHANGE_FEED_POLL_INTERVAL = 1
+
+
+def encode_change_cursor(change):
+    raw = "%s|%s|%s" % (
+        change.last_modified_time.isoformat(),
+        change._meta.model_name,
+        change.id,
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_change_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, resource_type, pk = raw.split("|", 2)
+        return datetime.fromisoformat(timestamp), resource_type, pk
+    except ValueError:
+        raise ParseError("Invalid change cursor %s" % cursor)
+
+
+class ChangeFeedViewSet(JSONAPIViewMixin, viewsets.GenericViewSet):
+    """
+    Events, places and keywords in the order they were last modified.
+
+    Changes are ordered by (last_modified_time, id) and paged with the opaque
+    cursor returned in meta, so that a replica can keep up by requesting the
+    changes since the previous cursor. Deleted, replaced and unpublished
+    objects are returned as tombstones. Drafts are only returned, as
+    tombstones, to replicas whose cursor is past the time they were created,
+    as those may have seen them published. With wait=<seconds>, an empty
+    response is held until new changes arrive, for at most
+    CHANGE_FEED_MAX_WAIT seconds.
+
+    last_modified_time is set before an object is committed, so changes only
+    enter the feed settings.CHANGE_FEED_SETTLE_TIME seconds after that. A
+    change committed later than that is never returned to a replica whose
+    cursor has already passed it. Such replicas recover with a full resync:
+    the feed read from the start, without since, lists the current state of
+    every object, and the objects it does not list are not public.
+    """
 
-        if len(models) == 1 and Event in models:
-            division = params.get("division", None)
-            if division:
-                queryset = filter_division(queryset, "location__divisions", division)
-
-            start = params.get("start", None)
-            if start:
-                dt = utils.parse_time(start, is_start=True)[0]
-                queryset = queryset.filter(Q(end_time__gt=dt) | Q(start_time__gte=dt))
-
-            end = params.get("end", None)
-            if end:
-                dt = utils.parse_time(end, is_start=False)[0]
-                queryset = queryset.filter(Q(end_time__lt=dt) | Q(start_time__lte=dt))
-
-            if not start and not end and hasattr(queryset.query, "add_decay_function"):
-                # If no time-based filters are set, make the relevancy score
-                # decay the further in the future the event is.
-                now = datetime.utcnow()
-                queryset = queryset.filter(end_time__gt=now).decay(
-                    {"gauss": {"end_time": {"origin": now, "scale": DATE_DECAY_SCALE}}}
+    pagination_class = None
+    # keyed by resource type, in the order of changes with equal ids
+    change_models = OrderedDict(
+        [("keyword", Keyword), ("place", Place), ("event", Event)]
+    )
+    # the columns needed to tell changes from tombstones
+    change_fields = {
+        "keyword": ("id", "last_modified_time", "replaced_by", "deprecated"),
+        "place": ("id", "last_modified_time", "replaced_by", "deleted"),
+        "event": (
+            "id",
+            "last_modified_time",
+            "replaced_by",
+            "deleted",
+            "publication_status",
+        ),
+    }
+    # the querysets the changes of a page are serialized from, at once per type
+    change_querysets = {
+        "keyword": KeywordListViewSet.queryset,
+        "place": PlaceListViewSet.get_base_queryset(),
+        "event": EventViewSet.queryset,
+    }
+
+    def _exclude_unseen_drafts(self, queryset, cursor):
+        drafts = ~Q(publication_status=PublicationStatus.PUBLIC)
+        if not cursor:
+            return queryset.exclude(drafts)
+        return queryset.exclude(drafts & Q(created_time__gt=cursor[0]))
+
+    def _get_changes(self, resource_types, cursor, page_size):
+        until = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_TIME)
+        ranks = list(self.change_models)
+        changes = []
+        for rank, resource_type in enumerate(ranks):
+            if resource_type not in resource_types:
+                continue
+            queryset = self.change_models[resource_type].objects.only(
+                *self.change_fields[resource_type]
+            )
+            # ids are compared bytewise, as they are when merging in Python
+            queryset = queryset.annotate(change_id=Collate("id", "C"))
+            queryset = queryset.filter(last_modified_time__lte=until)
+            if resource_type == "event":
+                queryset = self._exclude_unseen_drafts(queryset, cursor)
+            if cursor:
+                timestamp, cursor_type, cursor_id = cursor
+                if rank > ranks.index(cursor_type):
+                    same_time = Q(
+                        last_modified_time=timestamp, change_id__gte=cursor_id
+                    )
+                else:
+                    same_time = Q(last_modified_time=timestamp, change_id__gt=cursor_id)
+                queryset = queryset.filter(
+                    Q(last_modified_time__gt=timestamp) | same_time
                 )
+            queryset = queryset.order_by("last_modified_time", "change_id")
+            changes += queryset[: page_size + 1]
+        changes.sort(
+            key=lambda obj: (
+                obj.last_modified_time,
+                obj.id,
+                ranks.index(obj._meta.model_name),
+            )
+        )
+        return changes[:page_size], len(changes) > page_size
 
-        if len(models) == 1 and Place in models:
-            division = params.get("division", None)
-            if division:
-                queryset = filter_division(queryset, "divisions", division)
+    def _is_tombstone(self, obj):
+        if obj.replaced_by_id:
+            return True
+        if isinstance(obj, Keyword):
+            return obj.deprecated
+        if isinstance(obj, Event) and (
+            obj.publication_status != PublicationStatus.PUBLIC
+        ):
+            return True
+        return obj.deleted
+
+    def _serialize_objects(self, changes, context):
+        """Serializes the changes that are not tombstones, by type and id."""
+        serialized = {}
+        for resource_type, queryset in self.change_querysets.items():
+            pks = [
+                obj.id
+                for obj in changes
+                if obj._meta.model_name == resource_type and not self._is_tombstone(obj)
+            ]
+            if not pks:
+                continue
+            objs = list(queryset.filter(pk__in=pks))
+            ser_class = get_serializer_for_model(
+                queryset.model, version=self.request.version
+            )
+            for obj, data in zip(
+                objs, ser_class(objs, many=True, context=context).data
+            ):
+                data["resource_type"] = resource_type
+                serialized[resource_type, obj.id] = data
+        return serialized
+
+    def _serialize_tombstone(self, obj, url_builder):
+        resource_type = obj._meta.model_name
+        replaced_by = None
+        if obj.replaced_by_id:
+            replaced_by = url_builder.build(
+                "%s-detail" % resource_type, obj.replaced_by_id
+            )
+        return {
+            "id": obj.id,
+            "@id": url_builder.build("%s-detail" % resource_type, obj.id),
+            "resource_type": resource_type,
+            "last_modified_time": DateTimeField().to_representation(
+                obj.last_modified_time
+            ),
+            "deleted": True,
+            "replaced_by": replaced_by,
+        }
 
-        if len(models) > 0:
-            queryset = queryset.models(*list(models))
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        resource_types = list(self.change_models)
+        if params.get("type"):
+            resource_types = params["type"].split(",")
+            for resource_type in resource_types:
+                if resource_type not in self.change_models:
+                    raise ParseError(
+                        "Invalid type %s. Supported types: %s"
+                        % (resource_type, ",".join(self.change_models))
+                    )
+        cursor = None
+        since = params.get("since")
+        if since:
+            cursor = decode_change_cursor(since)
+            if cursor[1] not in self.change_models:
+                raise ParseError("Invalid change cursor %s" % since)
+        page_size = parse_digit(params.get("page_size", "100"), "page_size")
+        page_size = min(max(page_size, 1), 1000)
+
+        wait = min(parse_digit(params.get("wait", "0"), "wait"), CHANGE_FEED_MAX_WAIT)
+        deadline = time.monotonic() + wait
+
+        changes, has_more = self._get_changes(resource_types, cursor, page_size)
+        while not changes and time.monotonic() < deadline:
+            time.sleep(CHANGE_FEED_POLL_INTERVAL)
+            changes, has_more = self._get_changes(resource_types, cursor, page_size)
+
+        serialized = self._serialize_objects(changes, self.get_serializer_context())
+        url_builder = get_url_builder(self.request)
+        data = [
+            serialized.get((obj._meta.model_name, obj.id))
+            or self._serialize_tombstone(obj, url_builder)
+            for obj in changes
+        ]
+        next_cursor = encode_change_cursor(changes[-1]) if changes else since
+        next_url = None
+        if next_cursor:
+            next_url = request.build_absolute_uri(
+                "%s?%s"
+                % (
+                    request.path,
+                    urllib.parse.urlencode(dict(params.items(), since=next_cursor)),
+                )
+            )
+        meta = OrderedDict(
+            [("cursor", next_cursor), ("has_more", has_more), ("next", next_url)]
+        )
+        return Response(OrderedDict([("meta", meta), ("data", data)]))
 
-        self.object_list = queryset.load_all()
 
-        page = self.paginate_queryset(self.object_list)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            resp = self.get_paginated_response(serializer.data)
-            translation.activate(old_language)
-            return resp
+register_view(ChangeFeedViewSet, "change", base_name="change")
 
-        serializer = self.get_serializer(self.object_list, many=True)
-        resp = Response(serializer.data)
 
-        translation.activate(old_language)
+class AutosuggestViewSet(JSONAPIViewMixin, viewsets.GenericViewSet):
+    """
+    Keywords, places and upcoming events whose names start with the input,
+    for typeahead. Keywords and places that have the most events come first.
+    Events are not ranked, so they follow the keywords and places that have
+    events, the ones with the shortest names first.
 
-        return resp
+    Looked up from an in-memory index of this process, see
+    events.autosuggest.AutosuggestIndex.
+    """
 
+    pagination_class = None
 
-register_view(SearchViewSet, "search", base_name="search")
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        input_val = params.get("input", "").strip()
+        if not input_val:
+            raise ParseError("Supply autocomplete entry with 'input='")
+        resource_types = None
+        if params.get("type"):
+            resource_types = params["type"].split(",")
+            for resource_type in resource_types:
+                if resource_type not in AUTOSUGGEST_MODELS:
+                    raise ParseError(
+                        "Invalid type %s. Supported types: %s"
+                        % (resource_type, ",".join(AUTOSUGGEST_MODELS))
+                    )
+        language = params.get("language", None)
+        if language is not None and language not in utils.get_fixed_lang_codes():
+            raise ParseError(
+                "Invalid language supplied. Supported languages: %s"
+                % ",".join(utils.get_fixed_lang_codes())
+            )
+        page_size = parse_digit(params.get("page_size", "10"), "page_size")
+        page_size = min(max(page_size, 1), 100)
+
+        entries = get_autosuggest_index().suggest(
+            input_val, resource_types, language, page_size
+        )
+        url_builder = get_url_builder(request)
+        data = []
+        for entry in entries:
+            suggestion = OrderedDict(
+                [
+                    ("id", entry.id),
+                    (
+                        "@id",
+                        url_builder.build("%s-detail" % entry.resource_type, entry.id),
+                    ),
+                    ("resource_type", entry.resource_type),
+                    ("name", entry.names),
+                ]
+            )
+            if entry.resource_type != "event":
+                suggestion["n_events"] = entry.rank
+            data.append(suggestion)
+        return Response(OrderedDict([("data", data)]))
+
+
+register_view(AutosuggestViewSet, "autosuggest", base_name="autosuggest")
 
 
 class FeedbackSerializer(serializers.ModelSerializer):
@@ -1,6 +1,8 @@
 from collections import OrderedDict
 
+from django.core.paginator import InvalidPage
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
 
@@ -10,7 +12,7 @@ class CustomPagination(pagination.PageNumberPagination):
     max_page_size = 100
     page_size_query_param = "page_size"
 
-    def get_paginated_response(self, data):
+    def get_paginated_data(self, data):
         meta = OrderedDict(
             [
                 ("count", self.page.paginator.count),
@@ -18,8 +20,31 @@ class CustomPagination(pagination.PageNumberPagination):
                 ("previous", self.get_previous_link()),
             ]
         )
+        return OrderedDict([("meta", meta), ("data", data)])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
 
-        return Response(OrderedDict([("meta", meta), ("data", data)]))
+    def paginate_queryset_lazily(self, queryset, request, view=None):
+        """
+        Paginates like paginate_queryset, but returns the page as an
+        unevaluated queryset, so that it can be fetched in parts.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        self.request = request
+        return self.page.object_list
 
 
 class LargeResultsSetPagination(CustomPagination):
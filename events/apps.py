@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class EventsConfig(AppConfig):
@@ -8,6 +8,13 @@ class EventsConfig(AppConfig):
     def ready(self):
         from django.contrib.auth import get_user_model
 
+        from .autosuggest import (
+            autosuggest_alt_labels_changed,
+            autosuggest_post_delete,
+            autosuggest_post_save,
+        )
+        from .keywords import similar_keywords_changed
+        from .models import Event, Keyword, Place
         from .signals import organization_post_save, user_post_save
 
         post_save.connect(
@@ -20,3 +27,29 @@ class EventsConfig(AppConfig):
             sender=get_user_model(),
             dispatch_uid="user_post_save",
         )
+        for model in (Keyword, Place, Event):
+            post_save.connect(
+                autosuggest_post_save,
+                sender=model,
+                dispatch_uid="autosuggest_post_save_%s" % model._meta.model_name,
+            )
+            post_delete.connect(
+                autosuggest_post_delete,
+                sender=model,
+                dispatch_uid="autosuggest_post_delete_%s" % model._meta.model_name,
+            )
+        post_save.connect(
+            similar_keywords_changed,
+            sender=Keyword,
+            dispatch_uid="similar_keywords_saved",
+        )
+        post_delete.connect(
+            similar_keywords_changed,
+            sender=Keyword,
+            dispatch_uid="similar_keywords_deleted",
+        )
+        m2m_changed.connect(
+            autosuggest_alt_labels_changed,
+            sender=Keyword.alt_labels.through,
+            dispatch_uid="autosuggest_alt_labels_changed",
+        )
@@ -0,0 +1,355 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from datetime import timedelta
+from functools import partial
+from heapq import heappop, heappush, nsmallest
+
+from django.db import transaction
+from django.utils import timezone
+
+from events.keywords import TRIGRAM_WORD_RE, trigrams
+from events.models import Event, Keyword, Place, PublicationStatus
+from events.utils import get_fixed_lang_codes
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for objects modified in other processes
+AUTOSUGGEST_SYNC_INTERVAL = 60
+# Objects saved during the last seconds may still be in uncommitted transactions
+AUTOSUGGEST_SYNC_OVERLAP = timedelta(seconds=10)
+# Minimum trigram similarity of fuzzy matches, as in pg_trgm
+AUTOSUGGEST_SIMILARITY = 0.3
+# Shortest input to match fuzzily
+AUTOSUGGEST_FUZZY_LENGTH = 3
+
+AutosuggestEntry = namedtuple(
+    "AutosuggestEntry", ["resource_type", "id", "names", "texts", "rank", "end_time"]
+)
+
+
+def normalize_words(text):
+    return TRIGRAM_WORD_RE.findall(text.casefold())
+
+
+def _translated(row, field, languages):
+    """Returns {language: value} of the translated field in a values() row."""
+    values = {}
+    for lang in languages:
+        value = row.get("%s_%s" % (field, lang))
+        if value:
+            values[lang] = value
+    return values
+
+
+def load_keywords(ids=None):
+    languages = get_fixed_lang_codes()
+    queryset = Keyword.objects.filter(deprecated=False, replaced_by__isnull=True)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    fields = ["id", "n_events"] + ["name_%s" % lang for lang in languages]
+    alt_labels = {}
+    relations = Keyword.alt_labels.through.objects.filter(
+        keyword_id__in=queryset.values("id")
+    ).values_list("keyword_id", "keywordlabel__name", "keywordlabel__language_id")
+    for keyword_id, name, language in relations:
+        alt_labels.setdefault(keyword_id, []).append((language, name))
+    for row in queryset.values(*fields):
+        names = _translated(row, "name", languages)
+        texts = list(names.items()) + alt_labels.get(row["id"], [])
+        yield AutosuggestEntry(
+            "keyword", row["id"], names, texts, row["n_events"], None
+        )
+
+
+def load_places(ids=None):
+    languages = get_fixed_lang_codes()
+    queryset = Place.objects.filter(deleted=False, replaced_by__isnull=True)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    fields = ["id", "n_events"] + [
+        "%s_%s" % (field, lang)
+        for field in ("name", "street_address")
+        for lang in languages
+    ]
+    for row in queryset.values(*fields):
+        names = _translated(row, "name", languages)
+        addresses = _translated(row, "street_address", languages)
+        texts = list(names.items()) + list(addresses.items())
+        yield AutosuggestEntry("place", row["id"], names, texts, row["n_events"], None)
+
+
+def load_events(ids=None):
+    languages = get_fixed_lang_codes()
+    queryset = Event.objects.filter(
+        publication_status=PublicationStatus.PUBLIC,
+        deleted=False,
+        end_time__gt=timezone.now(),
+    )
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    fields = ["id", "end_time"] + ["name_%s" % lang for lang in languages]
+    for row in queryset.values(*fields):
+        names = _translated(row, "name", languages)
+        # events are not ranked, they follow the keywords and places in use
+        yield AutosuggestEntry(
+            "event", row["id"], names, list(names.items()), 0, row["end_time"]
+        )
+
+
+AUTOSUGGEST_MODELS = {
+    "keyword": (Keyword, load_keywords),
+    "place": (Place, load_places),
+    "event": (Event, load_events),
+}
+
+
+def _prefix_order(entry):
+    # among equally used, the shortest names complete the input the most
+    shortest = min((len(name) for name in entry.names.values()), default=0)
+    return -entry.rank, shortest, entry.id
+
+
+class AutosuggestIndex(object):
+    """
+    In-process index of the names of keywords, places and upcoming events
+    for typeahead.
+
+    Words are kept in a sorted list, so that the words starting with the
+    input are found by bisection, and their trigrams are indexed for fuzzy
+    matches. Saved objects are reloaded on the next lookup after their
+    transaction commits, and objects modified in other processes are picked
+    up every AUTOSUGGEST_SYNC_INTERVAL seconds, when the events that have
+    ended are also dropped.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # (resource type, id) -> AutosuggestEntry
+        self.entries = {}
+        # sorted distinct words
+        self.words = []
+        # word -> {(resource type, id, language)}
+        self.word_postings = {}
+        # trigram -> {(resource type, id, text index)}
+        self.trigram_postings = {}
+        # (resource type, id, text index) -> number of trigrams of the text
+        self.trigram_counts = {}
+        # resource type -> ids to reload
+        self.pending = {}
+        # heap of (end time, resource type, id) of the entries that expire
+        self.expiry = []
+        self.synced_at = None
+        self.sync_checked = None
+
+    def load(self):
+        with self.lock:
+            started = timezone.now()
+            for resource_type, (_, loader) in AUTOSUGGEST_MODELS.items():
+                for entry in loader():
+                    self._add(entry)
+            self.synced_at = started
+            self.sync_checked = time.monotonic()
+        logger.info("Autosuggest index loaded with %d objects" % len(self.entries))
+
+    def _add(self, entry):
+        key = (entry.resource_type, entry.id)
+        self.entries[key] = entry
+        for position, (language, text) in enumerate(entry.texts):
+            for word in normalize_words(text):
+                postings = self.word_postings.get(word)
+                if postings is None:
+                    postings = self.word_postings[word] = set()
+                    insort(self.words, word)
+                postings.add(key + (language,))
+            text_trigrams = trigrams(text)
+            self.trigram_counts[key + (position,)] = len(text_trigrams)
+            for trigram in text_trigrams:
+                self.trigram_postings.setdefault(trigram, set()).add(key + (position,))
+        if entry.end_time is not None:
+            heappush(self.expiry, (entry.end_time,) + key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for position, (language, text) in enumerate(entry.texts):
+            for word in normalize_words(text):
+                postings = self.word_postings.get(word)
+                if postings is None:
+                    continue
+                postings.discard(key + (language,))
+                if not postings:
+                    del self.word_postings[word]
+                    del self.words[bisect_left(self.words, word)]
+            self.trigram_counts.pop(key + (position,), None)
+            for trigram in trigrams(text):
+                postings = self.trigram_postings.get(trigram)
+                if postings is None:
+                    continue
+                postings.discard(key + (position,))
+                if not postings:
+                    del self.trigram_postings[trigram]
+
+    def queue(self, resource_type, ids):
+        """Queues objects to be reloaded on the next lookup."""
+        with self.lock:
+            self.pending.setdefault(resource_type, set()).update(ids)
+
+    def _reload_pending(self):
+        pending, self.pending = self.pending, {}
+        for resource_type, ids in pending.items():
+            loader = AUTOSUGGEST_MODELS[resource_type][1]
+            for pk in ids:
+                self._remove((resource_type, pk))
+            for entry in loader(ids):
+                self._add(entry)
+
+    def _queue_modified(self):
+        started = timezone.now()
+        since = self.synced_at - AUTOSUGGEST_SYNC_OVERLAP
+        for resource_type, (model, _) in AUTOSUGGEST_MODELS.items():
+            ids = model.objects.filter(last_modified_time__gte=since).values_list(
+                "id", flat=True
+            )
+            self.pending.setdefault(resource_type, set()).update(ids)
+        self.synced_at = started
+
+    def _remove_expired(self, now):
+        while self.expiry and self.expiry[0][0] <= now:
+            end_time, resource_type, pk = heappop(self.expiry)
+            entry = self.entries.get((resource_type, pk))
+            # reloaded entries may have been pushed again with a later end time
+            if entry is not None and entry.end_time == end_time:
+                self._remove((resource_type, pk))
+
+    def refresh(self):
+        with self.lock:
+            if time.monotonic() - self.sync_checked >= AUTOSUGGEST_SYNC_INTERVAL:
+                self.sync_checked = time.monotonic()
+                self._queue_modified()
+                self._remove_expired(timezone.now())
+            if self.pending:
+                self._reload_pending()
+
+    def _prefix_matches(self, words, language):
+        """Keys of the entries with words starting with each of the words."""
+        matches = None
+        # the longest words have the fewest completions
+        for word in sorted(words, key=len, reverse=True):
+            keys = set()
+            position = bisect_left(self.words, word)
+            while position < len(self.words) and self.words[position].startswith(word):
+                for resource_type, id, text_language in self.word_postings[
+                    self.words[position]
+                ]:
+                    if language is None or text_language == language:
+                        keys.add((resource_type, id))
+                position += 1
+            matches = keys if matches is None else matches & keys
+            if not matches:
+                break
+        return matches
+
+    def _fuzzy_matches(self, text, language):
+        """Similarities of the entries with texts similar to text."""
+        text_trigrams = trigrams(text)
+        common = Counter()
+        for trigram in text_trigrams:
+            common.update(self.trigram_postings.get(trigram, ()))
+        similarities = {}
+        for text_key, count in common.items():
+            similarity = count / (
+                len(text_trigrams) + self.trigram_counts[text_key] - count
+            )
+            if similarity < AUTOSUGGEST_SIMILARITY:
+                continue
+            key, position = text_key[:2], text_key[2]
+            if language is not None:
+                if self.entries[key].texts[position][0] != language:
+                    continue
+            similarities[key] = max(similarity, similarities.get(key, 0))
+        return similarities
+
+    def _is_visible(self, entry, resource_types, now):
+        if resource_types and entry.resource_type not in resource_types:
+            return False
+        return entry.end_time is None or entry.end_time > now
+
+    def suggest(self, text, resource_types=None, language=None, limit=10):
+        """
+        Returns the entries with words starting with the words of text, most
+        used first, followed by fuzzy matches if there are less than limit.
+        """
+        words = normalize_words(text)
+        if not words:
+            return []
+        self.refresh()
+        now = timezone.now()
+        with self.lock:
+            entries = [
+                self.entries[key]
+                for key in self._prefix_matches(words, language)
+                if self._is_visible(self.entries[key], resource_types, now)
+            ]
+            results = nsmallest(limit, entries, key=_prefix_order)
+            if len(results) >= limit or len(text) < AUTOSUGGEST_FUZZY_LENGTH:
+                return results
+            found = {(entry.resource_type, entry.id) for entry in results}
+            similarities = self._fuzzy_matches(text, language)
+            fuzzy = [
+                (similarity, self.entries[key])
+                for key, similarity in similarities.items()
+                if key not in found
+                and self._is_visible(self.entries[key], resource_types, now)
+            ]
+            fuzzy = nsmallest(
+                limit - len(results),
+                fuzzy,
+                key=lambda match: (-match[0], -match[1].rank, match[1].id),
+            )
+            return results + [entry for _, entry in fuzzy]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_autosuggest_index():
+    """Returns the index of this process, loading it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = AutosuggestIndex()
+            index.load()
+            _index = index
+    return _index
+
+
+def reset_autosuggest_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def _queue_saved(resource_type, instance):
+    index = _index
+    if index is not None:
+        # reloaded from the database, once the saved values are visible there
+        transaction.on_commit(partial(index.queue, resource_type, [instance.pk]))
+
+
+def autosuggest_post_save(sender, instance, **kwargs):
+    _queue_saved(sender._meta.model_name, instance)
+
+
+def autosuggest_post_delete(sender, instance, **kwargs):
+    _queue_saved(sender._meta.model_name, instance)
+
+
+def autosuggest_alt_labels_changed(sender, instance, action, **kwargs):
+    if action.startswith("post_") and isinstance(instance, Keyword):
+        _queue_saved("keyword", instance)
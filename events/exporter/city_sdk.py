@@ -1,21 +1,25 @@
 # -*- coding: utf-8 -*-
-import datetime
 import json
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 
-import pytz
 import requests
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management import CommandError
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef, Q, Subquery
 from httmock import all_requests, HTTMock, response
 from icalendar import Calendar
 from icalendar import Event as CalendarEvent
+from requests.adapters import HTTPAdapter
 
 from events.exporter.base import Exporter, register_exporter
-from events.models import Event, ExportInfo, Keyword, Place
+from events.models import BaseModel, Event, ExportInfo, Keyword, Place
 
 BASE_API_URL = settings.CITYSDK_API_SETTINGS["CITYSDK_URL"]
 EVENTS_URL = BASE_API_URL + "events/"
@@ -24,6 +28,7 @@ CATEGORY_URL = BASE_API_URL + "categories?List=event"
 
 DRY_RUN_MODE = False  # If set True, do just local DB actions
 VERBOSE = False  # If set to True, print verbose creation logs
+EXPORT_WORKERS = 8  # Number of concurrent requests to CitySDK
 
 # maps ISO 639-1 alpha-2 to BCP 47 tags consumed by CitySDK
 bcp47_lang_map = {"fi": "fi-FI", "sv": "sv-SE", "en": "en-GB"}  # or sv-FI?
@@ -93,6 +98,14 @@ class CitySDKExporter(Exporter):
     response_headers = {"content-type": "application/json"}
 
     def setup(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=EXPORT_WORKERS, pool_maxsize=EXPORT_WORKERS
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.auth_lock = threading.Lock()
+        self.target_ids = {}
         self.authenticate()
 
     def authenticate(self):
@@ -101,7 +114,7 @@ class CitySDKExporter(Exporter):
         """
         username = settings.CITYSDK_API_SETTINGS["USERNAME"]
         password = settings.CITYSDK_API_SETTINGS["PASSWORD"]
-        session_response = requests.get(
+        session_response = self.session.get(
             "%sauth?username=%s&password=%s" % (BASE_API_URL, username, password)
         )
         if session_response.status_code == 200:
@@ -112,30 +125,35 @@ class CitySDKExporter(Exporter):
                 "Authentication failed with credentials %s:%s" % ((username, password))
             )
 
+    def _get_target_ids(self, klass):
+        """
+        Maps the ids of the exported klass objects to their CitySDK ids
+        """
+        if klass not in self.target_ids:
+            self.target_ids[klass] = dict(
+                ExportInfo.objects.filter(
+                    content_type=ContentType.objects.get_for_model(klass),
+                    target_system=self.name,
+                ).values_list("object_id", "target_id")
+            )
+        return self.target_ids[klass]
+
     def _generate_exportable_event(self, event):
         citysdk_event = CITYSDK_EVENT_DEFAULTS_TPL.copy()
 
         # fetch category ID from exported categories
-        citysdk_event["category"] = []
-        for category in event.keywords.all():
-            exported_category = ExportInfo.objects.filter(
-                content_type=ContentType.objects.get_for_model(Keyword),
-                object_id=category.id,
-                target_system=self.name,
-            ).first()
-            citysdk_event["category"].append({"id": exported_category.target_id})
+        category_ids = self._get_target_ids(Keyword)
+        citysdk_event["category"] = [
+            {"id": category_ids[category.id]}
+            for category in event.keywords.all()
+            if category.id in category_ids
+        ]
 
         if event.location:
-            exported_poi = ExportInfo.objects.filter(
-                content_type=ContentType.objects.get_for_model(Place),
-                object_id=event.location.id,
-                target_system=self.name,
-            ).first()
-
             citysdk_event["location"] = {
                 "relationship": [
                     {
-                        "targetPOI": exported_poi.target_id,
+                        "targetPOI": self._get_target_ids(Place).get(event.location.id),
                         "term": "equal",
                         "base": POIS_URL,
                     }
@@ -247,138 +265,222 @@ class CitySDKExporter(Exporter):
         self._export_places()
         self._export_events()
 
-    def _export_models(self, klass, generate, url, json_wrapper, extra_filters=None):
+    @staticmethod
+    def _wrap(klass, json_wrapper, citysdk_model):
+        if klass is Keyword:
+            return {"list": "event", "category": citysdk_model}
+        return {json_wrapper: citysdk_model}
+
+    def _export_models(
+        self, klass, generate, url, json_wrapper, queryset=None, extra_filter=None
+    ):
+        """
+        Exports the new, modified and deleted klass objects. Each of them is
+        found with a single query and the requests are sent concurrently.
+        """
         model_type = ContentType.objects.get_for_model(klass)
+        if queryset is None:
+            queryset = klass.objects.all()
+        export_time = BaseModel.now()
 
         # get all exported
         export_infos = ExportInfo.objects.filter(
             content_type=model_type, target_system=self.name
         )
+        exported = export_infos.filter(object_id=OuterRef("pk"))
+        stale = exported.filter(
+            Q(last_exported_time__isnull=True)
+            | Q(last_exported_time__lt=OuterRef("last_modified_time"))
+        )
+        modified = queryset.annotate(
+            export_info_id=Subquery(stale.values("pk")[:1]),
+            export_target_id=Subquery(stale.values("target_id")[:1]),
+        ).filter(export_info_id__isnull=False)
+        deleted = export_infos.filter(
+            ~Exists(klass.objects.filter(pk=OuterRef("object_id")))
+        )
+        new = queryset.filter(~Exists(exported))
+        if extra_filter is not None:
+            new = new.filter(extra_filter)
 
-        model_name = klass.__name__
-        modify_count = 0
-        delete_count = 0
-        new_count = 0
+        modify_count = self._export_modified(
+            klass, generate, url, json_wrapper, modified, export_time
+        )
+        delete_count = self._export_deleted(klass, url, deleted)
+        new_count = self._export_added(
+            klass, generate, url, json_wrapper, new, export_time
+        )
 
-        # deleted or modified
-        for export_info in export_infos:
-            try:
-                model = klass.objects.get(pk=export_info.object_id)
-                if model.last_modified_time > export_info.last_exported_time:
-                    citysdk_model = generate(model)
-                    citysdk_model["id"] = export_info.target_id
-                    if model_name == "Keyword":
-                        data = {"list": "event", "category": citysdk_model}
-                    else:
-                        data = {json_wrapper: citysdk_model}
-                    modify_response = self._do_req("post", url, data)
-                    if modify_response.status_code == 200:
-                        export_info.save()  # refresh last export date
-                        print(
-                            "%s updated (original id: %s, target id: %s)"
-                            % (model_name, model.pk, export_info.target_id)
-                        )
-                        modify_count += 1
+        model_name = klass.__name__
+        print(model_name + " items added: " + str(new_count))
+        print(model_name + " items modified: " + str(modify_count))
+        print(model_name + " items deleted: " + str(delete_count))
 
-            except ObjectDoesNotExist:
-                if model_name == "Keyword":
-                    delete_response = self._do_req(
-                        "delete", url, data={"id": export_info.target_id}
-                    )
-                else:
-                    delete_response = self._do_req(
-                        "delete", url + export_info.target_id
-                    )
-                if delete_response.status_code == 200:
-                    export_info.delete()
-                    print(
-                        "%s removed (original id: %d, target id: %s) "
-                        "from target system"
-                        % (model_name, export_info.object_id, export_info.target_id)
-                    )
-                    delete_count += 1
+    def _export_modified(self, klass, generate, url, json_wrapper, qs, export_time):
+        jobs = (
+            (
+                model,
+                "post",
+                url,
+                self._wrap(
+                    klass,
+                    json_wrapper,
+                    dict(generate(model), id=model.export_target_id),
+                ),
+            )
+            for model in qs
+        )
+        export_info_ids = []
+        for model, modify_response in self._send_all(jobs):
+            if self._succeeded(modify_response):
+                export_info_ids.append(model.export_info_id)
+                print(
+                    "%s updated (original id: %s, target id: %s)"
+                    % (klass.__name__, model.pk, model.export_target_id)
+                )
+        # refresh last export dates
+        ExportInfo.objects.filter(pk__in=export_info_ids).update(
+            last_exported_time=export_time
+        )
+        return len(export_info_ids)
 
-        # new
-        imported = {"id__in": export_infos.values("object_id")}
-        if extra_filters:
-            qs = klass.objects.exclude(**imported).filter(**extra_filters).distinct()
+    def _export_deleted(self, klass, url, export_infos):
+        if klass is Keyword:
+            jobs = (
+                (export_info, "delete", url, {"id": export_info.target_id})
+                for export_info in export_infos
+            )
         else:
-            qs = klass.objects.exclude(**imported)
-        for model in qs:
-            citysdk_model = generate(model)
-            citysdk_model["created"] = datetime.datetime.utcnow().replace(
-                tzinfo=pytz.utc
+            jobs = (
+                (export_info, "delete", url + export_info.target_id, None)
+                for export_info in export_infos
+            )
+        export_info_ids = []
+        for export_info, delete_response in self._send_all(jobs):
+            if self._succeeded(delete_response):
+                export_info_ids.append(export_info.pk)
+                print(
+                    "%s removed (original id: %s, target id: %s) "
+                    "from target system"
+                    % (klass.__name__, export_info.object_id, export_info.target_id)
+                )
+        ExportInfo.objects.filter(pk__in=export_info_ids).delete()
+        return len(export_info_ids)
+
+    def _export_added(self, klass, generate, url, json_wrapper, qs, export_time):
+        jobs = (
+            (
+                model,
+                "put",
+                url,
+                self._wrap(
+                    klass,
+                    json_wrapper,
+                    dict(generate(model), created=BaseModel.now()),
+                ),
             )
-            if model_name == "Keyword":
-                data = {"list": "event", "category": citysdk_model}
+            for model in qs
+        )
+        model_type = ContentType.objects.get_for_model(klass)
+        export_infos = []
+        for model, new_response in self._send_all(jobs):
+            if not self._succeeded(new_response):
+                print("%s export failed (original id: %s)" % (klass.__name__, model.pk))
+                continue
+            created = new_response.json()
+            if isinstance(created, dict) and "id" in created:
+                new_id = created["id"]
             else:
-                data = {json_wrapper: citysdk_model}
-            new_response = self._do_req("put", url, data)
-            if new_response.status_code == 200:
-                new = new_response.json()
-                if isinstance(new, dict) and "id" in new:
-                    new_id = new["id"]
-                else:
-                    new_id = new
-                if VERBOSE:
-                    print(
-                        "%s exported (original id: %d, target id: %s)"
-                        % (model_name, model.pk, new_id)
-                    )
-                new_export_info = ExportInfo(
-                    content_object=model,
+                new_id = created
+            if VERBOSE:
+                print(
+                    "%s exported (original id: %s, target id: %s)"
+                    % (klass.__name__, model.pk, new_id)
+                )
+            export_infos.append(
+                ExportInfo(
                     content_type=model_type,
+                    object_id=model.pk,
                     target_id=new_id,
                     target_system=self.name,
+                    last_exported_time=export_time,
                 )
-                new_export_info.save()
-                new_count += 1
-            else:
-                print("%s export failed (original id: %s)" % (model_name, model.pk))
+            )
+        ExportInfo.objects.bulk_create(export_infos, batch_size=1000)
+        return len(export_infos)
 
-        print(model_name + " items added: " + str(new_count))
-        print(model_name + " items modified: " + str(modify_count))
-        print(model_name + " items deleted: " + str(delete_count))
+    @staticmethod
+    def _succeeded(resp):
+        return resp is not None and resp.status_code == 200
+
+    def _send_all(self, jobs):
+        """
+        Sends the requests of (item, method, url, data) jobs, at most
+        EXPORT_WORKERS at a time, and yields (item, response) pairs in order.
+        The response is None if the request could not be sent.
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as executor:
+            for item, method, url, data in jobs:
+                future = executor.submit(self._try_req, method, url, data)
+                pending.append((item, future))
+                if len(pending) >= 2 * EXPORT_WORKERS:
+                    done_item, done_future = pending.popleft()
+                    yield done_item, done_future.result()
+            while pending:
+                done_item, done_future = pending.popleft()
+                yield done_item, done_future.result()
+
+    def _try_req(self, method, url, data=None):
+        try:
+            return self._do_req(method, url, data)
+        except requests.RequestException as e:
+            print("%s %s failed: %s" % (method.upper(), url, e))
+            return None
 
     def _do_req(self, method, url, data=None):
-        kwargs = {"headers": self.response_headers, "cookies": self.session_cookies}
+        kwargs = {"headers": self.response_headers}
         if data:
             kwargs["data"] = jsonize(data)
 
-        if DRY_RUN_MODE:
-            with HTTMock(citysdk_mock):
-                return requests.request(method, url, **kwargs)
-        else:
-            resp = requests.request(method, url, **kwargs)
-            # if session dies while doing exporting
-            if resp.status_code == 401:
+        resp = self.session.request(method, url, **kwargs)
+        # if session dies while doing exporting
+        if resp.status_code == 401 and not DRY_RUN_MODE:
+            with self.auth_lock:
                 self.authenticate()
-                return requests.request(method, url, **kwargs)
-            assert resp.status_code == 200
-            return resp
+            resp = self.session.request(method, url, **kwargs)
+        return resp
 
     def _export_categories(self):
-        filters = {"event__in": Event.objects.all()}
         self._export_models(
             Keyword,
             self._generate_exportable_category,
             CATEGORY_URL,
             "poi",
-            extra_filters=filters,
+            extra_filter=Exists(Event.objects.filter(keywords=OuterRef("pk"))),
         )
 
     def _export_places(self):
-        filters = {"event__in": Event.objects.all()}
         self._export_models(
             Place,
             self._generate_exportable_place,
             POIS_URL,
             "poi",
-            extra_filters=filters,
+            extra_filter=Exists(Event.objects.filter(location=OuterRef("pk"))),
         )
 
     def _export_events(self):
-        self._export_models(Event, self._generate_exportable_event, EVENTS_URL, "event")
+        # categories and places have just been exported
+        self.target_ids = {}
+        self._export_models(
+            Event,
+            self._generate_exportable_event,
+            EVENTS_URL,
+            "event",
+            queryset=Event.objects.select_related("location").prefetch_related(
+                "keywords"
+            ),
+        )
 
     def __delete_resource(self, resource, url):
         response = self._do_req("delete", "%s/%s" % (url, resource.target_id))
@@ -435,11 +537,14 @@ class CitySDKExporter(Exporter):
                 )
 
     def export_events(self, is_delete=False):
-
-        if is_delete:
-            self._delete_exported_from_target()
-        else:
-            self._export_new()
+        with ExitStack() as stack:
+            if DRY_RUN_MODE:
+                # mocks the requests of all the worker threads
+                stack.enter_context(HTTMock(citysdk_mock))
+            if is_delete:
+                self._delete_exported_from_target()
+            else:
+                self._export_new()
 
 
 # For dry run request mocking
@@ -1,22 +1,42 @@
 import datetime
+import functools
 import itertools
 import logging
 import operator
 import os
 from collections import defaultdict, namedtuple
+from collections.abc import Iterator
 from functools import partial
 
 import pytz
 from django.conf import settings
 from django.contrib.gis.gdal import CoordTransform, SpatialReference
 from django.contrib.gis.geos import Point, Polygon
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
 from modeltranslation.translator import translator
 from rest_framework.exceptions import ValidationError
 
-from events.importer.sync import ModelSyncher
-from events.models import Event, EventLink, Image, Language, Offer, Place
+from events.importer.cache import ResponseCache
+from events.importer.checkpoint import ImportCheckpoint
+from events.importer.http_client import HttpClient
+from events.importer.instrumentation import ImportReport
+from events.importer.sync import IdSyncher, ModelSyncher
+from events.models import (
+    BaseModel,
+    Event,
+    EventLink,
+    Image,
+    Keyword,
+    Language,
+    Offer,
+    Place,
+)
 
-from .util import clean_text, separate_scripts
+from .recurring import RecurringGrouper
+from .util import chunked, clean_text, separate_scripts
 
 # Per module logger
 logger = logging.getLogger(__name__)
@@ -29,6 +49,8 @@ EXTENSION_COURSE_FIELDS = (
     "remaining_attendee_capacity",
 )
 LOCAL_TZ = pytz.timezone(settings.TIME_ZONE)
+# Number of events Importer.save_events loads and writes at a time
+EVENT_BATCH_SIZE = 500
 
 
 # Using a recursive default dictionary
@@ -38,7 +60,109 @@ def recur_dict():
     return defaultdict(recur_dict)
 
 
+def _load_related_ids(through, column, event_ids):
+    related = defaultdict(set)
+    rows = through.objects.filter(event_id__in=event_ids).values_list(
+        "event_id", "%s_id" % column
+    )
+    for event_id, related_id in rows:
+        related[event_id].add(related_id)
+    return related
+
+
+def _load_deprecated_keyword_ids(infos, *old_related):
+    """
+    Returns the deprecated ones of the keywords in infos and old_related, so
+    that the keywords the events end up with, old and new, can be checked.
+    """
+    keyword_ids = set()
+    for related in old_related:
+        keyword_ids.update(itertools.chain(*related.values()))
+    for info in infos:
+        keyword_ids.update(
+            keyword.id
+            for keyword in itertools.chain(
+                info.get("keywords", []), info.get("audience", [])
+            )
+        )
+    return set(
+        Keyword.objects.filter(id__in=keyword_ids, deprecated=True).values_list(
+            "id", flat=True
+        )
+    )
+
+
+def _event_update_fields(changed_fields):
+    """
+    Maps the _changed_fields of an event to the concrete fields bulk_update
+    has to write. The original field of a translated field is included too,
+    as Event.save would also write it.
+    """
+    fields = set()
+    for name in changed_fields:
+        try:
+            field = Event._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if not field.concrete or field.many_to_many or field.primary_key:
+            continue
+        fields.add(field.name)
+        translated_field = getattr(field, "translated_field", None)
+        if translated_field is not None:
+            fields.add(translated_field.name)
+    return fields
+
+
+class EventBatch(object):
+    """
+    Collects the writes Importer.save_events does for a batch of events.
+    """
+
+    def __init__(self):
+        self.created = []
+        self.changed = []
+        self.added_relations = defaultdict(lambda: defaultdict(set))
+        self.removed_relations = defaultdict(lambda: defaultdict(set))
+        self.replaced_offers = set()
+        self.new_offers = []
+        self.replaced_links = set()
+        self.new_links = []
+        self.new_courses = []
+        self.changed_courses = []
+        self.places = set()
+
+    def add_relations(self, through, column, event_id, ids):
+        if ids:
+            self.added_relations[(through, column)][event_id].update(ids)
+
+    def remove_relations(self, through, column, event_id, ids):
+        if ids:
+            self.removed_relations[(through, column)][event_id].update(ids)
+
+    def related_ids(self, through, column, event_id, old_ids):
+        """Returns the ids the event is related to once the batch is written."""
+        return (old_ids - self.removed_relations[(through, column)][event_id]) | (
+            self.added_relations[(through, column)][event_id]
+        )
+
+    def changed_keyword_ids(self):
+        keyword_ids = set()
+        for relations in (self.added_relations, self.removed_relations):
+            for (through, column), by_event in relations.items():
+                if column != "keyword":
+                    continue
+                for ids in by_event.values():
+                    keyword_ids.update(ids)
+        return keyword_ids
+
+
 class Importer(object):
+    # keyword arguments for the HttpClient of the importer
+    http_options = {}
+    # ids of the data sources besides its own (self.name) whose rows, e.g.
+    # organizations, the setup of the importer creates
+    shared_data_source_ids = ()
+
     def __init__(self, options):
         super(Importer, self).__init__()
         self.options = options
@@ -64,6 +188,9 @@ class Importer(object):
             self.bounding_box = None
         self.gps_to_target_ct = CoordTransform(gps_srs, target_srs)
 
+        self.http = HttpClient(cache=self._get_response_cache(), **self.http_options)
+        self.report = ImportReport(self.name)
+
         self.setup()
 
         # this has to be run after setup, as it relies on organization and data source being set
@@ -77,6 +204,45 @@ class Importer(object):
     def setup(self):
         pass
 
+    def _get_response_cache(self):
+        cache_dir = getattr(settings, "IMPORTER_CACHE_DIR", None)
+        if not cache_dir and self.options.get("cached"):
+            cache_dir = os.path.join(self.options["data_path"], "importer_cache")
+        if not cache_dir:
+            return None
+        return ResponseCache(os.path.join(cache_dir, self.name))
+
+    def fetch_unless_unchanged(self, fetch, scope=None):
+        """
+        Calls fetch, which does the requests for one import through self.http and
+        returns the fetched data. With a response cache, returns None instead if
+        none of the responses changed since the last completed import, so the
+        importer can skip parsing and diffing. Iterators are only consumed until
+        the first changed response, the rest of them is fetched lazily by the
+        importer.
+
+        Call self.http.mark_processed() with the same scope once the import
+        has completed.
+        """
+        if self.http.cache is None:
+            with self.report.phase("fetch"):
+                return fetch()
+        self.http.fetched.clear()
+        with self.report.phase("fetch"):
+            data = fetch()
+            if isinstance(data, Iterator):
+                consumed = []
+                for item in data:
+                    consumed.append(item)
+                    if not self.http.is_unchanged(scope):
+                        return itertools.chain(consumed, data)
+                data = consumed
+        if self.http.is_unchanged(scope):
+            logger.info("%s: source data unchanged, nothing to import" % self.name)
+            self.http.fetched.clear()
+            return None
+        return data
+
     @staticmethod
     def _set_multiscript_field(string, event, languages, field):
         """
@@ -196,29 +362,19 @@ class Importer(object):
 
         Returns a list of events."""
 
-        def event_name(e):
-            # recur_dict ouch
-            if "fi" not in e["common"]["name"]:
-                return ""
-            else:
-                return e["common"]["name"]["fi"]
+        grouper = RecurringGrouper()
+        for index, event in enumerate(events):
+            grouper.add(index, event["common"])
 
-        events.sort(key=event_name)
         parent_events = []
-        for name_fi, subevents in itertools.groupby(events, event_name):
-            subevents = list(subevents)
-            if len(subevents) < 2:
+        for group in grouper:
+            subevents = [events[index] for index in group.members]
+            if not group.is_recurring:
                 parent_events.extend(subevents)
                 continue
             potential_parent = subevents[0]
-            children = []
-            for matching_event in (
-                e for e in subevents if e["common"] == potential_parent["common"]
-            ):
-                children.append(matching_event["instance"])
-            if len(children) > 0:
-                potential_parent["children"] = children
-                parent_events.append(potential_parent)
+            potential_parent["children"] = [e["instance"] for e in subevents]
+            parent_events.append(potential_parent)
         return parent_events
 
     def _set_field(self, obj, field_name, val):
@@ -306,22 +462,13 @@ class Importer(object):
                 continue
             self._set_field(obj, field_name, info[field_name])
 
-    def save_event(self, info):
+    def _prepare_event_info(self, info):
+        """
+        Normalizes imported event data (location, start and end times) before it
+        is applied to an event. Returns the normalized copy and the location id.
+        """
         info = info.copy()
 
-        args = dict(data_source=info["data_source"], origin_id=info["origin_id"])
-        obj_id = "%s:%s" % (info["data_source"].id, info["origin_id"])
-        try:
-            obj = Event.objects.get(**args)
-            obj._created = False
-            assert obj.id == obj_id
-        except Event.DoesNotExist:
-            obj = Event(**args)
-            obj._created = True
-            obj.id = obj_id
-        obj._changed = False
-        obj._changed_fields = []
-
         location_id = None
         if "location" in info:
             location = info["location"]
@@ -357,6 +504,9 @@ class Importer(object):
             info["end_time"] = info["end_time"].replace(hour=0, minute=0, second=0)
             info["end_time"] += datetime.timedelta(days=1)
 
+        return info, location_id
+
+    def _update_event_fields(self, obj, info, location_id):
         skip_fields = ["id", "location", "publisher", "offers", "keywords", "images"]
         self._update_fields(obj, info, skip_fields)
 
@@ -366,6 +516,30 @@ class Importer(object):
 
         self._set_field(obj, "deleted", False)
 
+    def save_event(self, info):
+        with self.report.phase("save"):
+            obj = self._save_event(info)
+        self.report.count_saved([obj])
+        return obj
+
+    def _save_event(self, info):
+        info, location_id = self._prepare_event_info(info)
+
+        args = dict(data_source=info["data_source"], origin_id=info["origin_id"])
+        obj_id = "%s:%s" % (info["data_source"].id, info["origin_id"])
+        try:
+            obj = Event.objects.get(**args)
+            obj._created = False
+            assert obj.id == obj_id
+        except Event.DoesNotExist:
+            obj = Event(**args)
+            obj._created = True
+            obj.id = obj_id
+        obj._changed = False
+        obj._changed_fields = []
+
+        self._update_event_fields(obj, info, location_id)
+
         if obj._created:
             # We have to save new objects here to be able to add related fields.
             # Changed objects will be saved only *after* related fields have been changed.
@@ -536,6 +710,428 @@ class Importer(object):
 
         return obj
 
+    def save_events(self, infos, batch_size=EVENT_BATCH_SIZE):
+        """
+        Batch counterpart of save_event. Existing events and their related rows are
+        loaded for a whole batch up front and diffed in memory, after which all the
+        writes of the batch are done with bulk queries.
+
+        Field change tracking (_created, _changed, _changed_fields) and the
+        is_user_edited() rules are the same as in save_event.
+
+        :param infos: An iterable of event info dicts, as accepted by save_event.
+            It is consumed one batch at a time.
+        :param batch_size: Number of events loaded and written at a time
+        :return: The saved events, in the order of infos
+        """
+        objs = []
+        for batch in chunked(infos, batch_size):
+            with self.report.phase("save"):
+                batch_objs = self._save_event_batch(batch)
+            self.report.count_saved(batch_objs)
+            objs.extend(batch_objs)
+        return objs
+
+    def sync_events(self, infos, queryset):
+        """
+        Saves the events whose payload has changed since the last import of
+        the data source, or that have been modified or deleted in queryset
+        since. Full imports save all of them and soft delete the events in
+        queryset that were not imported.
+
+        Yields (info, event) pairs of the saved events and must be consumed
+        completely for the import to be recorded.
+        """
+        checkpoint = ImportCheckpoint(
+            self.data_source, full=self.options.get("full", False)
+        )
+        checkpoint.invalidate_modified(queryset)
+        syncher = None
+        if checkpoint.full:
+            syncher = IdSyncher(queryset, "origin_id", {"deleted": True})
+
+        with self.report.phase("diff"):
+            changed = [
+                info
+                for info in infos
+                if not checkpoint.is_unchanged(info["origin_id"], info)
+            ]
+        self.report.count("unchanged", len(checkpoint.seen) - len(changed))
+        for info, obj in zip(changed, self.save_events(changed)):
+            checkpoint.mark_saved(info["origin_id"])
+            if syncher:
+                syncher.mark(obj)
+            yield info, obj
+
+        with self.report.phase("sync"):
+            if syncher:
+                self.report.count(
+                    "deleted", syncher.finish(force=self.options["force"])
+                )
+            checkpoint.commit()
+
+    def _save_event_batch(self, infos):
+        # an event repeated in the batch is saved once, from its last copy
+        order = []
+        prepared = {}
+        for info in infos:
+            info, location_id = self._prepare_event_info(info)
+            obj_id = "%s:%s" % (info["data_source"].id, info["origin_id"])
+            order.append(obj_id)
+            prepared[obj_id] = (info, location_id)
+
+        event_ids = list(prepared)
+        existing = {
+            obj.id: obj
+            for obj in Event.objects.filter(id__in=event_ids).select_related(
+                "data_source"
+            )
+        }
+        existing_ids = list(existing.keys())
+        old_keywords = _load_related_ids(
+            Event.keywords.through, "keyword", existing_ids
+        )
+        old_audience = _load_related_ids(
+            Event.audience.through, "keyword", existing_ids
+        )
+        old_languages = _load_related_ids(
+            Event.in_language.through, "language", existing_ids
+        )
+        deprecated_ids = _load_deprecated_keyword_ids(
+            [info for info, _ in prepared.values()], old_keywords, old_audience
+        )
+        old_images = defaultdict(dict)
+        for row in Event.images.through.objects.filter(
+            event_id__in=existing_ids
+        ).select_related("image"):
+            old_images[row.event_id][row.image.url] = row.image
+        old_offers = defaultdict(list)
+        for offer in Offer.objects.filter(event_id__in=existing_ids):
+            old_offers[offer.event_id].append(offer)
+        old_links = defaultdict(list)
+        for link in EventLink.objects.filter(event_id__in=existing_ids):
+            old_links[link.event_id].append(link)
+        courses = {}
+        if "extension_course" in settings.INSTALLED_APPS:
+            from extension_course.models import Course
+
+            courses = {
+                course.event_id: course
+                for course in Course.objects.filter(event_id__in=existing_ids)
+            }
+
+        batch = EventBatch()
+        objs = {}
+        for obj_id, (info, location_id) in prepared.items():
+            obj = existing.get(obj_id)
+            if obj is None:
+                obj = Event(
+                    data_source=info["data_source"], origin_id=info["origin_id"]
+                )
+                obj._created = True
+                obj.id = obj_id
+            else:
+                obj._created = False
+            obj._changed = False
+            obj._changed_fields = []
+            old_location_id = obj.location_id
+
+            self._update_event_fields(obj, info, location_id)
+
+            # many-to-many fields
+
+            # if images change and event has been user edited, do not reinstate old image!!!
+            if not obj.is_user_edited() and "images" in info:
+                self._diff_event_images(obj, info["images"], old_images[obj.id], batch)
+
+            for field, through, column, new_objs, old_ids in (
+                (
+                    "keywords",
+                    Event.keywords.through,
+                    "keyword",
+                    "keywords",
+                    old_keywords,
+                ),
+                (
+                    "audience",
+                    Event.audience.through,
+                    "keyword",
+                    "audience",
+                    old_audience,
+                ),
+                (
+                    "in_language",
+                    Event.in_language.through,
+                    "language",
+                    "in_language",
+                    old_languages,
+                ),
+            ):
+                new_ids = set(related.id for related in info.get(new_objs, []))
+                self._diff_event_m2m(
+                    obj, field, through, column, new_ids, old_ids[obj.id], batch
+                )
+
+            # one-to-many fields with foreign key pointing to event
+
+            offers = []
+            for offer in info.get("offers", []):
+                offer_obj = Offer(event=obj)
+                self._update_fields(offer_obj, offer, skip_fields=["id"])
+                offers.append(offer_obj)
+
+            val = operator.methodcaller("simple_value")
+            current_offers = old_offers[obj.id]
+            if set(map(val, offers)) != set(map(val, current_offers)):
+                # this prevents overwriting manually added offers. do not update offers if we have added ones
+                if not obj.is_user_edited() or len(set(map(val, offers))) >= len(
+                    current_offers
+                ):
+                    batch.replaced_offers.add(obj.id)
+                    batch.new_offers.extend(offers)
+                    obj._changed = True
+                    obj._changed_fields.append("offers")
+
+            if info["external_links"]:
+                self._diff_event_links(
+                    obj, info["external_links"], old_links[obj.id], batch
+                )
+
+            if "extension_course" in settings.INSTALLED_APPS:
+                extension_data = info.get("extension_course")
+                if extension_data is not None:
+                    self._diff_event_course(
+                        obj, extension_data, courses.get(obj.id), batch
+                    )
+
+            # If event start time changed, it was rescheduled.
+            if "start_time" in obj._changed_fields:
+                self._set_field(obj, "event_status", Event.Status.RESCHEDULED)
+
+            # The event may be cancelled
+            status = info.get("event_status", None)
+            if status:
+                self._set_field(obj, "event_status", status)
+
+            if obj._changed or obj._created:
+                keyword_ids = batch.related_ids(
+                    Event.keywords.through, "keyword", obj.id, old_keywords[obj.id]
+                ) | batch.related_ids(
+                    Event.audience.through, "keyword", obj.id, old_audience[obj.id]
+                )
+                self._validate_batch_event(obj, keyword_ids & deprecated_ids)
+                if obj._created:
+                    batch.created.append(obj)
+                else:
+                    batch.changed.append(obj)
+                if old_location_id != obj.location_id:
+                    batch.places.update(
+                        place_id
+                        for place_id in (old_location_id, obj.location_id)
+                        if place_id
+                    )
+            objs[obj_id] = obj
+
+        self._write_event_batch(batch)
+        return [objs[obj_id] for obj_id in order]
+
+    def _diff_event_m2m(self, obj, field, through, column, new_ids, old_ids, batch):
+        if new_ids == old_ids:
+            return
+        if obj.is_user_edited():
+            # this prevents overwriting manually added relations
+            if not new_ids <= old_ids:
+                batch.add_relations(through, column, obj.id, new_ids - old_ids)
+                obj._changed = True
+        else:
+            batch.add_relations(through, column, obj.id, new_ids - old_ids)
+            batch.remove_relations(through, column, obj.id, old_ids - new_ids)
+            obj._changed = True
+        obj._changed_fields.append(field)
+
+    def _diff_event_images(self, obj, images_data, old_images, batch):
+        new_ids = set()
+        for image_data in images_data:
+            image_url = image_data.get("url", "").strip()
+            if not image_url:
+                logger.warning(
+                    'Invalid image url "{}" obj {}'.format(image_data.get("url"), obj)
+                )
+                continue
+
+            image = old_images.get(image_url)
+            new_image = image is None
+            if new_image:
+                image = self._get_image(image_url)
+
+            image = self._update_image(image, image_data)
+
+            if new_image or image._changed:
+                obj._changed = True
+                obj._changed_fields.append("images")
+            new_ids.add(image.id)
+
+        old_ids = set(image.id for image in old_images.values())
+        if old_ids - new_ids:
+            # we need this to mark the object changed if an image is removed
+            obj._changed = True
+            obj._changed_fields.append("images")
+        batch.add_relations(Event.images.through, "image", obj.id, new_ids - old_ids)
+        batch.remove_relations(Event.images.through, "image", obj.id, old_ids - new_ids)
+
+    def _diff_event_links(self, obj, external_links, old_links, batch):
+        new_links = set()
+        for language, links in external_links.items():
+            for link_name, url in links.items():
+                new_links.add((language, link_name, url))
+        current_links = set(
+            (link.language_id, link.name, link.link) for link in old_links
+        )
+        if obj.is_user_edited() or new_links == current_links:
+            return
+
+        batch.replaced_links.add(obj.id)
+        for language, name, url in new_links:
+            if len(url) > 200:
+                logger.error(
+                    f"{obj} required external link of length {len(url)}, current limit 200"
+                )
+                continue
+            batch.new_links.append(
+                EventLink(event=obj, language_id=language, name=name, link=url)
+            )
+        obj._changed = True
+        obj._changed_fields.append("links")
+
+    def _diff_event_course(self, obj, extension_data, course, batch):
+        from extension_course.models import Course
+
+        if course is not None:
+            course._changed = False
+            for field in EXTENSION_COURSE_FIELDS:
+                self._set_field(course, field, extension_data.get(field))
+            if not course._changed:
+                return
+            batch.changed_courses.append(course)
+        else:
+            batch.new_courses.append(
+                Course(
+                    event=obj,
+                    **{
+                        field: extension_data.get(field)
+                        for field in EXTENSION_COURSE_FIELDS
+                    },
+                )
+            )
+        obj._changed = True
+        obj._changed_fields.append("extension_course")
+
+    def _validate_batch_event(self, obj, deprecated):
+        # bulk writes bypass Event.save, so do the same sanity checks here
+        error = None
+        if obj.start_time and obj.end_time and obj.start_time > obj.end_time:
+            error = ValidationError(
+                {
+                    "end_time": "The event end time cannot be earlier than the start time."
+                }
+            )
+        if deprecated and not obj.deleted:
+            error = ValidationError(
+                {
+                    "keywords": "Trying to save event with deprecated keywords %s."
+                    % sorted(deprecated)
+                }
+            )
+        if error:
+            logger.error("Event {} could not be saved: {}".format(obj, error))
+            raise error
+
+    def _write_event_batch(self, batch):
+        with transaction.atomic():
+            if batch.created:
+                # new events are roots of their own trees until linked to a super event.
+                # The table lock keeps concurrent writers from taking the same tree ids
+                # until the batch is committed.
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "LOCK TABLE %s IN SHARE ROW EXCLUSIVE MODE"
+                        % connection.ops.quote_name(Event._meta.db_table)
+                    )
+                mptt_opts = Event._mptt_meta
+                next_tree_id = Event._tree_manager._get_next_tree_id()
+                for tree_id, obj in enumerate(batch.created, start=next_tree_id):
+                    setattr(obj, mptt_opts.left_attr, 1)
+                    setattr(obj, mptt_opts.right_attr, 2)
+                    setattr(obj, mptt_opts.level_attr, 0)
+                    setattr(obj, mptt_opts.tree_id_attr, tree_id)
+                Event.objects.bulk_create(batch.created)
+
+            if batch.changed:
+                # bulk_update does not touch auto_now fields by itself
+                now = BaseModel.now()
+                update_fields = {"last_modified_time"}
+                for obj in batch.changed:
+                    obj.last_modified_time = now
+                    update_fields.update(_event_update_fields(obj._changed_fields))
+                Event.objects.bulk_update(batch.changed, sorted(update_fields))
+
+            for (through, column), relations in batch.removed_relations.items():
+                through.objects.filter(
+                    functools.reduce(
+                        operator.or_,
+                        (
+                            Q(event_id=event_id, **{"%s_id__in" % column: ids})
+                            for event_id, ids in relations.items()
+                        ),
+                    )
+                ).delete()
+            for (through, column), relations in batch.added_relations.items():
+                through.objects.bulk_create(
+                    [
+                        through(event_id=event_id, **{"%s_id" % column: related_id})
+                        for event_id, ids in relations.items()
+                        for related_id in ids
+                    ]
+                )
+
+            if batch.replaced_offers:
+                Offer.objects.filter(event_id__in=batch.replaced_offers).delete()
+                Offer.objects.bulk_create(batch.new_offers)
+            if batch.replaced_links:
+                EventLink.objects.filter(event_id__in=batch.replaced_links).delete()
+                EventLink.objects.bulk_create(batch.new_links)
+
+            if batch.new_courses:
+                batch.new_courses[0].__class__.objects.bulk_create(batch.new_courses)
+            if batch.changed_courses:
+                batch.changed_courses[0].__class__.objects.bulk_update(
+                    batch.changed_courses, EXTENSION_COURSE_FIELDS
+                )
+
+            # needed to cache location and keyword event numbers, see Event.save
+            # and the keyword_added_or_removed signal handler
+            if batch.places:
+                Place.objects.filter(id__in=batch.places).update(n_events_changed=True)
+            keyword_ids = batch.changed_keyword_ids()
+            if keyword_ids:
+                Keyword.objects.filter(id__in=keyword_ids).update(n_events_changed=True)
+
+        for obj in itertools.chain(batch.created, batch.changed):
+            # keep the search index and other receivers up to date
+            post_save.send(
+                sender=Event,
+                instance=obj,
+                created=obj._created,
+                update_fields=None,
+                raw=False,
+                using=obj._state.db,
+            )
+            if obj._created:
+                verb = "created"
+            else:
+                verb = "changed (fields: %s)" % ", ".join(obj._changed_fields)
+            logger.debug("{} {}".format(obj, verb))
+
     def save_place(self, info):
         args = dict(data_source=info["data_source"], origin_id=info["origin_id"])
         obj_id = "%s:%s" % (info["data_source"].id, info["origin_id"])
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import os
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+# Response headers kept with the cached body, needed to rebuild the response
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class ResponseCache(object):
+    """
+    On-disk cache of raw importer responses, keyed by URL.
+
+    Every URL has a body file and a metadata file with the validators
+    (ETag, Last-Modified) of the cached response and the hash of its body.
+    The hash of the last body an importer has successfully processed is
+    stored as well, so that an unchanged payload can be recognized even if
+    the source does not support conditional requests. An importer that
+    processes the same URL in several imports (e.g. places and courses)
+    uses a separate scope for each.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _base_path(self, url):
+        return os.path.join(self.path, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def _write(self, path, data):
+        # write atomically, importers may run concurrently
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_meta(self, url):
+        try:
+            with open(self._base_path(url) + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _set_meta(self, url, meta):
+        self._write(self._base_path(url) + ".json", json.dumps(meta).encode("utf-8"))
+
+    def get_body(self, url):
+        try:
+            with open(self._base_path(url) + ".body", "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def validators(self, url):
+        """
+        Returns the conditional request headers for revalidating url.
+        """
+        meta = self.get_meta(url)
+        if meta is None or self.get_body(url) is None:
+            return {}
+        headers = {}
+        if meta["headers"].get("ETag"):
+            headers["If-None-Match"] = meta["headers"]["ETag"]
+        if meta["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = meta["headers"]["Last-Modified"]
+        return headers
+
+    def store(self, url, headers, body):
+        meta = self.get_meta(url) or {}
+        meta.update(
+            {
+                "url": url,
+                "headers": {k: headers[k] for k in CACHED_HEADERS if k in headers},
+                "sha1": hashlib.sha1(body).hexdigest(),
+            }
+        )
+        self._write(self._base_path(url) + ".body", body)
+        self._set_meta(url, meta)
+        return meta
+
+    def is_processed(self, url, scope=None):
+        """
+        Whether the cached body of url is the one last processed by an importer.
+        """
+        meta = self.get_meta(url)
+        if meta is None:
+            return False
+        return meta.get("processed", {}).get(scope or "") == meta["sha1"]
+
+    def mark_processed(self, url, scope=None):
+        meta = self.get_meta(url)
+        if meta is not None:
+            meta.setdefault("processed", {})[scope or ""] = meta["sha1"]
+            self._set_meta(url, meta)
+
+    def delete_url(self, url):
+        for ext in (".json", ".body"):
+            try:
+                os.remove(self._base_path(url) + ext)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,125 @@
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import DataSourceCheckpoint, ImportedItemHash
+
+from .recurring import fingerprint
+from .sync import SYNC_CHUNK_SIZE
+from .util import chunked
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+
+class ImportCheckpoint(object):
+    """
+    Delta import state of a data source: the end of the last successful run
+    and the payload hashes of the items imported so far.
+
+    Items whose payload has not changed since they were last saved may be
+    skipped, unless their row has been modified or deleted in the database
+    since, see invalidate_modified. Deleting the items missing from the
+    source requires seeing all of them, so it is left for full imports, which
+    are run when requested or when the data source has no successful import
+    yet.
+    """
+
+    def __init__(self, data_source, full=False):
+        self.data_source = data_source
+        self.state = DataSourceCheckpoint.objects.filter(
+            data_source=data_source
+        ).first()
+        self.full = full or self.state is None or self.state.last_successful_run is None
+        self.started = timezone.now()
+        self.hashes = dict(
+            ImportedItemHash.objects.filter(data_source=data_source).values_list(
+                "origin_id", "payload_hash"
+            )
+        )
+        self.seen = {}
+        self.saved = {}
+        self.marked = set()
+        self.rows = None
+        if self.full:
+            logger.info("%s: running a full import" % data_source.id)
+
+    def invalidate_modified(self, queryset, key_field="origin_id"):
+        """
+        Forgets the payload hashes of the items that have no row in queryset or
+        whose row has been modified since the last successful run, e.g. edited
+        by a user. They are imported again even if their payload is unchanged.
+        The rows modified during this run by others are forgotten on commit.
+        """
+        self.rows = (queryset, key_field)
+        if self.full:
+            return
+        current = set(
+            queryset.filter(
+                last_modified_time__lte=self.state.last_successful_run
+            ).values_list(key_field, flat=True)
+        )
+        self.hashes = {
+            origin_id: payload_hash
+            for origin_id, payload_hash in self.hashes.items()
+            if origin_id in current
+        }
+
+    def is_unchanged(self, origin_id, payload):
+        """Returns True if the item can be skipped, i.e. its payload is unchanged."""
+        origin_id = str(origin_id)
+        self.seen[origin_id] = fingerprint(payload)
+        return not self.full and self.hashes.get(origin_id) == self.seen[origin_id]
+
+    def mark_saved(self, origin_id):
+        """Records that the item checked last with is_unchanged has been saved."""
+        origin_id = str(origin_id)
+        self.marked.add(origin_id)
+        payload_hash = self.seen[origin_id]
+        if self.hashes.get(origin_id) != payload_hash:
+            self.saved[origin_id] = payload_hash
+
+    @transaction.atomic
+    def commit(self):
+        """
+        Stores the hashes of the saved items and the run as the last successful
+        one. A full import also forgets the items it did not see.
+        """
+        forgotten = set()
+        if self.rows:
+            queryset, key_field = self.rows
+            modified = queryset.filter(last_modified_time__gt=self.started)
+            forgotten = set(modified.values_list(key_field, flat=True)) - self.marked
+        for chunk in chunked(iter(self.saved.items()), SYNC_CHUNK_SIZE):
+            ImportedItemHash.objects.filter(
+                data_source=self.data_source,
+                origin_id__in=[origin_id for origin_id, _ in chunk],
+            ).delete()
+            ImportedItemHash.objects.bulk_create(
+                ImportedItemHash(
+                    data_source=self.data_source,
+                    origin_id=origin_id,
+                    payload_hash=payload_hash,
+                )
+                for origin_id, payload_hash in chunk
+            )
+        if self.full:
+            forgotten |= set(self.hashes) - set(self.seen)
+        for chunk in chunked(iter(forgotten), SYNC_CHUNK_SIZE):
+            ImportedItemHash.objects.filter(
+                data_source=self.data_source, origin_id__in=chunk
+            ).delete()
+
+        # rows saved by this run were modified before its end
+        self.state, _ = DataSourceCheckpoint.objects.update_or_create(
+            data_source=self.data_source,
+            defaults={"last_successful_run": timezone.now()},
+        )
+        self.hashes.update(self.saved)
+        for origin_id in forgotten:
+            self.hashes.pop(origin_id, None)
+        logger.info(
+            "%s: %d of %d items changed"
+            % (self.data_source.id, len(self.saved), len(self.seen))
+        )
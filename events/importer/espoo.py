@@ -1,14 +1,11 @@
 # -*- coding: utf-8 -*-
 import logging
 import re
-import time
 from datetime import datetime, timedelta
 
 import bleach
 import dateutil.parser
 import pytz
-import requests
-import requests_cache
 from django.utils.html import strip_tags
 from django_orghierarchy.models import Organization
 from pytz import timezone
@@ -16,7 +13,7 @@ from pytz import timezone
 from events.models import DataSource, Event, Keyword, Place
 
 from .base import Importer, recur_dict, register_importer
-from .sync import ModelSyncher
+from .http_client import HttpClientError
 from .util import clean_text, clean_url
 from .yso import KEYWORDS_TO_ADD_TO_AUDIENCE
 
@@ -188,14 +185,6 @@ def get_lang(lang_id):
     return None
 
 
-def mark_deleted(obj):
-    if obj.deleted:
-        return False
-    obj.deleted = True
-    obj.save(update_fields=["deleted"])
-    return True
-
-
 def clean_street_address(address):
     LATIN1_CHARSET = "a-zàáâãäåæçèéêëìíîïðñòóôõö÷øùúûüýþÿ"
 
@@ -235,14 +224,11 @@ def find_url(url):
     return clean_url(url)
 
 
-class APIBrokenError(Exception):
-    pass
-
-
 @register_importer
 class EspooImporter(Importer):
     name = "espoo"
     supported_languages = ["fi", "sv", "en"]
+    http_options = {"max_retries": MAX_RETRY}
     keyword_cache = {}
     location_cache = {}
 
@@ -289,12 +275,6 @@ class EspooImporter(Importer):
         self._build_cache_places()
         self._cache_yso_keywords()
 
-        if self.options["cached"]:
-            requests_cache.install_cache("espoo")
-            self.cache = requests_cache.get_cache()
-        else:
-            self.cache = None
-
     @staticmethod
     def _get_extended_properties(event_el):
         ext_props = recur_dict()
@@ -729,73 +709,60 @@ class EspooImporter(Importer):
         #     event['custom_data'][p_k] = p_v
         return event
 
-    def _recur_fetch_paginated_url(self, url, lang, events):
-        for _ in range(MAX_RETRY):
-            response = requests.get(url)
-            if response.status_code != 200:
-                logger.error("Espoo API reported HTTP %d" % response.status_code)
-                time.sleep(5)
-                if self.cache:
-                    self.cache.delete_url(url)
-                continue
-            try:
-                root_doc = response.json()
-            except ValueError:
-                logger.error("Espoo API returned invalid JSON for url: {}".format(url))
-                if self.cache:
-                    self.cache.delete_url(url)
-                time.sleep(5)
-                continue
-            break
-        else:
-            logger.error("Espoo API is broken, giving up")
-            raise APIBrokenError()
-
-        documents = root_doc["value"]
-        earliest_end_time = None
-        for doc in documents:
-            event = self._import_event(lang, doc, events)
-            if not earliest_end_time or event["end_time"] < earliest_end_time:
-                earliest_end_time = event["end_time"]
+    def _get_next_page_url(self, root_doc):
+        def dt_parse(dt_str):
+            return LOCAL_TZ.localize(
+                dateutil.parser.parse(dt_str), is_dst=None
+            ).astimezone(pytz.utc)
 
+        end_times = [dt_parse(doc["EventEndDate"]) for doc in root_doc["value"]]
         now = datetime.now().replace(tzinfo=LOCAL_TZ)
         # We check 31 days backwards.
-        if earliest_end_time and earliest_end_time < now - timedelta(days=31):
-            return
+        if end_times and min(end_times) < now - timedelta(days=31):
+            return None
+
+        if "odata.nextLink" not in root_doc:
+            return None
+        return "%s/api/opennc/v1/%s%s" % (
+            ESPOO_BASE_URL,
+            root_doc["odata.nextLink"],
+            "&$format=json",
+        )
 
-        if "odata.nextLink" in root_doc:
-            self._recur_fetch_paginated_url(
-                "%s/api/opennc/v1/%s%s"
-                % (ESPOO_BASE_URL, root_doc["odata.nextLink"], "&$format=json"),
-                lang,
-                events,
-            )
+    def _iter_pages(self, lang, url):
+        # whole pages, so that prefetching buffers pages rather than documents
+        for root_doc in self.http.iter_pages(url, self._get_next_page_url):
+            yield lang, root_doc["value"]
 
     def import_events(self):
         logger.info("Importing Espoo events")
         events = recur_dict()
+        pages = []
         for lang in self.supported_languages:
             espoo_lang_id = ESPOO_LANGUAGES[lang]
             url = ESPOO_API_URL.format(lang_code=espoo_lang_id)
-            logger.info("Processing lang {}".format(lang))
-            logger.info("from URL {}".format(url))
-            try:
-                self._recur_fetch_paginated_url(url, lang, events)
-            except APIBrokenError:
+            logger.info("Processing lang {} from URL {}".format(lang, url))
+            pages.append(self._iter_pages(lang, url))
+        # All languages are fetched concurrently, but the Finnish events must
+        # be processed first, as the other languages are merged into them.
+        try:
+            pages = self.fetch_unless_unchanged(lambda: self.http.prefetch(pages))
+            if pages is None:
                 return
+            with self.report.phase("parse"):
+                for lang, docs in pages:
+                    for doc in docs:
+                        self._import_event(lang, doc, events)
+        except HttpClientError as e:
+            logger.error("Espoo API is broken, giving up: {}".format(e))
+            return
 
         event_list = sorted(events.values(), key=lambda x: x["end_time"])
         qs = Event.objects.filter(
             end_time__gte=datetime.now(), data_source="espoo", deleted=False
         )
 
-        self.syncher = ModelSyncher(
-            qs, lambda obj: obj.origin_id, delete_func=mark_deleted
-        )
-
-        for event in event_list:
-            obj = self.save_event(event)
-            self.syncher.mark(obj)
-
-        self.syncher.finish(force=self.options["force"])
+        for _ in self.sync_events(event_list, qs):
+            pass
+        self.http.mark_processed()
         logger.info("{} events processed".format(len(events.values())))
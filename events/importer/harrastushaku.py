@@ -6,16 +6,18 @@ from datetime import datetime, timedelta
 from functools import lru_cache, partial
 
 import pytz
-import requests
 from django.db import transaction
 from django.utils.dateparse import parse_time
 from django.utils.timezone import now
 from django_orghierarchy.models import Organization
 
+from events.importer.checkpoint import ImportCheckpoint
+from events.importer.http_client import HttpClientError
+from events.importer.recurring import FingerprintStore, RecurringGrouper
 from events.importer.sync import ModelSyncher
 from events.importer.util import clean_text
 from events.importer.yso import KEYWORDS_TO_ADD_TO_AUDIENCE
-from events.keywords import KeywordMatcher
+from events.keywords import InMemoryKeywordMatcher
 from events.models import DataSource, Event, Keyword, Place
 
 from .base import Importer, register_importer
@@ -57,7 +59,9 @@ class HarrastushakuException(Exception):
 @register_importer
 class HarrastushakuImporter(Importer):
     name = "harrastushaku"
+    shared_data_source_ids = ("ahjo",)
     supported_languages = ["fi"]
+    http_options = {"verify": False}
 
     def setup(self):
         logger.debug("Running Harrastushaku importer setup...")
@@ -76,7 +80,6 @@ class HarrastushakuImporter(Importer):
             for place in Place.objects.filter(data_source=self.tprek_data_source)
         }
         self.keywords = {keyword.id: keyword for keyword in Keyword.objects.all()}
-        self.keyword_matcher = KeywordMatcher()
 
     def import_places(self):
         """Import Harrastushaku locations as Places
@@ -89,7 +92,9 @@ class HarrastushakuImporter(Importer):
         """
         logger.info("Importing places...")
 
-        locations = self.fetch_locations()
+        locations = self.fetch_unless_unchanged(self.fetch_locations, "places")
+        if locations is None:
+            return
         logger.debug("Handling {} locations...".format(len(locations)))
         self.location_id_to_place_id = self.map_harrastushaku_location_ids_to_tprek_ids(
             locations
@@ -99,6 +104,7 @@ class HarrastushakuImporter(Importer):
             try:
                 self.handle_location(location)
             except Exception as e:  # noqa
+                self.report.count("errors")
                 message = (
                     e
                     if isinstance(e, HarrastushakuException)
@@ -108,6 +114,8 @@ class HarrastushakuImporter(Importer):
                     "Error handling location {}: {}".format(location.get("id"), message)
                 )
 
+        self.http.mark_processed("places")
+
     def map_harrastushaku_location_ids_to_tprek_ids(self, harrastushaku_locations):
         """
         Example mapped dictionary result:
@@ -191,7 +199,7 @@ class HarrastushakuImporter(Importer):
           - The activity's main category. There are hardcoded keywords for every
             main category.
           - The activity's sub category's "searchwords". Those are manually
-            entered words, which are mapped to keywords using KeywordMatcher
+            entered words, which are mapped to keywords using InMemoryKeywordMatcher
             (from events.keywords).
 
         A course's audience will come from both of the following:
@@ -202,7 +210,12 @@ class HarrastushakuImporter(Importer):
         """
         logger.info("Importing courses...")
 
-        locations = self.fetch_locations()
+        fetched = self.fetch_unless_unchanged(
+            lambda: (self.fetch_locations(), self.fetch_courses()), "courses"
+        )
+        if fetched is None:
+            return
+        locations, activities = fetched
         if not locations:
             logger.warning("No location data fetched, aborting course import.")
             return
@@ -210,8 +223,6 @@ class HarrastushakuImporter(Importer):
         self.location_id_to_place_id = self.map_harrastushaku_location_ids_to_tprek_ids(
             locations
         )
-
-        activities = self.fetch_courses()
         if not activities:
             logger.info("No activity data fetched.")
             return
@@ -223,10 +234,34 @@ class HarrastushakuImporter(Importer):
             for sub_event in event.sub_events.all():
                 sub_event.soft_delete()
 
-        self.event_syncher = ModelSyncher(
-            Event.objects.filter(data_source=self.data_source, super_event=None),
-            lambda event: event.id,
-            event_delete,
+        # removed activities are only deleted in full imports, delta imports
+        # skip the activities that have not changed
+        self.checkpoint = ImportCheckpoint(
+            self.data_source, full=self.options.get("full", False)
+        )
+        self.checkpoint.invalidate_modified(
+            Event.objects.filter(
+                data_source=self.data_source, super_event=None, deleted=False
+            )
+        )
+        self.event_syncher = None
+        if self.checkpoint.full:
+            self.event_syncher = ModelSyncher(
+                Event.objects.filter(data_source=self.data_source, super_event=None),
+                lambda event: event.id,
+                event_delete,
+            )
+        self.recurring_grouper = RecurringGrouper(FingerprintStore(self.data_source))
+
+        # match all the search words up front instead of querying per activity
+        self.keyword_matcher = InMemoryKeywordMatcher(keywords=self.keywords)
+        self.keyword_matcher.prime(
+            (
+                search_word
+                for activity in activities
+                for search_word in self.get_search_words(activity)
+            ),
+            language="fi",
         )
 
         num_of_activities = len(activities)
@@ -236,6 +271,7 @@ class HarrastushakuImporter(Importer):
             try:
                 self.handle_activity(activity)
             except Exception as e:  # noqa
+                self.report.count("errors")
                 message = (
                     e
                     if isinstance(e, HarrastushakuException)
@@ -248,17 +284,18 @@ class HarrastushakuImporter(Importer):
             if not i % 10:
                 logger.debug("{} / {} activities handled.".format(i, num_of_activities))
 
-        self.event_syncher.finish(force=True)
+        if self.event_syncher:
+            self.report.count("deleted", self.event_syncher.finish(force=True))
+        self.checkpoint.commit()
+        self.http.mark_processed("courses")
         logger.info("Course import finished.")
 
     def fetch_locations(self):
         logger.debug("Fetching locations...")
         try:
             url = "{}location/".format(HARRASTUSHAKU_API_BASE_URL)
-            response = requests.get(url, verify=False)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self.http.get_json(url)
+        except HttpClientError as e:
             logger.error("Cannot fetch locations: {}".format(e))
         return []
 
@@ -266,10 +303,8 @@ class HarrastushakuImporter(Importer):
         logger.debug("Fetching courses...")
         try:
             url = "{}activity/".format(HARRASTUSHAKU_API_BASE_URL)
-            response = requests.get(url, verify=False)
-            response.raise_for_status()
-            return response.json()["data"]
-        except requests.RequestException as e:
+            return self.http.get_json(url)["data"]
+        except HttpClientError as e:
             logger.error("Cannot fetch courses: {}".format(e))
         return []
 
@@ -308,6 +343,8 @@ class HarrastushakuImporter(Importer):
                 "Skipping inactive activity {}".format(activity_data.get("id"))
             )
             return
+        if self.checkpoint.is_unchanged(activity_data["id"], activity_data):
+            return
 
         event_data = self.get_event_data(activity_data)
         if event_data["start_time"] > event_data["end_time"]:
@@ -318,6 +355,7 @@ class HarrastushakuImporter(Importer):
             self.handle_recurring_event(event_data, time_tables)
         else:
             self.handle_one_time_event(event_data)
+        self.checkpoint.mark_saved(activity_data["id"])
 
     def create_registration_links(self, activity_data):
         # Harrastushaku has own registration links which should be created in the imported events as well
@@ -410,14 +448,31 @@ class HarrastushakuImporter(Importer):
                 "Erroneous time tables: {}".format(time_tables)
             )
 
+        # the sub events of the activity form its recurring group
+        for sub_event_time_range in sub_event_time_ranges:
+            group = self.recurring_grouper.add(
+                event_data["origin_id"]
+                + self.create_sub_event_origin_id_suffix(sub_event_time_range),
+                event_data,
+                sub_event_time_range,
+            )
+
         super_event = self.save_super_event(event_data)
+        # the sub events are only synced when the activity or its time tables
+        # have changed since the previous import
+        if not super_event._changed and self.recurring_grouper.is_unchanged(
+            group, super_event
+        ):
+            return
         self.save_sub_events(event_data, sub_event_time_ranges, super_event)
+        self.recurring_grouper.mark_saved(group, super_event)
 
     def handle_one_time_event(self, event_data):
         event_data["has_start_time"] = False
         event_data["has_end_time"] = False
         event = self.save_event(event_data)
-        self.event_syncher.mark(event)
+        if self.event_syncher:
+            self.event_syncher.mark(event)
 
     def get_event_keywords(self, activity_data):
         keywords = self.get_event_keywords_from_main_categories(
@@ -438,14 +493,15 @@ class HarrastushakuImporter(Importer):
             self.keywords.get(kw_id) for kw_id in keyword_ids if kw_id in self.keywords
         }
 
+    def get_search_words(self, activity_data):
+        search_words = activity_data.get("searchwords")
+        if not isinstance(search_words, str):
+            return []
+        return [s.strip().lower() for s in search_words.split(",") if s.strip()]
+
     def get_event_keywords_from_search_words(self, activity_data):
         keywords = set()
-        search_words = activity_data.get("searchwords", [])
-
-        cleaned_search_words = [
-            s.strip().lower() for s in search_words.split(",") if s.strip()
-        ]
-        for kw in cleaned_search_words:
+        for kw in self.get_search_words(activity_data):
             matches = self.match_keyword(kw)
             if matches:
                 keywords |= set(matches)
@@ -516,7 +572,8 @@ class HarrastushakuImporter(Importer):
         super_event_data = deepcopy(event_data)
         super_event_data["super_event_type"] = Event.SuperEventType.RECURRING
         event = self.save_event(super_event_data)
-        self.event_syncher.mark(event)
+        if self.event_syncher:
+            self.event_syncher.mark(event)
         return event
 
     def save_sub_events(self, event_data, sub_event_time_ranges, super_event):
@@ -2,14 +2,11 @@
 
 import logging
 import re
-import time
 from datetime import datetime, timedelta
 
 import bleach
 import dateutil.parser
 import pytz
-import requests
-import requests_cache
 from django.conf import settings
 from django.utils.html import strip_tags
 from django_orghierarchy.models import Organization
@@ -18,7 +15,7 @@ from pytz import timezone
 from events.models import DataSource, Event, Keyword, Place
 
 from .base import Importer, recur_dict, register_importer
-from .sync import ModelSyncher
+from .http_client import HttpClientError
 from .util import clean_text
 from .yso import KEYWORDS_TO_ADD_TO_AUDIENCE
 
@@ -165,21 +162,10 @@ def get_lang(lang_id):
 LOCAL_TZ = timezone("Europe/Helsinki")
 
 
-def mark_deleted(obj):
-    if obj.deleted:
-        return False
-    obj.deleted = True
-    obj.save(update_fields=["deleted"])
-    return True
-
-
-class APIBrokenError(Exception):
-    pass
-
-
 @register_importer
 class HelmetImporter(Importer):
     name = "helmet"
+    shared_data_source_ids = ("ahjo", settings.SYSTEM_DATA_SOURCE_ID)
     supported_languages = ["fi", "sv", "en", "ru"]
     current_tick_index = 0
     kwcache = {}
@@ -246,12 +232,6 @@ class HelmetImporter(Importer):
         else:
             self.yso_by_id = {}
 
-        if self.options["cached"]:
-            requests_cache.install_cache("helmet")
-            self.cache = requests_cache.get_cache()
-        else:
-            self.cache = None
-
     @staticmethod
     def _get_extended_properties(event_el):
         ext_props = recur_dict()
@@ -490,79 +470,62 @@ class HelmetImporter(Importer):
 
         return event
 
-    def _recur_fetch_paginated_url(self, url, lang, events):
-        max_tries = 5
-        for try_number in range(0, max_tries):
-            response = requests.get(url)
-            if response.status_code != 200:
-                logger.warning("HelMet API reported HTTP %d" % response.status_code)
-                time.sleep(2)
-                if self.cache:
-                    self.cache.delete_url(url)
-                continue
-            try:
-                root_doc = response.json()
-            except ValueError:
-                logger.warning(
-                    "HelMet API returned invalid JSON (try {} of {})".format(
-                        try_number + 1, max_tries
-                    )
-                )
-                if self.cache:
-                    self.cache.delete_url(url)
-                time.sleep(5)
-                continue
-            break
-        else:
-            logger.error("HelMet API broken again, giving up")
-            raise APIBrokenError()
-
-        documents = root_doc["value"]
-        earliest_end_time = None
-        for doc in documents:
-            event = self._import_event(lang, doc, events)
-            if not earliest_end_time or event["end_time"] < earliest_end_time:
-                earliest_end_time = event["end_time"]
+    def _get_next_page_url(self, root_doc):
+        def dt_parse(dt_str):
+            return LOCAL_TZ.localize(
+                dateutil.parser.parse(dt_str), is_dst=None
+            ).astimezone(pytz.utc)
 
+        end_times = [dt_parse(doc["EventEndDate"]) for doc in root_doc["value"]]
         now = datetime.now().replace(tzinfo=LOCAL_TZ)
         # We check 31 days backwards.
-        if earliest_end_time < now - timedelta(days=31):
-            return
+        if end_times and min(end_times) < now - timedelta(days=31):
+            return None
+
+        if "odata.nextLink" not in root_doc:
+            return None
+        return "%s/api/opennc/v1/%s%s" % (
+            HELMET_BASE_URL,
+            root_doc["odata.nextLink"],
+            "&$format=json",
+        )
 
-        if "odata.nextLink" in root_doc:
-            self._recur_fetch_paginated_url(
-                "%s/api/opennc/v1/%s%s"
-                % (HELMET_BASE_URL, root_doc["odata.nextLink"], "&$format=json"),
-                lang,
-                events,
-            )
+    def _iter_pages(self, lang, url):
+        # whole pages, so that prefetching buffers pages rather than documents
+        for root_doc in self.http.iter_pages(url, self._get_next_page_url):
+            yield lang, root_doc["value"]
 
     def import_events(self):
         logger.info("Importing HelMet events")
         events = recur_dict()
+        pages = []
         for lang in self.supported_languages:
             helmet_lang_id = HELMET_LANGUAGES[lang]
             url = HELMET_API_URL.format(
                 lang_code=helmet_lang_id, start_date="2016-01-01"
             )
             logger.info("Processing lang {} from URL {}".format(lang, url))
-            try:
-                self._recur_fetch_paginated_url(url, lang, events)
-            except APIBrokenError:
+            pages.append(self._iter_pages(lang, url))
+        # All languages are fetched concurrently, but the Finnish events must
+        # be processed first, as the other languages are merged into them.
+        try:
+            pages = self.fetch_unless_unchanged(lambda: self.http.prefetch(pages))
+            if pages is None:
                 return
+            with self.report.phase("parse"):
+                for lang, docs in pages:
+                    for doc in docs:
+                        self._import_event(lang, doc, events)
+        except HttpClientError as e:
+            logger.error("HelMet API broken again, giving up: {}".format(e))
+            return
 
         event_list = sorted(events.values(), key=lambda x: x["end_time"])
         qs = Event.objects.filter(
             end_time__gte=datetime.now(), data_source="helmet", deleted=False
         )
 
-        self.syncher = ModelSyncher(
-            qs, lambda obj: obj.origin_id, delete_func=mark_deleted
-        )
-
-        for event in event_list:
-            obj = self.save_event(event)
-            self.syncher.mark(obj)
-
-        self.syncher.finish(force=self.options["force"])
+        for _ in self.sync_events(event_list, qs):
+            pass
+        self.http.mark_processed()
         logger.info("%d events processed" % len(events.values()))
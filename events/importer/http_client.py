@@ -0,0 +1,253 @@
+import io
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+# Responses with these statuses are worth retrying, anything else is an error
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_DONE = object()
+
+
+class HttpClientError(Exception):
+    pass
+
+
+class _Failure(object):
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class HttpClient(object):
+    """
+    Shared HTTP client for importers.
+
+    Requests go through a single pooled session and are retried with
+    exponential backoff on connection errors, retryable HTTP statuses and
+    (for JSON) unparseable bodies. Once the retries are exhausted,
+    HttpClientError is raised.
+
+    With a ResponseCache, responses are revalidated with conditional requests
+    and the client keeps track of whether the responses fetched during an
+    import are the same ones the previous completed import processed.
+    """
+
+    def __init__(
+        self,
+        max_workers=4,
+        max_retries=5,
+        backoff=1.0,
+        timeout=60,
+        verify=True,
+        cache=None,
+    ):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        # urls fetched since the last mark_processed call
+        self.fetched = set()
+
+        self.session = requests.Session()
+        self.session.verify = verify
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _sleep(self, attempt):
+        time.sleep(self.backoff * 2**attempt)
+
+    def _invalidate(self, url):
+        # do not let a cache hand back the same broken response on retry
+        if self.cache is not None:
+            self.cache.delete_url(url)
+
+    def _cached_response(self, url):
+        meta = self.cache.get_meta(url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = self.cache.get_body(url)
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+    def _send(self, url, **kwargs):
+        if self.cache is None:
+            return self.session.get(url, **kwargs)
+        headers = dict(kwargs.pop("headers", None) or {})
+        headers.update(self.cache.validators(url))
+        response = self.session.get(url, headers=headers, **kwargs)
+        if response.status_code == 304:
+            logger.debug("%s not modified" % url)
+            return self._cached_response(url)
+        if response.status_code == 200:
+            self.cache.store(url, response.headers, response.content)
+        response.from_cache = False
+        return response
+
+    def _request(self, url, parse, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        error = None
+        for attempt in range(self.max_retries):
+            if attempt:
+                self._sleep(attempt - 1)
+            try:
+                response = self._send(url, **kwargs)
+            except requests.RequestException as e:
+                logger.warning("Fetching %s failed: %s" % (url, e))
+                error = e
+                continue
+            if response.status_code in RETRY_STATUSES:
+                logger.warning("%s returned HTTP %d" % (url, response.status_code))
+                error = "HTTP %d" % response.status_code
+                self._invalidate(url)
+                continue
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                raise HttpClientError("Fetching %s failed: %s" % (url, e)) from e
+            try:
+                result = parse(response)
+            except ValueError as e:
+                logger.warning(
+                    "%s returned an invalid response (try %d of %d)"
+                    % (url, attempt + 1, self.max_retries)
+                )
+                error = e
+                self._invalidate(url)
+                continue
+            if self.cache is not None:
+                self.fetched.add(url)
+            return result
+        raise HttpClientError(
+            "Giving up on %s after %d tries: %s" % (url, self.max_retries, error)
+        )
+
+    def is_unchanged(self, scope=None):
+        """
+        Whether all the responses fetched since the last mark_processed call
+        were already processed by an earlier import. Always False without a
+        cache.
+        """
+        if self.cache is None or not self.fetched:
+            return False
+        return all(self.cache.is_processed(url, scope) for url in self.fetched)
+
+    def mark_processed(self, scope=None):
+        """
+        Records the responses fetched since the last call as processed, to be
+        called once an import has completed successfully.
+        """
+        if self.cache is not None:
+            for url in self.fetched:
+                self.cache.mark_processed(url, scope)
+        self.fetched.clear()
+
+    def get(self, url, **kwargs):
+        """
+        Returns the response for url. Use stream=True for lazily consumed bodies.
+        """
+        return self._request(url, lambda response: response, **kwargs)
+
+    def get_json(self, url, **kwargs):
+        return self._request(url, lambda response: response.json(), **kwargs)
+
+    def get_stream(self, url, **kwargs):
+        """
+        Returns a file object of the body of url, read from the connection as
+        it is consumed. With a cache, the body has already been read to store
+        it, so the stored body is returned instead.
+        """
+        response = self.get(url, stream=True, **kwargs)
+        if self.cache is not None:
+            return io.BytesIO(response.content)
+        response.raw.decode_content = True
+        return response.raw
+
+    def iter_pages(self, url, get_next_url, **kwargs):
+        """
+        Yields JSON pages starting from url. get_next_url is called with each
+        page and returns the url of the next one, or None to stop.
+        """
+        while url:
+            page = self.get_json(url, **kwargs)
+            url = get_next_url(page)
+            yield page
+
+    def map(self, func, iterable):
+        """
+        Calls func on the items of iterable concurrently, yielding the results
+        in order.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from executor.map(func, iterable)
+
+    def prefetch(self, iterables, buffer_size=2):
+        """
+        Consumes the iterables (e.g. the page iterators of each language) in
+        worker threads, at most max_workers at a time and at most buffer_size
+        items ahead of the caller. Yields the items of the iterables in order,
+        one iterable after another. Yield whole pages from the iterables to
+        keep buffer_size pages of each in memory.
+        """
+        iterables = list(iterables)
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=buffer_size) for _ in iterables]
+
+        def put(q, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce(iterable, q):
+            try:
+                for item in iterable:
+                    if not put(q, item):
+                        return
+            except Exception as e:
+                put(q, _Failure(e))
+                return
+            put(q, _DONE)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for iterable, q in zip(iterables, queues):
+                executor.submit(produce, iterable, q)
+            for q in queues:
+                while True:
+                    item = q.get()
+                    if item is _DONE:
+                        break
+                    if isinstance(item, _Failure):
+                        raise item.exc
+                    yield item
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,141 @@
+import cProfile
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, ExitStack
+
+from django.db import connection
+from django.utils import timezone
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+
+class ImportReport(object):
+    """
+    Timings, counts, database queries and peak memory of an import run.
+
+    Phases do not overlap: time spent in a phase entered inside another one
+    only counts towards the inner phase.
+    """
+
+    def __init__(self, importer_name):
+        self.importer_name = importer_name
+        self.started = None
+        self.elapsed = 0.0
+        self.imports = {}
+        self.phases = defaultdict(float)
+        self.counts = Counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.peak_memory = None
+        self._phase_stack = []
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def count_saved(self, objs):
+        """Counts saved objects as created, changed or unchanged."""
+        for obj in objs:
+            if getattr(obj, "_created", False):
+                self.counts["created"] += 1
+            elif getattr(obj, "_changed", False):
+                self.counts["changed"] += 1
+            else:
+                self.counts["unchanged"] += 1
+
+    @contextmanager
+    def phase(self, name):
+        now = time.monotonic()
+        if self._phase_stack:
+            outer, outer_start = self._phase_stack[-1]
+            self.phases[outer] += now - outer_start
+        self._phase_stack.append((name, now))
+        try:
+            yield
+        finally:
+            _, start = self._phase_stack.pop()
+            now = time.monotonic()
+            self.phases[name] += now - start
+            if self._phase_stack:
+                self._phase_stack[-1] = (self._phase_stack[-1][0], now)
+
+    @contextmanager
+    def import_type(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.imports[name] = self.imports.get(name, 0.0) + time.monotonic() - start
+
+    def _record_query(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_time += time.monotonic() - start
+
+    @contextmanager
+    def run(self, profile_path=None, trace_memory=False):
+        """
+        Records the run of the enclosed block. If profile_path is given, the
+        run is also profiled and the cProfile stats are dumped there. Peak
+        memory is only recorded with trace_memory, as tracing slows the run
+        down considerably.
+        """
+        self.started = timezone.now()
+        start = time.monotonic()
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if trace_memory:
+            tracemalloc.reset_peak()
+        profiler = cProfile.Profile() if profile_path else None
+        try:
+            with ExitStack() as stack:
+                stack.enter_context(connection.execute_wrapper(self._record_query))
+                if profiler:
+                    profiler.enable()
+                    stack.callback(profiler.disable)
+                yield self
+        finally:
+            self.elapsed = time.monotonic() - start
+            if trace_memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            if profiler:
+                os.makedirs(os.path.dirname(profile_path) or ".", exist_ok=True)
+                profiler.dump_stats(profile_path)
+                logger.info("Profile written to %s" % profile_path)
+
+    def as_dict(self):
+        return {
+            "importer": self.importer_name,
+            "started": self.started.isoformat() if self.started else None,
+            "elapsed": self.elapsed,
+            "imports": self.imports,
+            "phases": dict(self.phases),
+            "counts": dict(self.counts),
+            "queries": {"count": self.query_count, "time": self.query_time},
+            "peak_memory": self.peak_memory,
+        }
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+        logger.info("Import report written to %s" % path)
+
+
+def report_path(data_path, importer_name):
+    """Default path of the report of an import run starting now."""
+    return os.path.join(
+        data_path,
+        "import_reports",
+        "%s-%s.json" % (importer_name, timezone.now().strftime("%Y%m%dT%H%M%S")),
+    )
@@ -27,8 +27,9 @@ from events.models import (
 )
 from events.translation_utils import expand_model_fields
 
-from .base import Importer, recur_dict, register_importer
-from .util import clean_url, unicodetext
+from .base import EVENT_BATCH_SIZE, Importer, recur_dict, register_importer
+from .recurring import FingerprintStore, RecurringGrouper
+from .util import chunked, clean_url, iterparse_elements, merge_by_id, unicodetext
 from .yso import KEYWORDS_TO_ADD_TO_AUDIENCE
 
 # Per module logger
@@ -288,6 +289,7 @@ def parse_course_time(secondary_headline):
 @register_importer
 class KulkeImporter(Importer):
     name = "kulke"
+    shared_data_source_ids = ("ahjo", settings.SYSTEM_DATA_SOURCE_ID)
     supported_languages = ["fi", "sv", "en"]
     languages_to_detect = []
 
@@ -718,7 +720,8 @@ class KulkeImporter(Importer):
             self.find_place(event)
         return True
 
-    def _gather_recurring_events(self, lang, event_el, events, recurring_groups):
+    def _gather_recurring_events(self, lang, event_el, grouper):
+        # the events referring to the same recurring events form a group
         references = event_el.find("eventreferences")
         this_id = int(event_el.attrib["id"])
         if references is None or len(references) < 1:
@@ -728,20 +731,7 @@ class KulkeImporter(Importer):
             recur_ids = map(lambda x: int(x.attrib["id"]), recurs)
             group = set(recur_ids)
         group.add(this_id)
-        recurring_groups[this_id] = group
-
-    def _verify_recurs(self, recurring_groups):
-        for key, group in recurring_groups.items():
-            for inner_key in group:
-                inner_group = recurring_groups.get(inner_key)
-                if inner_group and inner_group != group:
-                    logger.warning("Differing groups:", key, inner_key)
-                    logger.warning("Differing groups:", group, inner_group)
-                    if len(inner_group) == 0:
-                        logger.warning(
-                            "Event self-identifies to no group, removing.", inner_key
-                        )
-                        group.remove(inner_key)
+        grouper.add(this_id, frozenset(group))
 
     def _update_super_event(self, super_event):
         events = super_event.get_children()
@@ -850,10 +840,11 @@ class KulkeImporter(Importer):
 
         super_event.save()
 
-    def _save_recurring_superevents(self, recurring_groups):
-        groups = map(frozenset, recurring_groups.values())
-        aggregates = set()
-        for group in groups:
+    def _save_recurring_superevents(self, grouper):
+        """Saves the recurring groups. Returns the aggregates mapped to their groups."""
+        aggregates = {}
+        for recurring_group in grouper:
+            group = recurring_group.common
             kulke_ids = set(map(make_kulke_id, group))
             superevent_aggregates = EventAggregate.objects.filter(
                 members__event__id__in=kulke_ids
@@ -896,7 +887,7 @@ class KulkeImporter(Importer):
             elif cnt == 1:
                 aggregate = superevent_aggregates.first()
                 if len(group) == 1:
-                    events = Event.objects.get(pk=make_kulke_id(group.pop()))
+                    events = Event.objects.get(pk=make_kulke_id(next(iter(group))))
                     # The imported event is not part of an aggregate
                     # but one was found it in the db. Remove the event
                     # from the aggregate. This is the only case when
@@ -912,10 +903,11 @@ class KulkeImporter(Importer):
                             # Ignore unique violations. They
                             # ensure that no duplicate members are added.
                             pass
-            for event in events:
+            # members already linked to the super event are left untouched
+            for event in events.exclude(super_event=aggregate.super_event):
                 event.super_event = aggregate.super_event
                 event.save()
-            aggregates.add(aggregate)
+            aggregates[aggregate] = recurring_group
         return aggregates
 
     def import_events(self):
@@ -931,21 +923,20 @@ class KulkeImporter(Importer):
         self._import_events(importing_courses=True)
 
     def _import_events(self, importing_courses=False):
-        events = recur_dict()
-        recurring_groups = dict()
-        for lang in ["fi", "sv", "en"]:
-            events_file = os.path.join(
-                settings.IMPORT_FILE_PATH, "kulke", "events-%s.xml" % lang
+        # super events are only re-aggregated when their sub events have changed
+        grouper = RecurringGrouper(FingerprintStore(self.data_source))
+        streams = [
+            (
+                lang,
+                iterparse_elements(
+                    os.path.join(
+                        settings.IMPORT_FILE_PATH, "kulke", "events-%s.xml" % lang
+                    ),
+                    "event",
+                ),
             )
-            root = etree.parse(events_file)
-            for event_el in root.xpath("/eventdata/event"):
-                success = self._import_event(lang, event_el, events, importing_courses)
-                if success:
-                    self._gather_recurring_events(
-                        lang, event_el, events, recurring_groups
-                    )
-
-        events.default_factory = None
+            for lang in ["fi", "sv", "en"]
+        ]
 
         course_keywords = set(
             map(
@@ -954,17 +945,38 @@ class KulkeImporter(Importer):
             )
         )
 
-        for event in events.values():
-            if (
-                any(kw.id in course_keywords for kw in event["keywords"])
-                == importing_courses
+        def iter_events():
+            # languages are merged per event as the feeds are read, so that
+            # only the events of the current batch are kept in memory
+            for eid, elements in merge_by_id(
+                streams, lambda event_el: int(event_el.attrib["id"])
             ):
-                self.save_event(event)
-
-        self._verify_recurs(recurring_groups)
-        aggregates = self._save_recurring_superevents(recurring_groups)
-        for agg in aggregates:
+                events = recur_dict()
+                for lang, event_el in elements:
+                    success = self._import_event(
+                        lang, event_el, events, importing_courses
+                    )
+                    if success:
+                        self._gather_recurring_events(lang, event_el, grouper)
+                if eid not in events:
+                    continue
+                event = events[eid]
+                grouper.set_data(eid, event)
+                if (
+                    any(kw.id in course_keywords for kw in event["keywords"])
+                    == importing_courses
+                ):
+                    yield event
+
+        for batch in chunked(iter_events(), EVENT_BATCH_SIZE):
+            self.save_events(batch)
+
+        aggregates = self._save_recurring_superevents(grouper)
+        for agg, group in aggregates.items():
+            if grouper.is_unchanged(group, agg.super_event):
+                continue
             self._update_super_event(agg.super_event)
+            grouper.mark_saved(group, agg.super_event)
 
     def import_keywords(self):
         logger.info("Importing Kulke categories as keywords")
@@ -8,7 +8,6 @@ from os.path import commonprefix
 
 import bleach
 import pytz
-import requests
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.utils.html import strip_tags
@@ -17,7 +16,6 @@ from django_orghierarchy.models import Organization
 from events.models import DataSource, Event, Keyword, License, Place
 
 from .base import Importer, recur_dict, register_importer
-from .sync import ModelSyncher
 from .util import clean_text, clean_url
 
 # Per module logger
@@ -113,21 +111,6 @@ LOCAL_TZ = pytz.timezone("Europe/Helsinki")
 HTML_BREAK_LINE_REGEX = re.compile(r"<br\s*/?>", re.IGNORECASE)
 
 
-def mark_deleted(obj):
-    if obj.deleted:
-        return False
-    obj.deleted = True
-    obj.save(update_fields=["deleted"])
-    return True
-
-
-def check_deleted(obj):
-    # we don't want to delete past events, so as far as the importer cares, they are considered deleted
-    if obj.deleted or obj.end_time < datetime.now(pytz.utc):
-        return True
-    return False
-
-
 def replace_html_breaks_with_whitespace(text):
     return re.sub(HTML_BREAK_LINE_REGEX, " ", text)
 
@@ -167,6 +150,7 @@ def get_namespaced_event_serie_id(event_serie_id):
 @register_importer
 class LippupisteImporter(Importer):
     name = "lippupiste"
+    shared_data_source_ids = ("ytj",)
     supported_languages = ["fi"]
     languages_to_detect = []
 
@@ -263,7 +247,7 @@ class LippupisteImporter(Importer):
 
     def _fetch_event_source_data(self, url):
         # stream=True allows lazy iteration
-        response = requests.get(url, stream=True)
+        response = self.http.get(url, stream=True)
         response_iter = response.iter_lines()
         # CSV reader wants str instead of byte, let's decode
         decoded_response_iter = codecs.iterdecode(response_iter, "utf-8")
@@ -611,25 +595,16 @@ class LippupisteImporter(Importer):
     def _synch_events(self, events):
         event_list = sorted(events.values(), key=lambda x: x["start_time"])
 
-        now = datetime.now()
+        # we don't want to delete past events
         syncher_queryset = Event.objects.filter(
-            end_time__gte=now, data_source=self.data_source, deleted=False
+            end_time__gte=datetime.now(pytz.utc),
+            data_source=self.data_source,
+            deleted=False,
         )
-        self.syncher = ModelSyncher(
-            syncher_queryset,
-            lambda obj: obj.origin_id,
-            delete_func=mark_deleted,
-            check_deleted_func=check_deleted,
-        )
-
-        for event in event_list:
-            obj = self.save_event(event)
+        for event, obj in self.sync_events(event_list, syncher_queryset):
             if "super_event_id" in event:
                 obj.super_event_id = event["super_event_id"]
                 obj.save()
-            self.syncher.mark(obj)
-
-        self.syncher.finish(force=self.options["force"])
 
     def import_events(self):
         if not LIPPUPISTE_EVENT_API_URL:
@@ -638,9 +613,11 @@ class LippupisteImporter(Importer):
             )
         logger.info("Importing Lippupiste events")
         events = recur_dict()
-        event_source_data = list(
-            self._fetch_event_source_data(LIPPUPISTE_EVENT_API_URL)
+        event_source_data = self.fetch_unless_unchanged(
+            lambda: list(self._fetch_event_source_data(LIPPUPISTE_EVENT_API_URL))
         )
+        if event_source_data is None:
+            return
         if not event_source_data:
             raise ValidationError("Lippupiste API didn't return data, giving up")
 
@@ -713,5 +690,6 @@ class LippupisteImporter(Importer):
         )
         for super_event in super_events:
             self._update_superevent_details(super_event)
+        self.http.mark_processed()
 
         logger.info("%d events processed" % len(events.values()))
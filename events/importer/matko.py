@@ -5,17 +5,21 @@ from collections import OrderedDict
 
 import dateutil.parser
 import pytz
-import requests
-import requests_cache
 from django.db.models import Count
 from django_orghierarchy.models import Organization
-from lxml import etree
 
 from events.keywords import KeywordMatcher
 from events.models import DataSource, Event, Place
 
-from .base import Importer, recur_dict, register_importer
-from .util import clean_text, replace_location, unicodetext
+from .base import EVENT_BATCH_SIZE, Importer, recur_dict, register_importer
+from .util import (
+    chunked,
+    clean_text,
+    iterparse_elements,
+    merge_by_id,
+    replace_location,
+    unicodetext,
+)
 
 # Per module logger
 logger = logging.getLogger(__name__)
@@ -113,6 +117,7 @@ def zipcode_and_muni(text):
 @register_importer
 class MatkoImporter(Importer):
     name = "matko"
+    shared_data_source_ids = ("ytj",)
     supported_languages = ["fi", "sv", "en"]
 
     def __init__(self, *args, **kwargs):
@@ -169,9 +174,6 @@ class MatkoImporter(Importer):
             for p in deleted_place_list
         }
 
-        if self.options["cached"]:
-            requests_cache.install_cache("matko")
-
     def _import_common(self, lang_code, item, result):
         result["name"][lang_code] = clean_text(unicodetext(item.find("title")))
         result["description"][lang_code] = unicodetext(item.find("description"))
@@ -444,23 +446,39 @@ class MatkoImporter(Importer):
         return places
 
     def items_from_url(self, url):
-        resp = requests.get(url)
-        assert resp.status_code == 200
-        root = etree.fromstring(resp.content)
-        return root.xpath("channel/item")
+        """
+        Fetches url and returns a stream of the feed items in it.
+        """
+        return iterparse_elements(self.http.get_stream(url), "item")
 
     def import_events(self):
         logger.info("Importing Matko events")
-        events = recur_dict()
         keyword_matcher = KeywordMatcher()
-        for lang, url in MATKO_URLS["events"].items():
-            items = self.items_from_url(url)
-            for item in items:
-                self._import_event_from_feed(lang, item, events, keyword_matcher)
+        feeds = self.fetch_unless_unchanged(
+            lambda: [
+                (lang, self.items_from_url(url))
+                for lang, url in MATKO_URLS["events"].items()
+            ]
+        )
+        if feeds is None:
+            return
 
-        for event in events.values():
-            self.save_event(event)
-        logger.info("%d events processed" % len(events.values()))
+        def iter_events():
+            for eid, items in merge_by_id(
+                feeds, lambda item: int(text(item, "uniqueid"))
+            ):
+                events = recur_dict()
+                for lang, item in items:
+                    self._import_event_from_feed(lang, item, events, keyword_matcher)
+                if eid in events:
+                    yield events[eid]
+
+        count = 0
+        for batch in chunked(iter_events(), EVENT_BATCH_SIZE):
+            self.save_events(batch)
+            count += len(batch)
+        self.http.mark_processed()
+        logger.info("%d events processed" % count)
 
     def _fetch_places(self):
         if hasattr(self, "places"):
@@ -6,14 +6,13 @@ from datetime import datetime
 from html import unescape
 
 import pytz
-import requests
-import requests_cache
 from django_orghierarchy.models import Organization
 
 from events.models import DataSource, Event, Keyword
 
 from .base import Importer, recur_dict, register_importer
-from .sync import ModelSyncher
+from .http_client import HttpClientError
+from .sync import IdSyncher
 
 logger = logging.getLogger(__name__)
 
@@ -23,14 +22,6 @@ MIKKELINYT_LOCATION = os.getenv("MIKKELINYT_LOCATION", "")
 MIKKELINYT_IMAGE_BASE_URL = "http://www.mikkelinyt.fi/uploads/savonlinnanyt"
 
 
-def mark_deleted(obj):
-    if obj.deleted:
-        return False
-    obj.deleted = True
-    obj.save(update_fields=["deleted"])
-    return True
-
-
 @register_importer
 class MikkeliNytImporter(Importer):
     name = "mikkelinyt"
@@ -43,11 +34,11 @@ class MikkeliNytImporter(Importer):
     def items_from_url(self, url):
         logger.info(url)
 
-        resp = requests.get(url)
-        if resp.status_code == 200:
-            return resp.json()["data"]
-
-        return None
+        try:
+            return self.http.get_json(url)["data"]
+        except HttpClientError as e:
+            logger.error(e)
+        return []
 
     def setup(self):
         defaults = dict(name="MikkeliNyt")
@@ -61,9 +52,6 @@ class MikkeliNytImporter(Importer):
             defaults=defaults, **org_args
         )
 
-        if self.options["cached"]:
-            requests_cache.install_cache("mikkelinyt")
-
     def get_url(self):
         url = MIKKELINYT_BASE_URL + "?showall=1&apiKey={}&location={}".format(
             MIKKELINYT_API_KEY, MIKKELINYT_LOCATION
@@ -81,9 +69,11 @@ class MikkeliNytImporter(Importer):
 
     def import_events(self):
         logger.info("Importing MikkeliNyt events")
-        items = self.items_from_url(self.get_url())
+        items = self.fetch_unless_unchanged(lambda: self.items_from_url(self.get_url()))
+        if items is None:
+            return
 
-        if items is None or len(items) == 0:
+        if len(items) == 0:
             logger.info("Could not parse items, giving up...")
         else:
             syncher_queryset = Event.objects.filter(
@@ -91,15 +81,14 @@ class MikkeliNytImporter(Importer):
                 data_source=self.data_source,
                 deleted=False,
             )
-            self.syncher = ModelSyncher(
-                syncher_queryset, lambda obj: obj.origin_id, delete_func=mark_deleted
-            )
+            self.syncher = IdSyncher(syncher_queryset, "origin_id", {"deleted": True})
 
             for item in items:
                 event = self.upsert_event(item)
                 self.syncher.mark(event)
 
-            self.syncher.finish()
+            self.report.count("deleted", self.syncher.finish())
+            self.http.mark_processed()
 
     def upsert_event(self, item):
         origin_id = item["id"]
@@ -0,0 +1,155 @@
+import logging
+import multiprocessing
+import time
+import traceback
+from collections import namedtuple, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.translation import activate
+
+from .base import get_importers
+from .instrumentation import report_path
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+# Imports of a type may rely on everything imported of the types it depends on,
+# e.g. events are linked to the keywords and places of other data sources
+IMPORT_DEPENDENCIES = OrderedDict(
+    [
+        ("keywords", ()),
+        ("places", ()),
+        ("events", ("keywords", "places")),
+        ("courses", ("keywords", "places")),
+    ]
+)
+IMPORT_TYPES = tuple(IMPORT_DEPENDENCIES)
+# First key of the advisory locks, the second one is a data source id
+IMPORT_LOCK_NAMESPACE = 0x1E7E
+
+ImportJob = namedtuple("ImportJob", ["module", "import_type", "dependencies"])
+ImportResult = namedtuple("ImportResult", ["module", "import_type", "elapsed", "error"])
+
+
+def plan_jobs(modules, import_types):
+    """
+    Returns a job for each requested import type a module supports, in the
+    order of IMPORT_TYPES. Each job depends on the (module, import type) of
+    the earlier jobs of its module and of the jobs of the types its type
+    depends on.
+    """
+    importers = get_importers()
+    jobs = []
+    for import_type in IMPORT_TYPES:
+        if import_type not in import_types:
+            continue
+        for module in modules:
+            if not hasattr(importers[module], "import_%s" % import_type):
+                continue
+            dependencies = {
+                (job.module, job.import_type)
+                for job in jobs
+                if job.module == module
+                or job.import_type in IMPORT_DEPENDENCIES[import_type]
+            }
+            jobs.append(ImportJob(module, import_type, frozenset(dependencies)))
+    return jobs
+
+
+@contextmanager
+def importer_lock(*data_source_ids):
+    """
+    Holds session level advisory locks on the data sources, taken in sorted
+    order so that imports locking the same data sources cannot deadlock.
+    """
+    data_source_ids = sorted(set(data_source_ids))
+    with connection.cursor() as cursor:
+        for data_source_id in data_source_ids:
+            cursor.execute(
+                "SELECT pg_advisory_lock(%s, hashtext(%s))",
+                [IMPORT_LOCK_NAMESPACE, data_source_id],
+            )
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for data_source_id in reversed(data_source_ids):
+                cursor.execute(
+                    "SELECT pg_advisory_unlock(%s, hashtext(%s))",
+                    [IMPORT_LOCK_NAMESPACE, data_source_id],
+                )
+
+
+def run_import_job(module, import_type, options):
+    """
+    Runs one import of an importer module under the lock of its own data
+    source. The lock is taken before the importer is constructed, as its setup
+    creates and reads the rows of its data source. The shared data sources the
+    setup also writes, see Importer.shared_data_source_ids, are locked during
+    the setup only. Shared data sources are never the own data source of an
+    importer, so holding the own lock while waiting for them cannot deadlock.
+    Errors are returned in the result instead of raised, so that they survive
+    the trip back from the worker process.
+    """
+    start = time.monotonic()
+    error = None
+    # translated fields are populated in the default language
+    activate(settings.LANGUAGES[0][0])
+    try:
+        importer_class = get_importers()[module]
+        with importer_lock(importer_class.name):
+            with importer_lock(*importer_class.shared_data_source_ids):
+                importer = importer_class(options)
+            report = importer.report
+            try:
+                with report.run(), report.import_type(import_type):
+                    getattr(importer, "import_%s" % import_type)()
+            finally:
+                name = "%s-%s" % (module, import_type)
+                report.write(report_path(options["data_path"], name))
+    except Exception:  # noqa
+        error = traceback.format_exc()
+        logger.error("%s %s import failed:\n%s" % (module, import_type, error))
+    finally:
+        connection.close()
+    return ImportResult(module, import_type, time.monotonic() - start, error)
+
+
+def run_jobs(jobs, options, max_workers=None):
+    """
+    Runs each job in a worker process as soon as the jobs it depends on have
+    finished. Yields the results as the jobs finish. The later jobs of a
+    module whose job failed are skipped.
+    """
+    pending = list(jobs)
+    finished = set()
+    failed = set()
+    running = set()
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        while pending or running:
+            ready = [job for job in pending if job.dependencies <= finished]
+            for job in ready:
+                pending.remove(job)
+                if job.module in failed:
+                    finished.add((job.module, job.import_type))
+                    continue
+                # forked workers must not share the connections of this process
+                connections.close_all()
+                running.add(
+                    executor.submit(
+                        run_import_job, job.module, job.import_type, options
+                    )
+                )
+            if not running:
+                continue
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result.error:
+                    failed.add(result.module)
+                finished.add((result.module, result.import_type))
+                yield result
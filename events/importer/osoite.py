@@ -10,7 +10,8 @@ from django_orghierarchy.models import Organization
 from events.models import DataSource, Place
 
 from .base import Importer, register_importer
-from .sync import ModelSyncher
+from .sync import IdSyncher
+from .util import chunked
 
 # Per module logger
 logger = logging.getLogger(__name__)
@@ -21,6 +22,7 @@ GK25_SRID = 3879
 @register_importer
 class OsoiteImporter(Importer):
     name = "osoite"
+    shared_data_source_ids = ("ahjo",)
     supported_languages = ["fi", "sv"]
 
     def setup(self):
@@ -39,12 +41,6 @@ class OsoiteImporter(Importer):
         self.organization, _ = Organization.objects.get_or_create(
             defaults=defaults, **org_args
         )
-        if self.options.get("remap", None):
-            # This will prevent deletion checking, marking all deleted places as deleted
-            # again and remapping them accordingly! Otherwise, places already deleted
-            # will not be remapped by the syncher.
-            self.check_deleted = lambda x: False
-            self.mark_deleted = self.delete_and_replace
 
     def get_street_address(self, address, language):
         # returns the address sans municipality in the desired language, or Finnish as fallback
@@ -70,11 +66,12 @@ class OsoiteImporter(Importer):
             return Klass.objects.get(origin_id=res_id)
         return Klass.objects.all()
 
-    def delete_and_replace(self, obj):
-        obj.deleted = True
-        obj.save(update_fields=["deleted"])
+    def warn_deleted(self, place_ids):
         # we won't stand idly by and watch kymp delete used addresses willy-nilly without raising a ruckus!
-        if obj.events.count() > 0:
+        deleted_with_events = Place.objects.filter(
+            id__in=place_ids, deleted=True, events__isnull=False
+        ).distinct()
+        for obj in deleted_with_events:
             # sadly, addresses are identified by, well, address alone. Therefore we have no other data that
             # could be used to find out if there is a replacement location.
             logger.warning(
@@ -85,20 +82,10 @@ class OsoiteImporter(Importer):
                 "manually move the events instead. Until then, events will stay mapped to the old "
                 "addresses." % (obj.id, str(obj))
             )
-        return True
 
-    def mark_deleted(self, obj):
-        if obj.deleted:
-            return False
-        return self.delete_and_replace(obj)
-
-    def check_deleted(self, obj):
-        return obj.deleted
-
-    @db.transaction.atomic
-    def _import_address(self, syncher, address_obj):
+    def get_origin_id(self, address_obj):
         # addresses have no static ids, just format the address cleanly
-        origin_id = (
+        return (
             str(address_obj)
             .replace(" - ", "-")
             .replace(",", "")
@@ -106,6 +93,10 @@ class OsoiteImporter(Importer):
             .replace(".", "_")
             .lower()
         )
+
+    @db.transaction.atomic
+    def _import_address(self, syncher, address_obj):
+        origin_id = self.get_origin_id(address_obj)
         obj = syncher.get(origin_id)
         obj_id = "osoite:" + origin_id
         if not obj:
@@ -182,16 +173,23 @@ class OsoiteImporter(Importer):
         else:
             logger.info("Loading addresses...")
             obj_list = self.pk_get("Address")
-            logger.info("%s addresses loaded" % len(obj_list))
-        syncher = ModelSyncher(
+            logger.info("%s addresses loaded" % obj_list.count())
+            obj_list = obj_list.iterator()
+        remap = self.options.get("remap", False)
+        # with remap, places already deleted are deleted and checked again
+        syncher = IdSyncher(
             queryset,
-            lambda obj: obj.origin_id,
-            delete_func=self.mark_deleted,
-            check_deleted_func=self.check_deleted,
+            "origin_id",
+            {"deleted": True},
+            after_delete=self.warn_deleted,
+            include_deleted=remap,
         )
-        for idx, obj in enumerate(obj_list):
-            if idx and (idx % 1000) == 0:
-                logger.info("%s addresses processed" % idx)
-            self._import_address(syncher, obj)
-
-        syncher.finish(self.options.get("remap", False))
+        count = 0
+        for batch in chunked(obj_list, syncher.chunk_size):
+            syncher.load(self.get_origin_id(address_obj) for address_obj in batch)
+            for address_obj in batch:
+                self._import_address(syncher, address_obj)
+            count += len(batch)
+            logger.info("%s addresses processed" % count)
+
+        self.report.count("deleted", syncher.finish(remap))
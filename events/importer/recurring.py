@@ -0,0 +1,147 @@
+import datetime
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.db import models
+
+from events.models import RecurringEventFingerprint
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+
+def _canonical(value):
+    """Converts imported event data into plain, consistently ordered JSON data."""
+    if isinstance(value, Mapping):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(
+            (_canonical(v) for v in value),
+            key=lambda v: json.dumps(v, sort_keys=True, default=str),
+        )
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, models.Model):
+        return value.pk
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def fingerprint(data):
+    """Returns a hash of the given event data that ignores dict and set ordering."""
+    serialized = json.dumps(
+        _canonical(data), sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+
+class RecurringGroup(object):
+    """Events sharing the same common data: a super event and its sub events."""
+
+    def __init__(self, key, common):
+        self.key = key
+        self.common = common
+        # member -> fingerprint of its data
+        self.members = OrderedDict()
+
+    def __len__(self):
+        return len(self.members)
+
+    @property
+    def is_recurring(self):
+        return len(self.members) > 1
+
+    def fingerprint(self):
+        """Returns a hash of the common data and the data of the members."""
+        return fingerprint(
+            [self.key, sorted(self.members.items(), key=lambda item: str(item[0]))]
+        )
+
+
+class RecurringGrouper(object):
+    """
+    Groups events into recurring events by the fingerprint of their common
+    data in a single pass. add returns the group of the event as it grows, so
+    a group is a recurring event as soon as it has more than one member.
+
+    With a FingerprintStore, is_unchanged tells whether the super event of a
+    group was last built from the same members.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.groups = OrderedDict()
+        self.group_of = {}
+
+    def add(self, member, common, data=None):
+        """
+        Adds member to the group of common, moving it from the group it was
+        added to earlier, if any. data is the member data to fingerprint.
+        """
+        key = fingerprint(common)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = RecurringGroup(key, common)
+        previous = self.group_of.get(member)
+        if previous is not None and previous is not group:
+            logger.warning(
+                "%s moved from recurring group %s to %s"
+                % (member, previous.common, common)
+            )
+            del previous.members[member]
+            if not previous.members:
+                del self.groups[previous.key]
+        self.group_of[member] = group
+        if data is not None or member not in group.members:
+            group.members[member] = None if data is None else fingerprint(data)
+        return group
+
+    def set_data(self, member, data):
+        """Sets the data of a member added without it."""
+        group = self.group_of.get(member)
+        if group is not None:
+            group.members[member] = fingerprint(data)
+
+    def __iter__(self):
+        return iter(list(self.groups.values()))
+
+    def recurring(self):
+        return [group for group in self.groups.values() if group.is_recurring]
+
+    def is_unchanged(self, group, super_event):
+        if self.store is None:
+            return False
+        return self.store.is_unchanged(super_event, group.fingerprint())
+
+    def mark_saved(self, group, super_event):
+        if self.store is not None:
+            self.store.save(super_event, group.fingerprint())
+
+
+class FingerprintStore(object):
+    """
+    Fingerprints of the recurring events of a data source from earlier runs,
+    used to skip aggregating super events whose sub events have not changed.
+    """
+
+    def __init__(self, data_source):
+        self.fingerprints = dict(
+            RecurringEventFingerprint.objects.filter(
+                super_event__data_source=data_source
+            ).values_list("super_event_id", "fingerprint")
+        )
+
+    def is_unchanged(self, super_event, fingerprint):
+        return self.fingerprints.get(super_event.id) == fingerprint
+
+    def save(self, super_event, fingerprint):
+        if self.fingerprints.get(super_event.id) == fingerprint:
+            return
+        RecurringEventFingerprint.objects.update_or_create(
+            super_event=super_event, defaults={"fingerprint": fingerprint}
+        )
+        self.fingerprints[super_event.id] = fingerprint
@@ -1,8 +1,27 @@
 import logging
 
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .util import chunked
+
 # Per module logger
 logger = logging.getLogger(__name__)
 
+# Number of objects IdSyncher loads or deletes per query
+SYNC_CHUNK_SIZE = 1000
+
+
+def check_deletion_count(delete_count, total_count, force=False):
+    """
+    Refuses to delete more than a fifth of the synced objects, which usually
+    means that the source data is broken, unless forced.
+    """
+    if delete_count > 5 and delete_count > total_count * 0.2 and not force:
+        raise Exception(
+            f"Attempting to delete {delete_count} out of a total of {total_count} items"
+        )
+
 
 class ModelSyncher(object):
     def __init__(
@@ -55,14 +74,8 @@ class ModelSyncher(object):
             if self.check_deleted_func is not None and self.check_deleted_func(obj):
                 continue
             delete_list.append(obj)
-        if (
-            len(delete_list) > 5
-            and len(delete_list) > len(self.obj_dict) * 0.2
-            and not force
-        ):
-            raise Exception(
-                f"Attempting to delete {len(delete_list)} out of a total of {len(self.obj_dict)} items"
-            )
+        check_deletion_count(len(delete_list), len(self.obj_dict), force)
+        deleted_count = 0
         for obj in delete_list:
             if self.allow_deleting_func:
                 if not self.allow_deleting_func(obj):
@@ -76,3 +89,141 @@ class ModelSyncher(object):
                 deleted = True
             if deleted:
                 logger.info("Deleting object %s" % obj)
+                deleted_count += 1
+        return deleted_count
+
+
+def _fingerprint(modified):
+    return modified.timestamp() if modified is not None else None
+
+
+class IdSyncher(object):
+    """
+    Low-memory variant of ModelSyncher for large querysets.
+
+    Only the primary key and a last-modified fingerprint of each object in the
+    initial queryset are kept. Objects are loaded from the database when the
+    importer asks for them, and the objects left unmarked are soft deleted with
+    one UPDATE per chunk instead of one save per object. Objects modified by
+    someone else during the import are left alone.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        key_field,
+        delete_values,
+        after_delete=None,
+        include_deleted=False,
+        modified_field="last_modified_time",
+        chunk_size=SYNC_CHUNK_SIZE,
+    ):
+        """
+        :param queryset: The objects to sync
+        :param key_field: The field identifying the objects in the import, e.g. origin_id
+        :param delete_values: Field values that mark an object deleted, e.g.
+            {"deleted": True}. Objects that already have them are not deleted again.
+        :param after_delete: Called with the primary keys of each deleted chunk
+        :param include_deleted: Delete already deleted objects again, e.g. to remap them
+        :param modified_field: The last-modified timestamp field used as fingerprint
+        :param chunk_size: Number of objects loaded or deleted per query
+        """
+        self.queryset = queryset
+        self.model = queryset.model
+        self.key_field = key_field
+        self.delete_values = delete_values
+        self.after_delete = after_delete
+        self.include_deleted = include_deleted
+        self.modified_field = modified_field
+        self.chunk_size = chunk_size
+
+        # key -> (pk, fingerprint)
+        self.rows = {}
+        self.deleted_keys = set()
+        self.found = set()
+        self._loaded = {}
+        fields = list(delete_values)
+        for row in queryset.values_list(key_field, "pk", modified_field, *fields):
+            key, pk, modified = row[:3]
+            self.rows[key] = (pk, _fingerprint(modified))
+            if all(delete_values[f] == value for f, value in zip(fields, row[3:])):
+                self.deleted_keys.add(key)
+
+    def _prepare(self, obj):
+        obj._found = False
+        obj._changed = False
+        return obj
+
+    def load(self, obj_ids):
+        """
+        Loads the objects with the given ids in chunks, to be returned by get().
+        Replaces the previously loaded objects.
+        """
+        pks = [self.rows[obj_id][0] for obj_id in obj_ids if obj_id in self.rows]
+        self._loaded = {}
+        for chunk in chunked(pks, self.chunk_size):
+            for obj in self.queryset.filter(pk__in=chunk):
+                self._loaded[getattr(obj, self.key_field)] = self._prepare(obj)
+
+    def get(self, obj_id):
+        if obj_id not in self.rows:
+            return None
+        obj = self._loaded.get(obj_id)
+        if obj is None:
+            obj = self.queryset.filter(pk=self.rows[obj_id][0]).first()
+            if obj is not None:
+                self._prepare(obj)
+        return obj
+
+    def mark(self, obj):
+        self.found.add(getattr(obj, self.key_field))
+
+    def finish(self, force=False):
+        delete_list = [
+            obj_id
+            for obj_id in self.rows
+            if obj_id not in self.found
+            and (self.include_deleted or obj_id not in self.deleted_keys)
+        ]
+        check_deletion_count(
+            len(delete_list), len(self.rows.keys() | self.found), force
+        )
+        manager = self.model._base_manager
+        deleted_count = 0
+        for chunk in chunked(delete_list, self.chunk_size):
+            fingerprints = dict(self.rows[obj_id] for obj_id in chunk)
+            pks = [
+                pk
+                for pk, modified in manager.filter(pk__in=fingerprints).values_list(
+                    "pk", self.modified_field
+                )
+                if _fingerprint(modified) == fingerprints[pk]
+            ]
+            if len(pks) < len(fingerprints):
+                logger.warning(
+                    "%d objects modified during the import, not deleting them"
+                    % (len(fingerprints) - len(pks))
+                )
+            if not pks:
+                continue
+            values = dict(self.delete_values)
+            values[self.modified_field] = timezone.now()
+            manager.filter(pk__in=pks).update(**values)
+            deleted_count += len(pks)
+            # keep e.g. the search index in sync, like save() would, with the
+            # real rows so that signal receivers see complete objects
+            for pk, obj in manager.in_bulk(pks).items():
+                logger.info("Deleting object %s" % pk)
+                post_save.send(
+                    sender=self.model,
+                    instance=obj,
+                    created=False,
+                    update_fields=frozenset(values),
+                    raw=False,
+                    using=manager.db,
+                )
+            if self.after_delete is not None:
+                self.after_delete(pks)
+        self.found = set()
+        self._loaded = {}
+        return deleted_count
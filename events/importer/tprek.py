@@ -1,19 +1,17 @@
 # -*- coding: utf-8 -*-
 import logging
 
-import requests
-import requests_cache
 from django import db
 from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.core.management import call_command
 from django_orghierarchy.models import Organization
 
-from events.importer.util import replace_location
+from events.importer.util import chunked, replace_location
 from events.models import DataSource, Place
 
 from .base import Importer, register_importer
-from .sync import ModelSyncher
+from .sync import IdSyncher
 
 # Per module logger
 logger = logging.getLogger(__name__)
@@ -25,6 +23,7 @@ GK25_SRID = 3879
 @register_importer
 class TprekImporter(Importer):
     name = "tprek"
+    shared_data_source_ids = ("ahjo",)
     supported_languages = ["fi", "sv", "en"]
 
     def setup(self):
@@ -43,26 +42,20 @@ class TprekImporter(Importer):
         self.organization, _ = Organization.objects.get_or_create(
             defaults=defaults, **org_args
         )
-        if self.options.get("remap", None):
-            # This will prevent deletion checking, marking all deleted places as deleted
-            # again and remapping them accordingly! Otherwise, places already deleted
-            # will not be remapped by the syncher.
-            self.check_deleted = lambda x: False
 
     def pk_get(self, resource_name, res_id=None):
         url = "%s%s/" % (URL_BASE, resource_name)
         if res_id is not None:
             url = "%s%s/" % (url, res_id)
         logger.info("Fetching URL %s" % url)
-        resp = requests.get(url)
-        assert resp.status_code == 200
-        return resp.json()
+        return self.http.get_json(url)
 
-    def delete_and_replace(self, obj):
-        obj.deleted = True
-        obj.save(update_fields=["deleted"])
+    def replace_deleted(self, place_ids):
         # we won't stand idly by and watch tprek delete needed units willy-nilly without raising a ruckus!
-        if obj.events.count() > 0:
+        deleted_with_events = Place.objects.filter(
+            id__in=place_ids, deleted=True, events__isnull=False
+        ).distinct()
+        for obj in deleted_with_events:
             # try to replace by tprek and, failing that, matko
             replaced = replace_location(replace=obj, by_source="tprek")
             if not replaced:
@@ -82,15 +75,6 @@ class TprekImporter(Importer):
                     "Until then, events will stay mapped to the deleted location."
                     % (obj.id, str(obj))
                 )
-        return True
-
-    def mark_deleted(self, obj):
-        if obj.deleted:
-            return False
-        return self.delete_and_replace(obj)
-
-    def check_deleted(self, obj):
-        return obj.deleted
 
     @db.transaction.atomic
     def _import_unit(self, syncher, info):
@@ -179,9 +163,6 @@ class TprekImporter(Importer):
         syncher.mark(obj)
 
     def import_places(self):
-        if self.options["cached"]:
-            requests_cache.install_cache("tprek")
-
         queryset = Place.objects.filter(data_source=self.data_source)
         if self.options.get("single", None):
             obj_id = self.options["single"]
@@ -189,17 +170,26 @@ class TprekImporter(Importer):
             queryset = queryset.filter(id=obj_id)
         else:
             logger.info("Loading units...")
-            obj_list = self.pk_get("unit")
+            obj_list = self.fetch_unless_unchanged(lambda: self.pk_get("unit"))
+            if obj_list is None:
+                return
             logger.info("%s units loaded" % len(obj_list))
-        syncher = ModelSyncher(
+        remap = self.options.get("remap", False)
+        # with remap, places already deleted are deleted and remapped again
+        syncher = IdSyncher(
             queryset,
-            lambda obj: obj.origin_id,
-            delete_func=self.mark_deleted,
-            check_deleted_func=self.check_deleted,
+            "origin_id",
+            {"deleted": True},
+            after_delete=self.replace_deleted,
+            include_deleted=remap,
         )
-        for idx, info in enumerate(obj_list):
-            if idx and (idx % 1000) == 0:
-                logger.info("%s units processed" % idx)
-            self._import_unit(syncher, info)
-
-        syncher.finish(self.options.get("remap", False))
+        count = 0
+        for batch in chunked(obj_list, syncher.chunk_size):
+            syncher.load(str(info["id"]) for info in batch)
+            for info in batch:
+                self._import_unit(syncher, info)
+            count += len(batch)
+            logger.info("%s units processed" % count)
+
+        self.report.count("deleted", syncher.finish(remap))
+        self.http.mark_processed()
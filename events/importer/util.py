@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import itertools
 import logging
 import re
 
@@ -8,6 +9,7 @@ from django.core.validators import URLValidator, ValidationError
 from django.utils.translation.trans_real import activate, deactivate
 from langdetect import detect
 from langdetect.lang_detect_exception import LangDetectException
+from lxml import etree
 
 from events.models import Place
 
@@ -111,6 +113,66 @@ def unicodetext(item):
     return clean_text(item.text, strip_newlines=True)
 
 
+def iterparse_elements(source, tag):
+    """
+    Yields the tag elements of an XML document (a file name or file object)
+    one at a time as soon as they have been parsed. Each element is detached
+    from the document along with anything preceding it, so memory use does
+    not grow with the size of the document as long as the caller does not
+    keep the elements around.
+    """
+    for _, element in etree.iterparse(source, events=("end",), tag=tag):
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+            parent.remove(element)
+        yield element
+
+
+def merge_by_id(streams, get_id):
+    """
+    Merges per-language item streams by item id.
+
+    :param streams: (lang, iterable) pairs, in the order the languages should be
+        applied in
+    :param get_id: Function returning the id of an item
+    :return: Yields (id, [(lang, item), ...]) with the items in stream order. An id
+        is yielded as soon as it has been seen in every stream, so only the items
+        the streams disagree on are kept in memory when the feeds list their items
+        in the same order. Ids missing from some streams are yielded last.
+    """
+    langs = [lang for lang, _ in streams]
+    iterators = [(lang, iter(items)) for lang, items in streams]
+    pending = {}
+    while iterators:
+        for lang, iterator in list(iterators):
+            item = next(iterator, None)
+            if item is None:
+                iterators.remove((lang, iterator))
+                continue
+            item_id = get_id(item)
+            items = pending.setdefault(item_id, {})
+            items[lang] = item
+            if len(items) == len(langs):
+                del pending[item_id]
+                yield item_id, [(lang, items[lang]) for lang in langs]
+    for item_id, items in pending.items():
+        yield item_id, [(lang, items[lang]) for lang in langs if lang in items]
+
+
+def chunked(iterable, size):
+    """
+    Yields lists of at most size items from iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def reduced_text(text):
     return re.sub(r"\W", "", text, flags=re.U).lower()
 
@@ -1,18 +1,21 @@
 # -*- coding: utf-8 -*-
 import logging
+import re
 
 import rdflib
-import requests
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django_orghierarchy.models import Organization
+from modeltranslation.translator import translator
 from rdflib import RDF
 from rdflib.namespace import DCTERMS, OWL, SKOS
+from rdflib.plugins.parsers.notation3 import BadSyntax
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
 
 from events.models import BaseModel, DataSource, Keyword, KeywordLabel, Language
 
 from .base import Importer, register_importer
-from .sync import ModelSyncher
-from .util import active_language
+from .sync import check_deletion_count
+from .util import chunked
 
 # Per module logger
 logger = logging.getLogger(__name__)
@@ -20,6 +23,16 @@ logger = logging.getLogger(__name__)
 yso = rdflib.Namespace("http://www.yso.fi/onto/yso/")
 URL = "http://finto.fi/rest/v1/yso/data"
 
+AGGREGATE_CONCEPT_SCHEME = rdflib.term.URIRef(yso + "aggregateconceptscheme")
+
+# Number of rows inserted or updated per query
+BATCH_SIZE = 1000
+
+# Minimum number of lines parsed at a time from a Turtle dump
+TURTLE_CHUNK_LINES = 5000
+
+TURTLE_DIRECTIVE_RE = re.compile(r"(@prefix|@base|PREFIX|BASE)\s")
+
 YSO_DEPRECATED_MAPS = {
     "yso:p12262": "yso:p4354",  # lapset (kooste) -> lapset (ikään liittyvä rooli), missing YSO replacement
     "yso:p21160": "yso:p8113",  # kirjallisuus (erikoisala) -> kirjallisuus (taidelajit), wrong YSO replacement
@@ -58,34 +71,115 @@ def get_subject(yso_id):
     return rdflib.term.URIRef(yso + yso_id.split(":")[-1])
 
 
-def is_deprecated(graph, subject):
-    return (subject, OWL.deprecated, None) in graph
-
-
-def is_aggregate_concept(graph, subject):
-    return (
-        subject,
-        SKOS.inScheme,
-        rdflib.term.URIRef(yso + "aggregateconceptscheme"),
-    ) in graph
-
-
-def get_replacement(graph, subject):
-    for subject, verb, object in graph.triples((subject, DCTERMS.isReplacedBy, None)):
-        return object
+class YsoConcept(object):
+    """
+    The parts of a YSO concept the importer needs.
+    """
+
+    __slots__ = (
+        "is_concept",
+        "names",
+        "alt_labels",
+        "deprecated",
+        "replaced_by",
+        "aggregate",
+    )
+
+    def __init__(self):
+        self.is_concept = False
+        # language -> preferred label
+        self.names = {}
+        # (label, language) pairs
+        self.alt_labels = set()
+        self.deprecated = False
+        self.replaced_by = None
+        self.aggregate = False
+
+
+class ConceptCollector(object):
+    """
+    Triple sink that collects YsoConcepts keyed by subject URI, so that the
+    triples can be thrown away as soon as they have been parsed.
+    """
+
+    def __init__(self):
+        self.concepts = {}
+
+    def _get(self, subject):
+        concept = self.concepts.get(str(subject))
+        if concept is None:
+            concept = self.concepts[str(subject)] = YsoConcept()
+        return concept
+
+    def triple(self, subject, predicate, object):
+        if predicate == RDF.type:
+            if object == SKOS.Concept:
+                self._get(subject).is_concept = True
+        elif predicate == SKOS.prefLabel:
+            if object.language is not None:
+                self._get(subject).names[object.language] = str(object)
+        elif predicate == SKOS.altLabel:
+            self._get(subject).alt_labels.add((str(object), object.language))
+        elif predicate == OWL.deprecated:
+            self._get(subject).deprecated = True
+        elif predicate == DCTERMS.isReplacedBy:
+            concept = self._get(subject)
+            if concept.replaced_by is None:
+                concept.replaced_by = str(object)
+        elif predicate == SKOS.inScheme:
+            if object == AGGREGATE_CONCEPT_SCHEME:
+                self._get(subject).aggregate = True
+
+
+def parse_ntriples(lines, sink):
+    parser = W3CNTriplesParser(sink)
+    for line in lines:
+        parser.parsestring(line)
+
+
+def parse_turtle(lines, sink, chunk_lines=TURTLE_CHUNK_LINES):
+    """
+    Parses a Turtle document incrementally. The statements are parsed at least
+    chunk_lines lines at a time into a throwaway graph, splitting the document
+    at lines that end a statement.
+    """
+    directives = []
+    chunk = []
+
+    def flush():
+        graph = rdflib.Graph()
+        graph.parse(data="\n".join(directives + chunk), format="turtle")
+        for triple in graph:
+            sink.triple(*triple)
+
+    for line in lines:
+        if TURTLE_DIRECTIVE_RE.match(line):
+            directives.append(line)
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_lines and line.rstrip().endswith("."):
+            try:
+                flush()
+            except BadSyntax:
+                # the statement goes on, e.g. in a multi-line literal
+                continue
+            chunk = []
+    if chunk:
+        flush()
 
 
-def deprecate_and_replace(graph, keyword):
+def deprecate_and_replace(concepts, keyword):
     if keyword.id in YSO_DEPRECATED_MAPS:
         # these ones need no further processing
         return keyword.deprecate()
-    replacement_subject = get_replacement(graph, get_subject(keyword.id))
+    concept = concepts.get(str(get_subject(keyword.id)))
+    replacement_subject = concept.replaced_by if concept else None
     new_keyword = None
     if replacement_subject:
         try:
             # not all the replacements are valid keywords. yso has some data quality issues
             new_keyword = Keyword.objects.get(id=get_yso_id(replacement_subject))
-        except Keyword.DoesNotExist:
+        except (Keyword.DoesNotExist, ValidationError):
             pass
     if new_keyword:
         logger.info("Keyword %s replaced by %s" % (keyword, new_keyword))
@@ -109,6 +203,7 @@ def deprecate_and_replace(graph, keyword):
 @register_importer
 class YsoImporter(Importer):
     name = "yso"
+    shared_data_source_ids = ("hy",)
     supported_languages = ["fi", "sv", "en"]
 
     def setup(self):
@@ -129,196 +224,220 @@ class YsoImporter(Importer):
 
     def import_keywords(self):
         logger.info("Importing YSO keywords")
-        graph = self.load_graph_into_memory(URL)
-        self.save_keywords(graph)
-
-    def load_graph_into_memory(self, url):
-        logger.debug("Fetching %s" % url)
-        resp = requests.get(url)
-        assert resp.status_code == 200
+        logger.debug("Fetching %s" % URL)
+        resp = self.fetch_unless_unchanged(lambda: self.http.get(URL, stream=True))
+        if resp is None:
+            return
+        concepts = self.parse_concepts(resp)
+        self.save_keywords(concepts)
+        self.http.mark_processed()
+
+    def parse_concepts(self, resp):
+        """
+        Parses an N-Triples or Turtle response line by line into YsoConcepts,
+        keyed by subject URI.
+        """
         resp.encoding = "UTF-8"
-        graph = rdflib.Graph()
+        lines = resp.iter_lines(decode_unicode=True)
+        collector = ConceptCollector()
         logger.debug("Parsing RDF")
-        graph.parse(data=resp.text, format="turtle")
-        return graph
-
-    def save_keywords(self, graph):
+        if "n-triples" in resp.headers.get("Content-Type", ""):
+            parse_ntriples(lines, collector)
+        else:
+            parse_turtle(lines, collector)
+        return collector.concepts
+
+    def save_keywords(self, concepts):
+        """
+        Diffs the concepts against the keywords and keyword labels in the
+        database, and writes only the differences in bulk.
+        """
         logger.debug("Saving data")
-
-        bulk_mode = False
-        if bulk_mode:
-            assert not Keyword.objects.filter(data_source=self.data_source).exists()
-        if not bulk_mode:
-            queryset = KeywordLabel.objects.all()
-            label_syncher = ModelSyncher(
-                queryset,
-                lambda obj: (obj.name, obj.language_id),
-                delete_func=lambda obj: obj.delete(),
+        keywords = {}
+        for subject, concept in concepts.items():
+            if not concept.is_concept:
+                continue
+            try:
+                keywords[get_yso_id(subject)] = concept
+            except ValidationError as e:
+                logger.error(e)
+
+        label_ids = self.save_alt_labels(keywords)
+
+        # manually add new keywords to deprecated ones
+        for old_id, new_id in YSO_DEPRECATED_MAPS.items():
+            try:
+                old_keyword = Keyword.objects.get(id=old_id)
+                new_keyword = Keyword.objects.get(id=new_id)
+            except ObjectDoesNotExist:
+                continue
+            logger.info(
+                "Manually mapping events with %s to %s"
+                % (str(old_keyword), str(new_keyword))
             )
-
-        keyword_labels = {}
-        labels_to_create = set()
-        for subject, label in graph.subject_objects(SKOS.altLabel):
-            if (subject, RDF.type, SKOS.Concept) in graph:
-                try:
-                    yid = get_yso_id(subject)
-                    if bulk_mode:
-                        if label.language is not None:
-                            language = label.language
-                            if label.language == "se":
-                                # YSO doesn't contain se, assume an error.
-                                language = "sv"
-                            labels_to_create.add((str(label), language))
-                            keyword_labels.setdefault(yid, []).append(label)
-                    else:
-                        label = self.save_alt_label(label_syncher, graph, label)
-                        if label:
-                            keyword_labels.setdefault(yid, []).append(label)
-                except ValidationError as e:
-                    logger.error(e)
-
-        if bulk_mode:
-            KeywordLabel.objects.bulk_create(
+            new_keyword.events.add(*old_keyword.events.all())
+            new_keyword.audience_events.add(*old_keyword.audience_events.all())
+
+        seen = self.save_keyword_rows(keywords)
+        self.save_keyword_alt_labels(keywords, label_ids)
+        self.deprecate_missing_keywords(concepts, seen)
+
+    def save_alt_labels(self, keywords):
+        """
+        Creates the missing alt labels of the concepts and deletes the labels
+        no concept has anymore.
+
+        :return: dict of (name, language) -> KeywordLabel id
+        """
+        languages = set(Language.objects.values_list("id", flat=True))
+        labels = set()
+        for concept in keywords.values():
+            for name, language in concept.alt_labels:
+                if language is None:
+                    logger.error("Error: {} has no language".format(name))
+                elif language in languages:
+                    labels.add((name, language))
+
+        label_ids = {
+            (name, language): label_id
+            for label_id, name, language in KeywordLabel.objects.values_list(
+                "id", "name", "language_id"
+            )
+        }
+        stale = [key for key in label_ids if key not in labels]
+        check_deletion_count(len(stale), len(label_ids), self.options["force"])
+        for batch in chunked(stale, BATCH_SIZE):
+            KeywordLabel.objects.filter(
+                id__in=[label_ids.pop(key) for key in batch]
+            ).delete()
+
+        new = sorted(labels - label_ids.keys())
+        for batch in chunked(new, BATCH_SIZE):
+            created = KeywordLabel.objects.bulk_create(
                 [
                     KeywordLabel(name=name, language_id=language)
-                    for name, language in labels_to_create
+                    for name, language in batch
                 ]
             )
-        else:
-            label_syncher.finish(force=self.options["force"])
-
-        if bulk_mode:
-            self.save_keywords_in_bulk(graph)
-            self.save_keyword_label_relationships_in_bulk(keyword_labels)
-
-        if not bulk_mode:
-            # manually add new keywords to deprecated ones
-            for old_id, new_id in YSO_DEPRECATED_MAPS.items():
-                try:
-                    old_keyword = Keyword.objects.get(id=old_id)
-                    new_keyword = Keyword.objects.get(id=new_id)
-                except ObjectDoesNotExist:
-                    continue
-                logger.info(
-                    "Manually mapping events with %s to %s"
-                    % (str(old_keyword), str(new_keyword))
-                )
-                new_keyword.events.add(*old_keyword.events.all())
-                new_keyword.audience_events.add(*old_keyword.audience_events.all())
-
-            queryset = Keyword.objects.filter(
-                data_source=self.data_source, deprecated=False
+            label_ids.update(
+                {(label.name, label.language_id): label.id for label in created}
             )
-            syncher = ModelSyncher(
-                queryset,
-                lambda keyword: keyword.id,
-                delete_func=lambda obj: deprecate_and_replace(graph, obj),
-                check_deleted_func=lambda obj: obj.deprecated,
+        logger.info("%d keyword labels created, %d deleted" % (len(new), len(stale)))
+        return label_ids
+
+    def save_keyword_rows(self, keywords):
+        """
+        Creates and updates the keywords of the concepts that are not
+        deprecated.
+
+        :return: Set of the ids of the keywords in the import
+        """
+        name_fields = {
+            field.language: field.name
+            for field in translator.get_options_for_model(Keyword).fields["name"]
+        }
+        existing = {
+            row["id"]: row
+            for row in Keyword.objects.filter(data_source=self.data_source).values(
+                "id",
+                "publisher_id",
+                "deprecated",
+                "replaced_by_id",
+                *name_fields.values(),
             )
-            save_set = set()
-            for subject in graph.subjects(RDF.type, SKOS.Concept):
-                try:
-                    self.save_keyword(syncher, graph, subject, keyword_labels, save_set)
-                except ValidationError as e:
-                    logger.error(e)
-            syncher.finish(force=self.options["force"])
-
-    def save_keyword_label_relationships_in_bulk(self, keyword_labels):
-        yids = Keyword.objects.all().values_list("id", flat=True)
-        labels = KeywordLabel.objects.all().values("id", "name", "language")
-        label_id_from_name_and_language = {
-            (l["name"], l["language"]): l["id"] for l in labels
         }
-        KeywordAltLabels = Keyword.alt_labels.through
-        relations_to_create = []
-        for yid, url_labels in keyword_labels.items():
-            if yid not in yids:
-                continue
-            for label in url_labels:
-                params = dict(
-                    keyword_id=yid,
-                    keywordlabel_id=(
-                        label_id_from_name_and_language.get(
-                            (str(label), label.language)
-                        )
-                    ),
-                )
-                if params["keyword_id"] and params["keywordlabel_id"]:
-                    relations_to_create.append(KeywordAltLabels(**params))
-        KeywordAltLabels.objects.bulk_create(relations_to_create)
 
-    def create_keyword(self, graph, subject):
-        if is_deprecated(graph, subject):
-            return
-        keyword = Keyword(data_source=self.data_source)
-        keyword._created = True
-        keyword.id = get_yso_id(subject)
-        keyword.created_time = BaseModel.now()
-        keyword.aggregate = is_aggregate_concept(graph, subject)
-        self.update_keyword(keyword, graph, subject)
-        return keyword
-
-    def update_keyword(self, keyword, graph, subject):
-        for _, literal in graph.preferredLabel(subject):
-            with active_language(literal.language):
-                if keyword.name != str(literal):
-                    logger.debug(
-                        "(re)naming keyword " + keyword.name + " to " + str(literal)
+        seen = set()
+        to_create = []
+        to_update = []
+        for yid, concept in keywords.items():
+            if concept.deprecated:
+                continue
+            seen.add(yid)
+            names = {
+                name_fields[language]: name
+                for language, name in concept.names.items()
+                if language in name_fields
+            }
+            row = existing.get(yid)
+            if row is None:
+                to_create.append(
+                    Keyword(
+                        id=yid,
+                        data_source=self.data_source,
+                        publisher=self.organization,
+                        aggregate=concept.aggregate,
+                        **names,
                     )
-                    keyword.name = str(literal)
-                    keyword._changed = True
-                    keyword.last_modified_time = BaseModel.now()
-
-    def save_keywords_in_bulk(self, graph):
-        keywords = []
-        for subject in graph.subjects(RDF.type, SKOS.Concept):
-            keyword = self.create_keyword(graph, subject)
-            if keyword:
-                keywords.append(keyword)
-        Keyword.objects.bulk_create(keywords, batch_size=1000)
-
-    def save_alt_label(self, syncher, graph, label):
-        label_text = str(label)
-        if label.language is None:
-            logger.error("Error: {} has no language".format(label))
-            return None
-        label_object = syncher.get((label_text, str(label.language)))
-        if label_object is None:
-            language = Language.objects.get(id=label.language)
-            label_object = KeywordLabel(name=label_text, language=language)
-            label_object._changed = True
-            label_object._created = True
-        else:
-            label_object._created = False
-        if label_object._created:
-            # Since there are duplicates, only save & mark them once.
-            label_object.save()
-
-        if not getattr(label_object, "_found", False):
-            syncher.mark(label_object)
-        return label_object
-
-    def save_keyword(self, syncher, graph, subject, keyword_labels, save_set):
-        if is_deprecated(graph, subject):
-            return
-        keyword = syncher.get(get_yso_id(subject))
-        if not keyword:
-            keyword = self.create_keyword(graph, subject)
-            if not keyword:
-                return
-        else:
-            keyword._created = False
-            self.update_keyword(keyword, graph, subject)
-
-        if keyword.publisher_id != self.organization.id:
-            keyword.publisher = self.organization
-            keyword._changed = True
-        if keyword._changed:
-            keyword.save()
+                )
+                continue
+            changes = {
+                field: name for field, name in names.items() if row[field] != name
+            }
+            if row["publisher_id"] != self.organization.id:
+                changes["publisher_id"] = self.organization.id
+            if row["deprecated"]:
+                # the concept is back in use
+                changes.update(deprecated=False, replaced_by_id=None)
+            if changes:
+                row.update(changes)
+                to_update.append(Keyword(last_modified_time=BaseModel.now(), **row))
+
+        for batch in chunked(to_create, BATCH_SIZE):
+            Keyword.objects.bulk_create(batch)
+        for batch in chunked(to_update, BATCH_SIZE):
+            # name is the untranslated column, kept in sync like in save()
+            Keyword.objects.bulk_update(
+                batch,
+                ["name"]
+                + list(name_fields.values())
+                + ["publisher", "deprecated", "replaced_by", "last_modified_time"],
+            )
+        logger.info(
+            "%d keywords created, %d updated" % (len(to_create), len(to_update))
+        )
+        return seen
 
-        alt_labels = keyword_labels.get(get_yso_id(subject), [])
-        keyword.alt_labels.add(*alt_labels)
+    def save_keyword_alt_labels(self, keywords, label_ids):
+        """
+        Adds the missing alt label relations of the keywords. Like before,
+        relations are never removed here, only with the labels themselves.
+        """
+        KeywordAltLabels = Keyword.alt_labels.through
+        existing = set(
+            KeywordAltLabels.objects.filter(
+                keyword__data_source=self.data_source
+            ).values_list("keyword_id", "keywordlabel_id")
+        )
+        relations = set()
+        for yid, concept in keywords.items():
+            if concept.deprecated:
+                continue
+            for key in concept.alt_labels:
+                label_id = label_ids.get(key)
+                if label_id is not None and (yid, label_id) not in existing:
+                    relations.add((yid, label_id))
+        for batch in chunked(sorted(relations), BATCH_SIZE):
+            KeywordAltLabels.objects.bulk_create(
+                [
+                    KeywordAltLabels(keyword_id=yid, keywordlabel_id=label_id)
+                    for yid, label_id in batch
+                ]
+            )
 
-        if not getattr(keyword, "_found", False):
-            syncher.mark(keyword)
-        return keyword
+    def deprecate_missing_keywords(self, concepts, seen):
+        """
+        Deprecates (and replaces, if possible) the keywords that are not in the
+        import anymore or are deprecated in it.
+        """
+        active = set(
+            Keyword.objects.filter(
+                data_source=self.data_source, deprecated=False
+            ).values_list("id", flat=True)
+        )
+        missing = sorted(active - seen)
+        check_deletion_count(len(missing), len(active | seen), self.options["force"])
+        for yid in missing:
+            keyword = Keyword.objects.get(id=yid)
+            if deprecate_and_replace(concepts, keyword):
+                logger.info("Deleting object %s" % keyword)
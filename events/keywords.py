@@ -1,11 +1,32 @@
 import re
 import string
+import time
+from functools import reduce
+from operator import or_
 
 from django.conf import settings
 from django.contrib.postgres.search import SearchQuery, TrigramSimilarity
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Greatest
 from rest_framework.exceptions import ParseError
 
-from events.models import KeywordLabel
+from events.models import Keyword, KeywordLabel
+
+# A lexeme of a tsvector or tsquery as output by Postgres, e.g. 'lapsi':1,3A
+LEXEME_RE = re.compile(r"'((?:[^'\\]|''|\\.)*)'(?::([0-9A-D,]+))?")
+# The followed by operators of a tsquery, <-> and <N>
+PHRASE_OPERATOR_RE = re.compile(r"<(-|\d+)>")
+# Words as pg_trgm sees them
+TRIGRAM_WORD_RE = re.compile(r"[^\W_]+")
+# Keywords more similar than this match free text
+KEYWORD_SIMILARITY = 0.2
+# Seconds to remember the keywords matching a text
+SIMILAR_KEYWORDS_TIMEOUT = 60
+SIMILAR_KEYWORDS_MAX_TEXTS = 1000
+
+# text -> (expiry time, matches)
+_similar_keywords = {}
 
 
 class KeywordMatcher(object):
@@ -78,3 +99,285 @@ class KeywordMatcher(object):
             return keywords
         else:
             return None
+
+
+def _query_similar_keywords(text):
+    # no need to search English if there are accented letters
+    langs = ["fi", "sv"] if re.search("[\u00C0-\u00FF]", text) else ["fi", "sv", "en"]
+    # the % operator can use the trigram indexes of the name columns
+    prefilter = reduce(
+        or_, (Q(**{f"name_{lang}__trigram_similar": text}) for lang in langs)
+    )
+    queryset = (
+        Keyword.objects.filter(prefilter)
+        .annotate(
+            simile=Greatest(
+                *[TrigramSimilarity(f"name_{lang}", text) for lang in langs]
+            )
+        )
+        .filter(simile__gt=KEYWORD_SIMILARITY)
+        .order_by("-simile", "id")
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+            [str(KEYWORD_SIMILARITY)],
+        )
+        return list(queryset.values_list("id", "simile"))
+
+
+def similar_keywords(text):
+    """
+    Returns (keyword id, similarity) of the keywords whose name is similar to
+    text, most similar first. The matches are remembered for
+    SIMILAR_KEYWORDS_TIMEOUT seconds, as typeahead repeats the same texts.
+    """
+    now = time.monotonic()
+    memo = _similar_keywords.get(text)
+    if memo is not None and memo[0] > now:
+        return memo[1]
+    matches = _query_similar_keywords(text)
+    if len(_similar_keywords) >= SIMILAR_KEYWORDS_MAX_TEXTS:
+        _similar_keywords.clear()
+    _similar_keywords[text] = (now + SIMILAR_KEYWORDS_TIMEOUT, matches)
+    return matches
+
+
+def clear_similar_keywords():
+    _similar_keywords.clear()
+
+
+def similar_keywords_changed(sender, **kwargs):
+    # the remembered matches may include or miss the saved keyword
+    clear_similar_keywords()
+
+
+def _unescape_lexeme(lexeme):
+    return re.sub(r"''|\\(.)", lambda m: m.group(1) or "'", lexeme)
+
+
+def parse_tsvector(value):
+    """
+    Returns the lexemes of a tsvector and their positions as {lexeme: [position]}.
+    """
+    lexemes = {}
+    for lexeme, positions in LEXEME_RE.findall(value or ""):
+        lexemes[_unescape_lexeme(lexeme)] = [
+            int(p.rstrip("ABCD")) for p in positions.split(",") if positions
+        ]
+    return lexemes
+
+
+def parse_tsquery(value):
+    """
+    Parses a tsquery made by plainto_tsquery, i.e. lexemes joined by & (and) and
+    <-> or <N> (followed by), into phrases of (offset, lexeme) pairs that must
+    all match.
+    """
+    phrases = []
+    for part in (value or "").split(" & "):
+        phrase = []
+        offset = 0
+        for i, token in enumerate(PHRASE_OPERATOR_RE.split(part)):
+            if i % 2:
+                offset += 1 if token == "-" else int(token)
+                continue
+            match = LEXEME_RE.search(token)
+            if match:
+                phrase.append((offset, _unescape_lexeme(match.group(1))))
+        if phrase:
+            phrases.append(phrase)
+    return phrases
+
+
+def trigrams(text):
+    """
+    Returns the trigrams of text the way pg_trgm computes them.
+    """
+    result = set()
+    for word in TRIGRAM_WORD_RE.findall(text.lower()):
+        padded = "  " + word + " "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def trigram_similarity(a, b):
+    """
+    pg_trgm similarity of two trigram sets.
+    """
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class InMemoryKeywordMatcher(object):
+    """
+    In-process KeywordMatcher for importers, returning the same best matches
+    without a database round trip per lookup.
+
+    The keyword labels are loaded once, along with the lexemes Postgres has
+    stored in their search vectors, and indexed by lexeme. Phrases are
+    normalized with plainto_tsquery in batches (see prime()), the candidates
+    are ranked by trigram similarity in Python and the results are memoized.
+    """
+
+    def __init__(self, keywords=None):
+        """
+        :param keywords: Optional dict of already loaded keywords by id
+        """
+        self.search_languages = settings.FULLTEXT_SEARCH_LANGUAGES
+        self.keywords = dict(keywords or {})
+        # language -> label id -> {lexeme: [position]}
+        self.vectors = {}
+        # language -> lexeme -> label ids
+        self.lexeme_index = {}
+        # label id -> trigrams of the label name
+        self.label_trigrams = {}
+        # label id -> keyword ids
+        self.label_keywords = {}
+        # (language, text) -> tsquery phrases
+        self.queries = {}
+        # (text, language) -> keywords
+        self.matches = {}
+
+        for language in self.search_languages:
+            field = f"search_vector_{language}"
+            vectors = self.vectors[language] = {}
+            index = self.lexeme_index[language] = {}
+            labels = KeywordLabel.objects.filter(**{f"{field}__isnull": False})
+            for label_id, name, vector in labels.values_list("id", "name", field):
+                vectors[label_id] = parse_tsvector(vector)
+                self.label_trigrams[label_id] = trigrams(name)
+                for lexeme in vectors[label_id]:
+                    index.setdefault(lexeme, set()).add(label_id)
+
+        relations = Keyword.alt_labels.through.objects.order_by("keyword_id")
+        for label_id, keyword_id in relations.values_list(
+            "keywordlabel_id", "keyword_id"
+        ):
+            self.label_keywords.setdefault(label_id, []).append(keyword_id)
+
+    def _get_languages(self, language):
+        if language:
+            if language not in self.search_languages.keys():
+                raise ParseError(
+                    f"{language} not supported. Supported options are: {' '.join(self.search_languages.keys())}"
+                )
+            return [language]
+        return list(self.search_languages.keys())
+
+    def _split(self, text):
+        return re.split(f"[{string.punctuation} ]", text)
+
+    def _normalize(self, texts, language):
+        missing = [text for text in set(texts) if (language, text) not in self.queries]
+        if not missing:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT t, plainto_tsquery(%s::regconfig, t)::text FROM unnest(%s) AS t",
+                [self.search_languages[language], missing],
+            )
+            for text, query in cursor.fetchall():
+                self.queries[(language, text)] = parse_tsquery(query)
+
+    def _matches_phrase(self, lexemes, phrase):
+        (_, first), rest = phrase[0], phrase[1:]
+        if not rest:
+            return first in lexemes
+        return any(
+            all(start + offset in lexemes[lexeme] for offset, lexeme in rest)
+            for start in lexemes[first]
+        )
+
+    def _full_text_matching(self, text, languages):
+        text_trigrams = trigrams(text)
+        contestants = {}
+        for language in languages:
+            phrases = self.queries[(language, text)]
+            if not phrases:
+                continue
+            index = self.lexeme_index[language]
+            candidates = None
+            for phrase in phrases:
+                for _, lexeme in phrase:
+                    ids = index.get(lexeme, set())
+                    candidates = ids if candidates is None else candidates & ids
+            best = None
+            for label_id in sorted(candidates):
+                lexemes = self.vectors[language][label_id]
+                if not all(self._matches_phrase(lexemes, p) for p in phrases):
+                    continue
+                similarity = trigram_similarity(
+                    text_trigrams, self.label_trigrams[label_id]
+                )
+                if best is None or similarity > best[0]:
+                    best = (similarity, label_id)
+            # same as in KeywordMatcher, a later language wins a tie
+            if best:
+                contestants[best[0]] = best[1]
+        if contestants:
+            return contestants[max(contestants.keys())]
+        return None
+
+    def _label_match(self, text, languages):
+        label_id = self._full_text_matching(text, languages)
+        if label_id is not None:
+            return [label_id]
+        texts = self._split(text)
+        if len(texts) > 1:
+            label_ids = []
+            for word in texts:
+                label_ids.extend(self._label_match(word, languages) or [])
+            return label_ids or None
+        return None
+
+    def _load_keywords(self, keyword_ids):
+        missing = set(keyword_ids) - self.keywords.keys()
+        if missing:
+            self.keywords.update(Keyword.objects.in_bulk(missing))
+
+    def _keyword_ids(self, label_ids):
+        return [
+            keyword_id
+            for label_id in label_ids
+            for keyword_id in self.label_keywords.get(label_id, [])
+        ]
+
+    def prime(self, texts, language=None):
+        """
+        Normalizes the texts and loads the keywords they match with a few
+        queries, so that matching them later needs no database access.
+        """
+        languages = self._get_languages(language)
+        texts = set(texts)
+        all_texts = set(texts)
+        for text in texts:
+            all_texts.update(self._split(text))
+        for lang in languages:
+            self._normalize(all_texts, lang)
+        keyword_ids = []
+        for text in texts:
+            keyword_ids.extend(
+                self._keyword_ids(self._label_match(text, languages) or [])
+            )
+        self._load_keywords(keyword_ids)
+
+    def match(self, text, language=None):
+        key = (text, language)
+        if key not in self.matches:
+            languages = self._get_languages(language)
+            for lang in languages:
+                self._normalize([text] + self._split(text), lang)
+            label_ids = self._label_match(text, languages)
+            if label_ids:
+                keyword_ids = self._keyword_ids(label_ids)
+                self._load_keywords(keyword_ids)
+                self.matches[key] = [
+                    self.keywords[k] for k in keyword_ids if k in self.keywords
+                ]
+            else:
+                self.matches[key] = None
+        keywords = self.matches[key]
+        return list(keywords) if keywords is not None else None
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIRequestFactory
+
+from events.api import EventViewSet
+
+SERIALIZERS = {
+    "drf": ListSerializer.to_representation,
+    "compiled": lambda serializer, events: serializer.to_representation(events),
+}
+
+
+def get_list_view(version, query_string):
+    """Returns an event list view initialized for an anonymous GET request."""
+    request = APIRequestFactory().get("/%s/event/?%s" % (version, query_string))
+    view = EventViewSet(action_map={"get": "list"})
+    view.args = ()
+    view.kwargs = {"version": version}
+    view.format_kwarg = None
+    view.headers = {}
+    view.request = view.initialize_request(request)
+    view.initial(view.request)
+    return view
+
+
+class Command(BaseCommand):
+    help = "Compare the throughput of the DRF and compiled event list serializers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, dest="count", default=1000)
+        parser.add_argument("--repeat", type=int, dest="repeat", default=5)
+        parser.add_argument("--version", dest="version", default="v1")
+        parser.add_argument(
+            "--query",
+            dest="query",
+            default="",
+            help="Query string of the listing, e.g. include=location,keywords",
+        )
+
+    def handle(self, *args, **options):
+        view = get_list_view(options["version"], options["query"])
+        queryset = view.filter_queryset(view.get_queryset())
+        events = list(queryset[: options["count"]])
+        self.stdout.write("%d events" % len(events))
+        outputs = {}
+        for name, serialize in SERIALIZERS.items():
+            timings = []
+            for _ in range(options["repeat"]):
+                # a fresh context, so that included objects are serialized again
+                serializer = view.get_serializer(events, many=True)
+                start = time.perf_counter()
+                outputs[name] = serialize(serializer, events)
+                timings.append(time.perf_counter() - start)
+            median = statistics.median(timings)
+            self.stdout.write(
+                "  %-10s %8.1f ms median %8.0f events/s"
+                % (name, median * 1000, len(events) / median if median else 0)
+            )
+        if outputs["drf"] != outputs["compiled"]:
+            self.stderr.write("The serializers disagree on the output")
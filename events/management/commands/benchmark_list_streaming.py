@@ -0,0 +1,86 @@
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from events.api import EventViewSet, ImageViewSet
+
+ENDPOINTS = {"event": EventViewSet, "image": ImageViewSet}
+
+
+def get_response(view, version, url, host):
+    request = APIRequestFactory().get(url, HTTP_HOST=host)
+    response = view(request, version=version)
+    if response.status_code != 200:
+        raise CommandError("%s returned %d" % (url, response.status_code))
+    if response.streaming:
+        return response, iter(response.streaming_content)
+    response.render()
+    return response, iter([response.content])
+
+
+def measure(view, version, url, host):
+    """Returns the seconds to the first byte and to the last byte, and the size."""
+    start = time.perf_counter()
+    _, chunks = get_response(view, version, url, host)
+    size = len(next(chunks, b""))
+    first_byte = time.perf_counter() - start
+    for chunk in chunks:
+        size += len(chunk)
+    return first_byte, time.perf_counter() - start, size
+
+
+def measure_peak_memory(view, version, url, host):
+    tracemalloc.start()
+    try:
+        _, chunks = get_response(view, version, url, host)
+        for _ in chunks:
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = "Compare the memory use and latency of buffered and streamed list responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="event")
+        parser.add_argument("--version", dest="version", default="v1")
+        parser.add_argument(
+            "--query",
+            dest="query",
+            default="page_size=100",
+            help="Query string of the listing",
+        )
+        parser.add_argument(
+            "--host",
+            dest="host",
+            default="localhost",
+            help="Host of the requests, one of ALLOWED_HOSTS",
+        )
+        parser.add_argument("--repeat", type=int, dest="repeat", default=5)
+
+    def handle(self, *args, **options):
+        view = ENDPOINTS[options["endpoint"]].as_view({"get": "list"})
+        url = "/%s/%s/?%s" % (options["version"], options["endpoint"], options["query"])
+        request_args = (view, options["version"], url, options["host"])
+        # a minimum page size of one streams every page
+        for mode, streaming_page_size in (("buffered", 0), ("streamed", 1)):
+            with override_settings(STREAMING_PAGE_SIZE=streaming_page_size):
+                timings = [measure(*request_args) for _ in range(options["repeat"])]
+                peak = measure_peak_memory(*request_args)
+            self.stdout.write(
+                "  %-9s first byte %8.1f ms  last byte %8.1f ms  "
+                "peak memory %7.1f MiB  %d bytes"
+                % (
+                    mode,
+                    statistics.median(timing[0] for timing in timings) * 1000,
+                    statistics.median(timing[1] for timing in timings) * 1000,
+                    peak / 2**20,
+                    timings[0][2],
+                )
+            )
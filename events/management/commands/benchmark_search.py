@@ -0,0 +1,104 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import translation
+
+from events.api import (
+    haystack_search,
+    hydrate_search_results,
+    postgres_search,
+    PostgresSearchResult,
+    SEARCH_MODELS,
+)
+
+ENGINES = ("haystack", "postgres")
+
+
+def run_search(engine, models, language, params, page_size):
+    """Returns the hydrated first page of the search in the engine."""
+    if engine == "postgres":
+        rows = postgres_search(
+            models, language, params.get("q"), params.get("input"), params
+        )[:page_size]
+        results = [
+            PostgresSearchResult(SEARCH_MODELS[resource_type], pk, score)
+            for resource_type, pk, score in rows
+        ]
+    else:
+        with translation.override(language):
+            results = list(
+                haystack_search(models, params.get("q"), params.get("input"), params)[
+                    :page_size
+                ]
+            )
+    return hydrate_search_results(results)
+
+
+class Command(BaseCommand):
+    help = "Compare the response times of the search engines on the same queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="+", help="Search terms to benchmark")
+        parser.add_argument(
+            "--engines",
+            dest="engines",
+            default=",".join(ENGINES),
+            help="Comma separated engines to benchmark (default: all)",
+        )
+        parser.add_argument(
+            "--type",
+            dest="type",
+            default="",
+            help="Comma separated resource types to search (default: all)",
+        )
+        parser.add_argument("--language", dest="language", default="fi")
+        parser.add_argument(
+            "--input",
+            action="store_true",
+            dest="input",
+            help="Search the queries as autocomplete entries",
+        )
+        parser.add_argument("--division", dest="division", default=None)
+        parser.add_argument("--start", dest="start", default=None)
+        parser.add_argument("--end", dest="end", default=None)
+        parser.add_argument("--repeat", type=int, dest="repeat", default=5)
+        parser.add_argument("--page-size", type=int, dest="page_size", default=20)
+
+    def handle(self, *args, **options):
+        engines = options["engines"].split(",")
+        models = {
+            SEARCH_MODELS[t] for t in options["type"].split(",") if t in SEARCH_MODELS
+        }
+        filters = {
+            key: options[key]
+            for key in ("division", "start", "end")
+            if options[key] is not None
+        }
+        for query in options["queries"]:
+            params = dict(filters, **{"input" if options["input"] else "q": query})
+            self.stdout.write(query)
+            top_ids = {}
+            for engine in engines:
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    results = run_search(
+                        engine,
+                        models,
+                        options["language"],
+                        params,
+                        options["page_size"],
+                    )
+                    timings.append((time.perf_counter() - start) * 1000)
+                top_ids[engine] = [result.pk for result in results]
+                self.stdout.write(
+                    "  %-10s %8.1f ms median %8.1f ms max %4d results"
+                    % (engine, statistics.median(timings), max(timings), len(results))
+                )
+            if len(top_ids) == 2:
+                first, second = top_ids.values()
+                self.stdout.write(
+                    "  %d of the top %d results in common"
+                    % (len(set(first) & set(second)), options["page_size"])
+                )
@@ -5,6 +5,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.utils.translation import activate, get_language
 
 from events.importer.base import get_importers
+from events.importer.instrumentation import report_path
 
 
 class Command(BaseCommand):
@@ -30,7 +31,7 @@ class Command(BaseCommand):
             "--cached",
             action="store_true",
             dest="cached",
-            help="Cache requests (if possible)",
+            help="Cache responses and skip unchanged feeds (if possible)",
         )
         parser.add_argument(
             "--single", action="store", dest="single", help="Import only single entity"
@@ -47,6 +48,31 @@ class Command(BaseCommand):
             dest="force",
             help="Allow deleting any number of entities if necessary",
         )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            dest="full",
+            help="Import all items and delete the removed ones, not just the changes",
+        )
+        parser.add_argument(
+            "--report",
+            action="store",
+            dest="report",
+            help="Write the JSON run report to this file "
+            "(default: data/import_reports/<module>-<time>.json)",
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            dest="profile",
+            help="Dump cProfile stats of the run next to the report",
+        )
+        parser.add_argument(
+            "--trace-memory",
+            action="store_true",
+            dest="trace_memory",
+            help="Record the peak memory use of the run in the report (slow)",
+        )
 
         for imp in self.importer_types:
             parser.add_argument(
@@ -65,14 +91,16 @@ class Command(BaseCommand):
             root_dir = settings.PROJECT_ROOT
         else:
             root_dir = settings.BASE_DIR
+        data_path = os.path.join(root_dir, "data")
         importer = imp_class(
             {
-                "data_path": os.path.join(root_dir, "data"),
+                "data_path": data_path,
                 "verbosity": int(options["verbosity"]),
                 "cached": options["cached"],
                 "single": options["single"],
                 "remap": options["remap"],
                 "force": options["force"],
+                "full": options["full"],
             }
         )
 
@@ -81,21 +109,32 @@ class Command(BaseCommand):
         old_lang = get_language()
         activate(settings.LANGUAGES[0][0])
 
-        for imp_type in self.importer_types:
-            name = "import_%s" % imp_type
-            method = getattr(importer, name, None)
-            if options[imp_type]:
-                if not method:
-                    raise CommandError(
-                        "Importer {} does not support importing {}".format(
-                            importer.name, imp_type
-                        )
-                    )
-            else:
-                if not options["all"]:
-                    continue
+        report_file = options["report"] or report_path(data_path, module)
+        profile_file = None
+        if options["profile"]:
+            profile_file = os.path.splitext(report_file)[0] + ".prof"
+
+        try:
+            with importer.report.run(profile_file, options["trace_memory"]):
+                for imp_type in self.importer_types:
+                    name = "import_%s" % imp_type
+                    method = getattr(importer, name, None)
+                    if options[imp_type]:
+                        if not method:
+                            raise CommandError(
+                                "Importer {} does not support importing {}".format(
+                                    importer.name, imp_type
+                                )
+                            )
+                    else:
+                        if not options["all"]:
+                            continue
 
-            if method:
-                method()
+                    if method:
+                        with importer.report.import_type(imp_type):
+                            method()
+        finally:
+            # failed runs are reported too
+            importer.report.write(report_file)
 
         activate(old_lang)
@@ -0,0 +1,105 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from events.importer.base import get_importers
+from events.importer.orchestrator import IMPORT_TYPES, plan_jobs, run_jobs
+
+
+class Command(BaseCommand):
+    help = "Run several event importers in parallel processes"
+
+    importer_types = list(IMPORT_TYPES)
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="+")
+        parser.add_argument(
+            "--types",
+            dest="types",
+            default=",".join(self.importer_types),
+            help="Comma separated entities to import (default: all)",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            dest="jobs",
+            default=None,
+            help="Number of importers to run at once (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            dest="cached",
+            help="Cache responses and skip unchanged feeds (if possible)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            dest="force",
+            help="Allow deleting any number of entities if necessary",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            dest="full",
+            help="Import all items and delete the removed ones, not just the changes",
+        )
+
+    def handle(self, *args, **options):
+        importers = get_importers()
+        unknown = [module for module in options["modules"] if module not in importers]
+        if unknown:
+            raise CommandError(
+                "Importers %s not found. Valid importers: %s"
+                % (", ".join(unknown), ", ".join(sorted(importers.keys())))
+            )
+        import_types = options["types"].split(",")
+        for imp_type in import_types:
+            if imp_type not in self.importer_types:
+                raise CommandError("Unknown entity type %s" % imp_type)
+
+        if hasattr(settings, "PROJECT_ROOT"):
+            root_dir = settings.PROJECT_ROOT
+        else:
+            root_dir = settings.BASE_DIR
+        importer_options = {
+            "data_path": os.path.join(root_dir, "data"),
+            "verbosity": int(options["verbosity"]),
+            "cached": options["cached"],
+            "single": None,
+            "remap": False,
+            "force": options["force"],
+            "full": options["full"],
+        }
+
+        start = time.monotonic()
+        results = []
+        jobs = plan_jobs(options["modules"], import_types)
+        for result in run_jobs(jobs, importer_options, options["jobs"]):
+            status = "failed" if result.error else "done"
+            self.stdout.write(
+                "%s %s %s in %.1f s"
+                % (result.module, result.import_type, status, result.elapsed)
+            )
+            results.append(result)
+
+        self.stdout.write("\nImport summary:")
+        for result in sorted(results, key=lambda r: r.module):
+            if result.error:
+                status = "FAILED"
+            else:
+                status = "%8.1f s" % result.elapsed
+            self.stdout.write(
+                "  %-16s %-10s %10s" % (result.module, result.import_type, status)
+            )
+        self.stdout.write("Total %.1f s" % (time.monotonic() - start))
+
+        failed = [
+            "%s %s" % (result.module, result.import_type)
+            for result in results
+            if result.error
+        ]
+        if failed:
+            raise CommandError("Import failed: %s" % ", ".join(failed))
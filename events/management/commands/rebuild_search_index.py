@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events.search_rebuild import (
+    REBUILD_BATCH_SIZE,
+    rebuild_languages,
+    search_languages,
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search indexes of all languages in parallel processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--languages",
+            dest="languages",
+            default=None,
+            help="Comma separated languages to rebuild (default: all)",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            dest="jobs",
+            default=None,
+            help="Number of languages to rebuild at once (default: all)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            dest="batch_size",
+            default=REBUILD_BATCH_SIZE,
+            help="Number of objects to index at a time",
+        )
+        parser.add_argument(
+            "--noclear",
+            action="store_false",
+            dest="clear",
+            help="Update the existing indexes instead of clearing them first",
+        )
+
+    def handle(self, *args, **options):
+        languages = search_languages()
+        if options["languages"]:
+            requested = options["languages"].split(",")
+            unknown = [language for language in requested if language not in languages]
+            if unknown:
+                raise CommandError(
+                    "No search index for %s. Valid languages: %s"
+                    % (", ".join(unknown), ", ".join(languages))
+                )
+            languages = requested
+
+        start = time.monotonic()
+        failed = []
+        for result in rebuild_languages(
+            languages, options["batch_size"], options["clear"], options["jobs"]
+        ):
+            if result.error:
+                failed.append(result.language)
+                self.stdout.write(
+                    "%s failed in %.1f s" % (result.language, result.elapsed)
+                )
+                continue
+            total = sum(result.counts.values())
+            self.stdout.write(
+                "%s: %d objects in %.1f s (%.1f objects/s)"
+                % (
+                    result.language,
+                    total,
+                    result.elapsed,
+                    total / result.elapsed if result.elapsed else 0,
+                )
+            )
+            for model_name, count in sorted(result.counts.items()):
+                self.stdout.write("  %-10s %8d" % (model_name, count))
+        self.stdout.write("Total %.1f s" % (time.monotonic() - start))
+
+        if failed:
+            raise CommandError("Search index rebuild failed: %s" % ", ".join(failed))
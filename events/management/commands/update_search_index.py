@@ -0,0 +1,40 @@
+import logging
+import time
+
+from django.core.management import BaseCommand
+
+from events.search_queue import SEARCH_INDEX_BATCH_SIZE, update_search_index
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Update the search index with the objects queued since the last update"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            dest="batch_size",
+            default=SEARCH_INDEX_BATCH_SIZE,
+            help="Number of queued objects to index at a time",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            dest="interval",
+            default=None,
+            help="Keep running, checking the queue every INTERVAL seconds",
+        )
+
+    def handle(self, batch_size, interval, **kwargs):
+        while True:
+            updated, removed = update_search_index(batch_size=batch_size)
+            if updated or removed:
+                logger.info(
+                    "Search index updated: %d objects updated, %d removed."
+                    % (updated, removed)
+                )
+            if interval is None:
+                break
+            time.sleep(interval)
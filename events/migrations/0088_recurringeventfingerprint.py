@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-19 08:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0087_image_alt_text_translation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecurringEventFingerprint",
+            fields=[
+                (
+                    "super_event",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="recurring_fingerprint",
+                        serialize=False,
+                        to="events.Event",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=40)),
+            ],
+        ),
+    ]
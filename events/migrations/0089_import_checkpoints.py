@@ -0,0 +1,61 @@
+# Generated by Django 3.2 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0088_recurringeventfingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataSourceCheckpoint",
+            fields=[
+                (
+                    "data_source",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="checkpoint",
+                        serialize=False,
+                        to="events.DataSource",
+                    ),
+                ),
+                (
+                    "last_successful_run",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("high_water_mark", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ImportedItemHash",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("origin_id", models.CharField(max_length=100)),
+                ("payload_hash", models.CharField(max_length=40)),
+                (
+                    "data_source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="imported_item_hashes",
+                        to="events.DataSource",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("data_source", "origin_id")},
+            },
+        ),
+    ]
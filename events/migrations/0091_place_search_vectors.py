@@ -0,0 +1,77 @@
+# Generated by Django 3.2 on 2026-10-19 12:00
+"""This migration adds language-specific tsvector columns, triggers to update them and indices
+   needed for the full-text search on events_place table.
+"""
+import django.contrib.postgres.search
+from django.db import migrations
+
+LANGUAGES = (("fi", "finnish"), ("sv", "swedish"), ("en", "english"))
+
+
+def place_vector_sql(row, lang, config):
+    return (
+        f"setweight(to_tsvector('pg_catalog.{config}', coalesce({row}name_{lang}, '')), 'A') || "
+        f"setweight(to_tsvector('pg_catalog.{config}', coalesce({row}description_{lang}, '')), 'B')"
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("events", "0090_searchindexqueueitem"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="place",
+            name="search_vector_en",
+            field=django.contrib.postgres.search.SearchVectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name="place",
+            name="search_vector_fi",
+            field=django.contrib.postgres.search.SearchVectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name="place",
+            name="search_vector_sv",
+            field=django.contrib.postgres.search.SearchVectorField(null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=[
+                        f"UPDATE events_place SET search_vector_{lang} = {place_vector_sql('', lang, config)};"
+                        for lang, config in LANGUAGES
+                    ]
+                    + [
+                        f"CREATE FUNCTION places_{config}_content_trigger_function() RETURNS trigger AS $$ "
+                        "begin "
+                        f"new.search_vector_{lang} := {place_vector_sql('new.', lang, config)}; "
+                        "return new; "
+                        "end "
+                        "$$ LANGUAGE plpgsql; "
+                        f"CREATE TRIGGER places_{config}_content_trigger BEFORE INSERT OR UPDATE ON events_place "
+                        f"FOR EACH ROW EXECUTE PROCEDURE places_{config}_content_trigger_function();"
+                        for lang, config in LANGUAGES
+                    ],
+                    reverse_sql=[
+                        f"DROP TRIGGER places_{config}_content_trigger ON events_place;"
+                        f"DROP FUNCTION places_{config}_content_trigger_function;"
+                        for lang, config in LANGUAGES
+                    ],
+                )
+            ]
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=f"CREATE INDEX CONCURRENTLY places_{config}_content_index "
+                    f"ON events_place USING GIN (search_vector_{lang});",
+                    reverse_sql=f"DROP INDEX places_{config}_content_index;",
+                )
+                for lang, config in LANGUAGES
+            ]
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-19 12:00
+"""This migration adds trigram indices for the similarity search of keyword names and
+   the icontains search of keyword labels.
+"""
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("events", "0091_place_search_vectors"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=f"CREATE INDEX CONCURRENTLY keywords_name_{lang}_trgm_index "
+                    f"ON events_keyword USING GIN (name_{lang} gin_trgm_ops);",
+                    reverse_sql=f"DROP INDEX keywords_name_{lang}_trgm_index;",
+                )
+                for lang in ("fi", "sv", "en")
+            ]
+            + [
+                # icontains compares UPPER(name::text)
+                migrations.RunSQL(
+                    sql="CREATE INDEX CONCURRENTLY keywordlabels_name_trgm_index "
+                    "ON events_keywordlabel USING GIN (UPPER(name::text) gin_trgm_ops);",
+                    reverse_sql="DROP INDEX keywordlabels_name_trgm_index;",
+                )
+            ]
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-19 14:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0092_keyword_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="datasourcecheckpoint",
+            name="high_water_mark",
+        ),
+    ]
@@ -105,6 +105,31 @@ class DataSource(models.Model):
         return self.id
 
 
+class DataSourceCheckpoint(models.Model):
+    """State of the delta imports of a data source."""
+
+    data_source = models.OneToOneField(
+        DataSource,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="checkpoint",
+    )
+    last_successful_run = models.DateTimeField(null=True, blank=True)
+
+
+class ImportedItemHash(models.Model):
+    """Hash of the upstream payload an item was last imported from."""
+
+    data_source = models.ForeignKey(
+        DataSource, on_delete=models.CASCADE, related_name="imported_item_hashes"
+    )
+    origin_id = models.CharField(max_length=100)
+    payload_hash = models.CharField(max_length=40)
+
+    class Meta:
+        unique_together = ("data_source", "origin_id")
+
+
 class SimpleValueMixin(object):
     """
     Used for models which are simple one-to-many fields
@@ -602,6 +627,10 @@ class Place(MPTTModel, BaseModel, SchemalessFieldMixin, ImageMixin, ReplacedByMi
     )
     n_events_changed = models.BooleanField(default=False, db_index=True)
 
+    search_vector_fi = SearchVectorField(null=True)
+    search_vector_en = SearchVectorField(null=True)
+    search_vector_sv = SearchVectorField(null=True)
+
     class Meta:
         verbose_name = _("place")
         verbose_name_plural = _("places")
@@ -1183,6 +1212,14 @@ class ExportInfo(models.Model):
         super(ExportInfo, self).save(*args, **kwargs)
 
 
+class SearchIndexQueueItem(models.Model):
+    """An object saved or deleted since the search index was last updated."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=50)
+    queued_time = models.DateTimeField(auto_now_add=True)
+
+
 class EventAggregate(models.Model):
     super_event = models.OneToOneField(
         Event, on_delete=models.CASCADE, related_name="aggregate", null=True
@@ -1196,6 +1233,21 @@ class EventAggregateMember(models.Model):
     event = models.OneToOneField(Event, on_delete=models.CASCADE)
 
 
+class RecurringEventFingerprint(models.Model):
+    """
+    Fingerprint of the sub event data a recurring super event was last
+    aggregated from by an importer.
+    """
+
+    super_event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="recurring_fingerprint",
+    )
+    fingerprint = models.CharField(max_length=40)
+
+
 class Feedback(models.Model):
 
     name = models.CharField(verbose_name=_("Name"), max_length=255, blank=True)
@@ -1,3 +1,3 @@
 # These are imported for package level imports elsewhere
 from events.renderers.docx import DOCXRenderer  # noqa
-from events.renderers.json import JSONLDRenderer, JSONRenderer  # noqa
+from events.renderers.json import JSONLDRenderer, JSONRenderer, StreamedList  # noqa
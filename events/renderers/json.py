@@ -1,5 +1,23 @@
 import ujson
 from rest_framework import renderers
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+
+# Bytes of encoded JSON collected before they are sent on
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class StreamedList(object):
+    """
+    List whose items are produced while the response is rendered. Streaming
+    renderers encode each item as it is produced, other renderers the whole
+    list at once.
+    """
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable)
 
 
 class JSONRenderer(renderers.JSONRenderer):
@@ -8,6 +26,55 @@ class JSONRenderer(renderers.JSONRenderer):
     def render(self, data, media_type=None, renderer_context=None):
         return super(JSONRenderer, self).render(data, media_type, renderer_context)
 
+    def can_stream(self, media_type=None, renderer_context=None):
+        # indented output depends on the nesting of the values
+        return self.get_indent(media_type, renderer_context or {}) is None
+
+    def render_stream(self, data, media_type=None, renderer_context=None):
+        """
+        Renders data like render, but yields the output in parts, encoding the
+        items of StreamedList values one at a time. Requires can_stream.
+        """
+        separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        encoder = self.encoder_class(
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=separators,
+        )
+        buffer = []
+        buffered = 0
+        for part in self._iter_json(data, encoder, separators):
+            # the same escapes as in render
+            part = part.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+            buffer.append(part.encode())
+            buffered += len(buffer[-1])
+            if buffered >= STREAM_BUFFER_SIZE:
+                yield b"".join(buffer)
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield b"".join(buffer)
+
+    def _iter_json(self, value, encoder, separators):
+        item_separator, key_separator = separators
+        if isinstance(value, StreamedList):
+            yield "["
+            for index, item in enumerate(value):
+                if index:
+                    yield item_separator
+                yield encoder.encode(item)
+            yield "]"
+        elif isinstance(value, dict) and all(isinstance(key, str) for key in value):
+            yield "{"
+            for index, (key, item) in enumerate(value.items()):
+                if index:
+                    yield item_separator
+                yield encoder.encode(key) + key_separator
+                yield from self._iter_json(item, encoder, separators)
+            yield "}"
+        else:
+            yield encoder.encode(value)
+
 
 class JSONLDRenderer(JSONRenderer):
     media_type = "application/ld+json"
@@ -20,6 +20,7 @@ class EventIndex(indexes.SearchIndex, indexes.Indexable):
             super()
             .index_queryset(using)
             .filter(publication_status=PublicationStatus.PUBLIC, deleted=False)
+            .select_related("location")
         )
 
     def update_object(self, instance, using=None, **kwargs):
@@ -0,0 +1,100 @@
+import logging
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from haystack import connections
+from haystack.constants import DEFAULT_ALIAS
+from haystack.signals import BaseSignalProcessor
+
+from events.models import SearchIndexQueueItem
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_BATCH_SIZE = 500
+
+
+def is_indexed(model):
+    unified_index = connections[DEFAULT_ALIAS].get_unified_index()
+    return model in unified_index.get_indexed_models()
+
+
+def enqueue(model, pks):
+    """Queues the given objects for updating in the search index."""
+    content_type = ContentType.objects.get_for_model(model)
+    SearchIndexQueueItem.objects.bulk_create(
+        SearchIndexQueueItem(content_type=content_type, object_id=str(pk)) for pk in pks
+    )
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """
+    Queues saved and deleted objects for update_search_index instead of
+    updating the search index within the save.
+
+    The queue item is written in the transaction of the save, so rolled back
+    changes are never indexed.
+    """
+
+    def setup(self):
+        models.signals.post_save.connect(self.handle_save)
+        models.signals.post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        models.signals.post_save.disconnect(self.handle_save)
+        models.signals.post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        if is_indexed(sender):
+            enqueue(sender, [instance.pk])
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if is_indexed(sender):
+            enqueue(sender, [instance.pk])
+
+
+def _update_objects(model, pks):
+    connection = connections[DEFAULT_ALIAS]
+    index = connection.get_unified_index().get_index(model)
+    backend = connection.get_backend()
+    objs = list(index.index_queryset(using=DEFAULT_ALIAS).filter(pk__in=pks))
+    if objs:
+        # a single bulk request for each language index
+        backend.update(index, objs)
+    # deleted and unpublished objects are no longer indexable
+    for pk in pks - {str(obj.pk) for obj in objs}:
+        backend.remove("%s.%s.%s" % (model._meta.app_label, model._meta.model_name, pk))
+    return len(objs), len(pks) - len(objs)
+
+
+def update_search_index(batch_size=SEARCH_INDEX_BATCH_SIZE):
+    """
+    Updates the search index with the queued objects, batch_size queue items
+    at a time, until the queue is empty. Several workers may run at once, as
+    the queue items being processed are locked.
+
+    Returns the numbers of objects updated and removed.
+    """
+    updated = removed = 0
+    while True:
+        with transaction.atomic():
+            items = list(
+                SearchIndexQueueItem.objects.select_for_update(skip_locked=True)
+                .order_by("id")
+                .only("id", "content_type_id", "object_id")[:batch_size]
+            )
+            if not items:
+                return updated, removed
+            pks_by_type = defaultdict(set)
+            for item in items:
+                pks_by_type[item.content_type_id].add(item.object_id)
+            for content_type_id, pks in pks_by_type.items():
+                model = ContentType.objects.get_for_id(content_type_id).model_class()
+                n_updated, n_removed = _update_objects(model, pks)
+                updated += n_updated
+                removed += n_removed
+            SearchIndexQueueItem.objects.filter(
+                id__in=[item.id for item in items]
+            ).delete()
+            logger.debug("Processed %d search index queue items" % len(items))
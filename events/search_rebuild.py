@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import as_completed, ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import translation
+from haystack import connections as haystack_connections
+from haystack.constants import DEFAULT_ALIAS
+
+# Per module logger
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 1000
+
+RebuildResult = namedtuple("RebuildResult", ["language", "counts", "elapsed", "error"])
+
+
+def search_languages():
+    """Languages that have a search backend of their own."""
+    languages = []
+    for language, _ in settings.LANGUAGES:
+        using = "%s-%s" % (DEFAULT_ALIAS, language)
+        if using in settings.HAYSTACK_CONNECTIONS and language not in languages:
+            languages.append(language)
+    return languages
+
+
+def iter_chunks(queryset, batch_size):
+    """
+    Yields the objects of the queryset in lists of batch_size, paging by
+    primary key so that the prefetches of the queryset apply to each list.
+    """
+    queryset = queryset.order_by("pk")
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:batch_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def rebuild_language(language, batch_size=REBUILD_BATCH_SIZE, clear=True):
+    """
+    Rebuilds the search index of one language. The documents are rendered
+    with the language active, as MultilingualSearchBackend does.
+    """
+    start = time.monotonic()
+    counts = {}
+    error = None
+    initial_language = translation.get_language()
+    translation.activate(language)
+    try:
+        backend = haystack_connections[
+            "%s-%s" % (DEFAULT_ALIAS, language)
+        ].get_backend()
+        unified_index = haystack_connections[DEFAULT_ALIAS].get_unified_index()
+        if clear:
+            backend.parent_class.clear(backend)
+        for model in unified_index.get_indexed_models():
+            index = unified_index.get_index(model)
+            count = 0
+            queryset = index.index_queryset(using=DEFAULT_ALIAS)
+            for chunk in iter_chunks(queryset, batch_size):
+                backend.parent_class.update(backend, index, chunk)
+                count += len(chunk)
+            counts[model._meta.model_name] = count
+    except Exception:  # noqa
+        error = traceback.format_exc()
+        logger.error("%s search index rebuild failed:\n%s" % (language, error))
+    finally:
+        if initial_language is not None:
+            translation.activate(initial_language)
+        else:
+            translation.deactivate()
+    return RebuildResult(language, counts, time.monotonic() - start, error)
+
+
+def _rebuild_worker(language, batch_size, clear):
+    # forked workers must not share the search engine clients of the parent
+    haystack_connections.reload(DEFAULT_ALIAS)
+    haystack_connections.reload("%s-%s" % (DEFAULT_ALIAS, language))
+    try:
+        return rebuild_language(language, batch_size, clear)
+    finally:
+        connection.close()
+
+
+def rebuild_languages(languages, batch_size=REBUILD_BATCH_SIZE, clear=True, jobs=None):
+    """
+    Rebuilds the search indexes of the languages in parallel worker processes.
+    Yields the results as the languages finish.
+    """
+    # forked workers must not share the connections of this process
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(
+        max_workers=jobs or len(languages), mp_context=context
+    ) as executor:
+        futures = [
+            executor.submit(_rebuild_worker, language, batch_size, clear)
+            for language in languages
+        ]
+        for future in as_completed(futures):
+            yield future.result()
@@ -20,6 +20,7 @@ from munigeo.models import (
 from rest_framework.test import APIClient
 
 from events.api import KeywordSerializer, LanguageSerializer, PlaceSerializer
+from events.keywords import clear_similar_keywords
 
 # events
 from events.models import (
@@ -740,6 +741,12 @@ def setup_env():
     settings.SUPPORT_EMAIL = "test@test.com"
 
 
+@pytest.fixture(autouse=True)
+def forget_similar_keywords():
+    # matches of one test's keywords must not be remembered in another
+    clear_similar_keywords()
+
+
 @pytest.mark.django_db
 @pytest.fixture
 def registration(event, user):
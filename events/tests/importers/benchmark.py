@@ -0,0 +1,149 @@
+"""
+Offline importer benchmarks.
+
+The recorded feeds in feeds/ are scaled up to the requested number of items
+and served to the importers from memory, so that importer throughput can be
+measured against a local database without the upstream services.
+"""
+import copy
+import csv
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+FEEDS_DIR = os.path.join(os.path.dirname(__file__), "feeds")
+
+
+def load_feed(name):
+    with open(os.path.join(FEEDS_DIR, name), "rb") as f:
+        return f.read()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter answering requests with recorded responses. Routes are
+    (url substring, body, content type) tuples, the first match wins.
+    """
+
+    def __init__(self, routes):
+        super().__init__()
+        self.routes = routes
+
+    def send(self, request, **kwargs):
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = "utf-8"
+        response.status_code = 404
+        response._content = b""
+        for url_part, body, content_type in self.routes:
+            if url_part in request.url:
+                response.status_code = 200
+                response._content = body
+                response.headers = CaseInsensitiveDict({"Content-Type": content_type})
+                break
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
+
+
+def replay(importer, routes):
+    """Makes the importer fetch from the given routes instead of the network."""
+    adapter = ReplayAdapter(routes)
+    importer.http.session.mount("http://", adapter)
+    importer.http.session.mount("https://", adapter)
+
+
+def _start_time(i):
+    # one new item starting every hour from tomorrow on
+    tomorrow = datetime.now().replace(minute=0, second=0, microsecond=0)
+    return tomorrow + timedelta(days=1, hours=i)
+
+
+def scale_opennc(docs, size):
+    """Scales an Espoo or HelMet OpenNC page to size documents."""
+    scaled = []
+    for i in range(size):
+        doc = copy.deepcopy(docs[i % len(docs)])
+        content_id = 1000000 + i
+        doc["ContentId"] = content_id
+        for version in doc["LanguageVersions"]:
+            version["ContentId"] = content_id
+        duration = datetime.fromisoformat(doc["EventEndDate"]) - datetime.fromisoformat(
+            doc["EventStartDate"]
+        )
+        start = _start_time(i)
+        doc["EventStartDate"] = start.isoformat()
+        doc["EventEndDate"] = (start + duration).isoformat()
+        if "ExpiryDate" in doc:
+            doc["ExpiryDate"] = (start + duration + timedelta(days=1)).isoformat()
+        scaled.append(doc)
+    return json.dumps({"value": scaled}).encode("utf-8")
+
+
+def scale_lippupiste(feed, size, serie_size=5):
+    """Scales a Lippupiste CSV feed to size events in series of serie_size."""
+    rows = list(csv.DictReader(io.StringIO(feed.decode("utf-8")), delimiter=";"))
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]), delimiter=";")
+    writer.writeheader()
+    for i in range(size):
+        row = dict(rows[(i // serie_size) % len(rows)])
+        serie_id = i // serie_size + 1
+        start = _start_time(i)
+        row["EventId"] = str(i + 1)
+        row["EventSerieId"] = str(serie_id)
+        row["EventName"] = "%s %d" % (row["EventName"], serie_id)
+        row["EventDate"] = start.strftime("%d.%m.%Y")
+        row["EventTime"] = start.strftime("%H:%M")
+        writer.writerow(row)
+    return out.getvalue().encode("utf-8")
+
+
+def scale_harrastushaku(feed, size):
+    """Scales a Harrastushaku activity feed to size activities."""
+    activities = json.loads(feed)["data"]
+    scaled = []
+    for i in range(size):
+        activity = copy.deepcopy(activities[i % len(activities)])
+        duration = int(activity["enddate"]) - int(activity["startdate"])
+        start = int(_start_time(i).timestamp())
+        activity["id"] = str(100000 + i)
+        activity["startdate"] = str(start)
+        activity["enddate"] = str(start + duration)
+        scaled.append(activity)
+    return json.dumps({"data": scaled}).encode("utf-8")
+
+
+def scale_yso(feed, size):
+    """Scales the N-Triples concept template to size concepts."""
+    template = feed.decode("utf-8")
+    return "".join(
+        template.replace("{id}", str(100000 + i)) for i in range(size)
+    ).encode("utf-8")
+
+
+def run_benchmark(importer, import_type, items):
+    """Runs one import and returns its throughput figures."""
+    report = importer.report
+    with report.run(trace_memory=True):
+        getattr(importer, "import_%s" % import_type)()
+    return {
+        "importer": importer.name,
+        "import": import_type,
+        "items": items,
+        "seconds": report.elapsed,
+        "items_per_second": items / report.elapsed,
+        "queries_per_item": report.query_count / items,
+        "query_seconds": report.query_time,
+        "peak_memory_mb": report.peak_memory / 2**20,
+        "phases": dict(report.phases),
+        "counts": dict(report.counts),
+    }
@@ -0,0 +1,168 @@
+"""
+Importer throughput benchmarks, run against recorded feeds scaled up to
+IMPORTER_BENCHMARK_SIZE items:
+
+    IMPORTER_BENCHMARK_SIZE=2000 pytest -s events/tests/importers/test_benchmarks.py
+
+The figures are also written as JSON to IMPORTER_BENCHMARK_REPORT, if set.
+"""
+import json
+import os
+
+import pytest
+from django.conf import settings
+
+from events.importer import lippupiste
+from events.importer.espoo import EspooImporter
+from events.importer.harrastushaku import HarrastushakuImporter
+from events.importer.helmet import HelmetImporter
+from events.importer.lippupiste import LippupisteImporter
+from events.importer.yso import YsoImporter
+from events.models import DataSource, Language, Organization, Place
+
+from .benchmark import (
+    load_feed,
+    replay,
+    run_benchmark,
+    scale_harrastushaku,
+    scale_lippupiste,
+    scale_opennc,
+    scale_yso,
+)
+
+BENCHMARK_SIZE = int(os.environ.get("IMPORTER_BENCHMARK_SIZE") or 0)
+
+pytestmark = pytest.mark.skipif(
+    not BENCHMARK_SIZE, reason="IMPORTER_BENCHMARK_SIZE not set"
+)
+
+results = []
+
+
+@pytest.fixture(scope="module", autouse=True)
+def benchmark_summary():
+    yield
+    if not results:
+        return
+    for result in results:
+        print(
+            "\n%(importer)-14s %(items)6d items %(seconds)8.1f s %(items_per_second)8.1f items/s "
+            "%(queries_per_item)6.1f queries/item %(peak_memory_mb)7.1f MB peak"
+            % result
+        )
+    path = os.environ.get("IMPORTER_BENCHMARK_REPORT")
+    if path:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+@pytest.fixture
+def benchmark_options(tmp_path):
+    return {
+        "data_path": str(tmp_path),
+        "verbosity": 1,
+        "cached": False,
+        "single": None,
+        "remap": False,
+        "force": True,
+        "full": True,
+    }
+
+
+@pytest.fixture
+def tprek_places():
+    for lang in ("fi", "sv", "en"):
+        Language.objects.get_or_create(id=lang)
+    DataSource.objects.get_or_create(id=settings.SYSTEM_DATA_SOURCE_ID)
+    DataSource.objects.get_or_create(id="ahjo")
+    DataSource.objects.get_or_create(id="yso")
+    tprek, _ = DataSource.objects.get_or_create(id="tprek")
+    publisher, _ = Organization.objects.get_or_create(
+        id="tprek:benchmark", origin_id="benchmark", data_source=tprek
+    )
+    Place.objects.create(
+        id="tprek:1",
+        origin_id="1",
+        data_source=tprek,
+        publisher=publisher,
+        name_fi="Benchmark-talo",
+        street_address_fi="Testikatu 1",
+        address_locality_fi="Helsinki",
+        postal_code="00100",
+    )
+    Place.objects.create(
+        id="tprek:2",
+        origin_id="2",
+        data_source=tprek,
+        publisher=publisher,
+        name_fi="Benchmark-näyttämö",
+        street_address_fi="Kaasutehtaankatu 1",
+        address_locality_fi="Helsinki",
+        postal_code="00530",
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "importer_class, feed",
+    [(EspooImporter, "espoo.json"), (HelmetImporter, "helmet.json")],
+)
+def test_benchmark_opennc(
+    importer_class, feed, tprek_places, benchmark_options, monkeypatch
+):
+    monkeypatch.setattr(EspooImporter, "location_cache", {})
+    monkeypatch.setattr(EspooImporter, "keyword_cache", {})
+    monkeypatch.setattr(HelmetImporter, "kwcache", {})
+    importer = importer_class(benchmark_options)
+    docs = json.loads(load_feed(feed))["value"]
+    replay(
+        importer,
+        [
+            (
+                "ContentLanguages(1)/",
+                scale_opennc(docs, BENCHMARK_SIZE),
+                "application/json",
+            ),
+            ("ContentLanguages(", b'{"value": []}', "application/json"),
+        ],
+    )
+    results.append(run_benchmark(importer, "events", BENCHMARK_SIZE))
+
+
+@pytest.mark.django_db
+def test_benchmark_lippupiste(tprek_places, benchmark_options, monkeypatch):
+    url = "https://lippupiste.example.com/events.csv"
+    monkeypatch.setattr(lippupiste, "LIPPUPISTE_EVENT_API_URL", url)
+    importer = LippupisteImporter(benchmark_options)
+    feed = scale_lippupiste(load_feed("lippupiste.csv"), BENCHMARK_SIZE)
+    replay(importer, [(url, feed, "text/csv")])
+    results.append(run_benchmark(importer, "events", BENCHMARK_SIZE))
+
+
+@pytest.mark.django_db
+def test_benchmark_harrastushaku(tprek_places, benchmark_options):
+    importer = HarrastushakuImporter(benchmark_options)
+    feed = scale_harrastushaku(
+        load_feed("harrastushaku_activities.json"), BENCHMARK_SIZE
+    )
+    replay(
+        importer,
+        [
+            (
+                "/api/location/",
+                load_feed("harrastushaku_locations.json"),
+                "application/json",
+            ),
+            ("/api/activity/", feed, "application/json"),
+        ],
+    )
+    importer.import_places()
+    results.append(run_benchmark(importer, "courses", BENCHMARK_SIZE))
+
+
+@pytest.mark.django_db
+def test_benchmark_yso(tprek_places, benchmark_options):
+    importer = YsoImporter(benchmark_options)
+    feed = scale_yso(load_feed("yso.nt"), BENCHMARK_SIZE)
+    replay(importer, [("finto.fi", feed, "application/n-triples")])
+    results.append(run_benchmark(importer, "keywords", BENCHMARK_SIZE))
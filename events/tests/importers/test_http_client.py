@@ -0,0 +1,137 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from events.importer.cache import ResponseCache
+from events.importer.http_client import HttpClient, HttpClientError
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    # path -> list of (status, body) served in order, the last one repeating
+    routes = {}
+    hits = {}
+
+    def do_GET(self):
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        responses = self.routes.get(self.path, [(404, "")])
+        status, body = responses[min(self.hits[self.path], len(responses)) - 1]
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_server():
+    MockHandler.routes = {}
+    MockHandler.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    with HttpClient(max_retries=3, backoff=0) as client:
+        yield client
+
+
+def page(values, next_page=None):
+    doc = {"value": values}
+    if next_page:
+        doc["next"] = next_page
+    return json.dumps(doc)
+
+
+def test_get_json_retries_server_errors_and_invalid_json(mock_server, client):
+    MockHandler.routes["/data"] = [(503, ""), (200, "{broken"), (200, '{"ok": 1}')]
+
+    assert client.get_json(mock_server + "/data") == {"ok": 1}
+    assert MockHandler.hits["/data"] == 3
+
+
+def test_get_json_gives_up_after_max_retries(mock_server, client):
+    MockHandler.routes["/data"] = [(500, "")]
+
+    with pytest.raises(HttpClientError):
+        client.get_json(mock_server + "/data")
+    assert MockHandler.hits["/data"] == 3
+
+
+def test_get_json_does_not_retry_client_errors(mock_server, client):
+    with pytest.raises(HttpClientError):
+        client.get_json(mock_server + "/missing")
+    assert MockHandler.hits["/missing"] == 1
+
+
+def test_get_stream_reads_the_body(mock_server, client, tmp_path):
+    MockHandler.routes["/data"] = [(200, '{"ok": 1}')]
+
+    assert client.get_stream(mock_server + "/data").read() == b'{"ok": 1}'
+    with HttpClient(cache=ResponseCache(str(tmp_path))) as cached_client:
+        assert cached_client.get_stream(mock_server + "/data").read() == b'{"ok": 1}'
+
+
+def test_iter_pages_follows_next_links(mock_server, client):
+    MockHandler.routes["/1"] = [(200, page([1, 2], "/2"))]
+    MockHandler.routes["/2"] = [(200, page([3], "/3"))]
+    MockHandler.routes["/3"] = [(200, page([4]))]
+
+    def get_next_url(doc):
+        return mock_server + doc["next"] if "next" in doc else None
+
+    pages = client.iter_pages(mock_server + "/1", get_next_url)
+    assert [doc["value"] for doc in pages] == [[1, 2], [3], [4]]
+
+
+def test_prefetch_yields_iterables_in_order(mock_server, client):
+    for lang in ("fi", "sv", "en"):
+        MockHandler.routes["/%s/1" % lang] = [(200, page([lang + "1"], "2"))]
+        MockHandler.routes["/%s/2" % lang] = [(200, page([lang + "2"]))]
+
+    def iter_values(lang):
+        def get_next_url(doc):
+            if "next" in doc:
+                return "%s/%s/%s" % (mock_server, lang, doc["next"])
+
+        for doc in client.iter_pages("%s/%s/1" % (mock_server, lang), get_next_url):
+            yield from doc["value"]
+
+    values = list(client.prefetch(iter_values(lang) for lang in ("fi", "sv", "en")))
+    assert values == ["fi1", "fi2", "sv1", "sv2", "en1", "en2"]
+
+
+def test_prefetch_raises_producer_errors(mock_server, client):
+    def fail():
+        yield 1
+        client.get_json(mock_server + "/missing")
+
+    items = client.prefetch([fail()])
+    assert next(items) == 1
+    with pytest.raises(HttpClientError):
+        next(items)
+
+
+def test_cache_revalidates_and_tracks_processed_responses(mock_server, tmp_path):
+    MockHandler.routes["/data"] = [(200, '{"ok": 1}'), (304, "")]
+    cache = ResponseCache(str(tmp_path))
+    url = mock_server + "/data"
+    cache.store(url, {"ETag": '"abc"'}, b'{"ok": 1}')
+
+    with HttpClient(max_retries=1, backoff=0, cache=cache) as client:
+        assert client.get_json(url) == {"ok": 1}
+        assert not client.is_unchanged()
+        client.mark_processed()
+
+        assert client.get_json(url) == {"ok": 1}
+        assert client.get(url).from_cache
+        assert client.is_unchanged()
+        assert not client.is_unchanged("other")
@@ -0,0 +1,236 @@
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from events.importer.base import Importer, recur_dict
+from events.models import Event, Keyword
+
+
+class DummyImporter(Importer):
+    name = "dummy"
+    supported_languages = ["fi", "sv", "en"]
+
+    def __init__(self, data_source, organization):
+        self._data_source = data_source
+        self._organization = organization
+        super().__init__({"force": False})
+
+    def setup(self):
+        self.data_source = self._data_source
+        self.organization = self._organization
+
+
+@pytest.fixture
+def importer(other_data_source, organization):
+    return DummyImporter(other_data_source, organization)
+
+
+class StubHttpClient(object):
+    cache = True
+
+    def __init__(self, processed):
+        self.processed = processed
+        self.fetched = set()
+
+    def is_unchanged(self, scope=None):
+        return bool(self.fetched) and self.fetched <= self.processed
+
+
+def make_event_info(importer, origin_id, keywords=(), name="Tapahtuma"):
+    start_time = timezone.now() + timedelta(days=1)
+    event = recur_dict()
+    event["origin_id"] = origin_id
+    event["data_source"] = importer.data_source
+    event["publisher"] = importer.organization
+    event["name"]["fi"] = name
+    event["start_time"] = start_time
+    event["end_time"] = start_time + timedelta(hours=2)
+    event["keywords"] = set(keywords)
+    event["offers"] = [{"is_free": True, "price": None, "info_url": None}]
+    return event
+
+
+@pytest.mark.django_db
+def test_fetch_unless_unchanged_consumes_iterators_lazily(importer):
+    fetched = []
+
+    def fetch():
+        for url in ("/1", "/2", "/3"):
+            importer.http.fetched.add(url)
+            fetched.append(url)
+            yield url
+
+    importer.http = StubHttpClient(processed={"/1"})
+    pages = importer.fetch_unless_unchanged(fetch)
+    assert fetched == ["/1", "/2"]
+    assert list(pages) == ["/1", "/2", "/3"]
+
+    importer.http = StubHttpClient(processed={"/1", "/2", "/3"})
+    assert importer.fetch_unless_unchanged(fetch) is None
+
+
+@pytest.mark.django_db
+def test_save_events_creates_events(importer, keyword, keyword2, languages):
+    infos = [
+        make_event_info(importer, "1", keywords=[keyword]),
+        make_event_info(importer, "2", keywords=[keyword, keyword2]),
+    ]
+    infos[0]["in_language"] = languages[:2]
+
+    objs = importer.save_events(infos)
+
+    assert [obj.id for obj in objs] == [
+        "%s:1" % importer.data_source.id,
+        "%s:2" % importer.data_source.id,
+    ]
+    assert all(obj._created for obj in objs)
+    first = Event.objects.get(id=objs[0].id)
+    second = Event.objects.get(id=objs[1].id)
+    assert first.name_fi == "Tapahtuma"
+    assert set(first.keywords.all()) == {keyword}
+    assert set(second.keywords.all()) == {keyword, keyword2}
+    assert set(first.in_language.all()) == set(languages[:2])
+    assert first.offers.get().is_free
+    # new events are roots of separate trees
+    assert first.tree_id != second.tree_id
+    assert first.get_descendant_count() == 0
+
+
+@pytest.mark.django_db
+def test_save_events_matches_save_event(importer, keyword, keyword2):
+    importer.save_event(make_event_info(importer, "1", keywords=[keyword]))
+    importer.save_events([make_event_info(importer, "2", keywords=[keyword])])
+
+    single = Event.objects.get(origin_id="1", data_source=importer.data_source)
+    batched = Event.objects.get(origin_id="2", data_source=importer.data_source)
+    for field in (
+        "name_fi",
+        "has_start_time",
+        "has_end_time",
+        "deleted",
+        "event_status",
+    ):
+        assert getattr(single, field) == getattr(batched, field)
+    assert set(single.keywords.all()) == set(batched.keywords.all())
+    assert set(o.simple_value() for o in single.offers.all()) == set(
+        o.simple_value() for o in batched.offers.all()
+    )
+
+
+@pytest.mark.django_db
+def test_save_events_diffs_existing_events(importer, keyword, keyword2):
+    importer.save_events(
+        [
+            make_event_info(importer, "1", keywords=[keyword]),
+            make_event_info(importer, "2", keywords=[keyword]),
+        ]
+    )
+
+    unchanged = make_event_info(importer, "1", keywords=[keyword])
+    changed = make_event_info(importer, "2", keywords=[keyword2], name="Uusi nimi")
+    unchanged["start_time"] = Event.objects.get(origin_id="1").start_time
+    unchanged["end_time"] = Event.objects.get(origin_id="1").end_time
+    changed["start_time"] = Event.objects.get(origin_id="2").start_time
+    changed["end_time"] = Event.objects.get(origin_id="2").end_time
+
+    first, second = importer.save_events([unchanged, changed])
+
+    assert not first._created and not first._changed
+    assert not second._created and second._changed
+    assert "name_fi" in second._changed_fields
+    assert "keywords" in second._changed_fields
+    event = Event.objects.get(id=second.id)
+    assert event.name_fi == "Uusi nimi"
+    assert set(event.keywords.all()) == {keyword2}
+
+
+@pytest.mark.django_db
+def test_save_events_saves_the_last_copy_of_a_repeated_event(importer):
+    first = make_event_info(importer, "1")
+    last = make_event_info(importer, "1", name="Viimeinen")
+
+    objs = importer.save_events([first, make_event_info(importer, "2"), last])
+
+    assert [obj.origin_id for obj in objs] == ["1", "2", "1"]
+    assert objs[0] is objs[2]
+    assert Event.objects.get(origin_id="1").name_fi == "Viimeinen"
+
+
+@pytest.mark.django_db
+def test_save_events_does_not_remove_keywords_from_user_edited_event(
+    importer, keyword, keyword2, user
+):
+    (obj,) = importer.save_events([make_event_info(importer, "1", keywords=[keyword])])
+    importer.data_source.user_editable = True
+    importer.data_source.save()
+    Event.objects.filter(id=obj.id).update(last_modified_by=user)
+
+    info = make_event_info(importer, "1", keywords=[keyword2])
+    info["start_time"] = obj.start_time
+    info["end_time"] = obj.end_time
+    importer.save_events([info])
+
+    event = Event.objects.get(id=obj.id)
+    assert set(event.keywords.all()) == {keyword, keyword2}
+
+
+@pytest.mark.django_db
+def test_save_events_rejects_kept_deprecated_keywords(
+    importer, keyword, keyword2, user
+):
+    (obj,) = importer.save_events([make_event_info(importer, "1", keywords=[keyword])])
+    importer.data_source.user_editable = True
+    importer.data_source.save()
+    Event.objects.filter(id=obj.id).update(last_modified_by=user)
+    Keyword.objects.filter(id=keyword.id).update(deprecated=True)
+
+    info = make_event_info(importer, "1", keywords=[keyword2])
+    info["start_time"] = obj.start_time
+    info["end_time"] = obj.end_time
+    with pytest.raises(ValidationError):
+        importer.save_events([info])
+    assert set(Event.objects.get(id=obj.id).keywords.all()) == {keyword}
+
+
+@pytest.mark.django_db
+def test_sync_events_saves_only_changed_events_until_full_import(importer):
+    queryset = Event.objects.filter(data_source=importer.data_source, deleted=False)
+    infos = [make_event_info(importer, "1"), make_event_info(importer, "2")]
+
+    # the first import of a data source is always a full one
+    saved = [obj.origin_id for _, obj in importer.sync_events(infos, queryset)]
+    assert saved == ["1", "2"]
+
+    infos[1]["name"]["fi"] = "Muutettu"
+    saved = [obj.origin_id for _, obj in importer.sync_events(infos, queryset)]
+    assert saved == ["2"]
+    assert Event.objects.get(origin_id="2").name_fi == "Muutettu"
+
+    # removed events are only deleted by full imports
+    list(importer.sync_events(infos[1:], queryset))
+    assert not Event.objects.get(origin_id="1").deleted
+    importer.options["full"] = True
+    saved = [obj.origin_id for _, obj in importer.sync_events(infos[1:], queryset)]
+    assert saved == ["2"]
+    assert Event.objects.get(origin_id="1").deleted
+
+
+@pytest.mark.django_db
+def test_sync_events_reimports_events_modified_since_last_import(importer):
+    queryset = Event.objects.filter(data_source=importer.data_source, deleted=False)
+    infos = [make_event_info(importer, "1"), make_event_info(importer, "2")]
+    list(importer.sync_events(infos, queryset))
+
+    Event.objects.filter(origin_id="1").update(
+        name_fi="Muokattu", last_modified_time=timezone.now()
+    )
+    Event.objects.filter(origin_id="2").update(deleted=True)
+    saved = [obj.origin_id for _, obj in importer.sync_events(infos, queryset)]
+    assert saved == ["1", "2"]
+    assert Event.objects.get(origin_id="1").name_fi == "Tapahtuma"
+    assert not Event.objects.get(origin_id="2").deleted
+
+    saved = [obj.origin_id for _, obj in importer.sync_events(infos, queryset)]
+    assert saved == []
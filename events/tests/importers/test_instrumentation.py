@@ -0,0 +1,37 @@
+import json
+import time
+
+import pytest
+
+from events.importer.instrumentation import ImportReport
+from events.models import Event
+
+
+def test_import_report_phases_do_not_overlap():
+    report = ImportReport("dummy")
+    with report.phase("parse"):
+        time.sleep(0.02)
+        with report.phase("save"):
+            time.sleep(0.05)
+    assert 0.02 <= report.phases["parse"] < 0.05
+    assert report.phases["save"] >= 0.05
+
+
+@pytest.mark.django_db
+def test_import_report_records_run(event, tmp_path):
+    report = ImportReport("dummy")
+    profile_file = tmp_path / "run.prof"
+    with report.run(str(profile_file), trace_memory=True):
+        with report.import_type("events"):
+            event = Event.objects.get(id=event.id)
+            report.count_saved([event])
+            report.count("deleted", 2)
+    report.write(str(tmp_path / "reports" / "run.json"))
+
+    data = json.loads((tmp_path / "reports" / "run.json").read_text())
+    assert data["importer"] == "dummy"
+    assert data["queries"]["count"] == 1
+    assert data["counts"] == {"unchanged": 1, "deleted": 2}
+    assert set(data["imports"]) == {"events"}
+    assert data["peak_memory"] > 0
+    assert profile_file.exists()
@@ -0,0 +1,50 @@
+import pytest
+from django.db import connection
+
+from events.importer.orchestrator import importer_lock, ImportJob, plan_jobs
+
+
+def test_plan_jobs_orders_by_dependencies():
+    jobs = plan_jobs(
+        ["kulke", "tprek", "yso", "harrastushaku"],
+        ["keywords", "places", "events", "courses"],
+    )
+    keywords = {("kulke", "keywords"), ("yso", "keywords")}
+    places = {("tprek", "places"), ("harrastushaku", "places")}
+    assert jobs == [
+        ImportJob("kulke", "keywords", frozenset()),
+        ImportJob("yso", "keywords", frozenset()),
+        ImportJob("tprek", "places", frozenset()),
+        ImportJob("harrastushaku", "places", frozenset()),
+        ImportJob("kulke", "events", keywords | places),
+        ImportJob("kulke", "courses", keywords | places | {("kulke", "events")}),
+        ImportJob("harrastushaku", "courses", keywords | places),
+    ]
+
+
+def test_plan_jobs_skips_unrequested_types():
+    assert plan_jobs(["kulke", "tprek"], ["events"]) == [
+        ImportJob("kulke", "events", frozenset())
+    ]
+
+
+def _advisory_lock_count():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_importer_lock_is_released():
+    with importer_lock("tprek"):
+        assert _advisory_lock_count() == 1
+    assert _advisory_lock_count() == 0
+
+
+@pytest.mark.django_db
+def test_importer_lock_locks_each_data_source_once():
+    with importer_lock("tprek", "ahjo", "tprek"):
+        assert _advisory_lock_count() == 2
+    assert _advisory_lock_count() == 0
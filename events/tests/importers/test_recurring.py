@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+from events.importer.base import Importer, recur_dict
+from events.importer.recurring import fingerprint, FingerprintStore, RecurringGrouper
+
+
+def test_fingerprint_ignores_ordering():
+    start = datetime(2020, 1, 1, 18)
+    first = {"name": {"fi": "Näytelmä", "sv": "Pjäs"}, "keywords": {"a", "b"}}
+    second = {"keywords": {"b", "a"}, "name": {"sv": "Pjäs", "fi": "Näytelmä"}}
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint([start]) == fingerprint([start])
+    assert fingerprint(first) != fingerprint({**first, "keywords": {"a"}})
+
+
+def test_recurring_grouper_groups_in_one_pass():
+    grouper = RecurringGrouper()
+    assert not grouper.add(1, {"name": "a"}).is_recurring
+    assert not grouper.add(2, {"name": "b"}).is_recurring
+    assert grouper.add(3, {"name": "a"}).is_recurring
+    assert [list(group.members) for group in grouper] == [[1, 3], [2]]
+    assert [group.common for group in grouper.recurring()] == [{"name": "a"}]
+
+
+def test_recurring_grouper_moves_regrouped_members():
+    grouper = RecurringGrouper()
+    grouper.add(1, {"name": "a"})
+    grouper.add(2, {"name": "b"})
+    grouper.add(1, {"name": "b"})
+    assert [list(group.members) for group in grouper] == [[2, 1]]
+
+
+def test_recurring_group_fingerprint_follows_member_data():
+    grouper = RecurringGrouper()
+    group = grouper.add(1, {"name": "a"}, {"start": "18:00"})
+    before = group.fingerprint()
+    grouper.set_data(1, {"start": "19:00"})
+    assert group.fingerprint() != before
+    grouper.set_data(1, {"start": "18:00"})
+    assert group.fingerprint() == before
+
+
+def test_link_recurring_events():
+    def make_event(name, place, instance):
+        event = recur_dict()
+        event["common"]["name"]["fi"] = name
+        event["common"]["location"] = place
+        event["instance"] = instance
+        return event
+
+    events = [
+        make_event("Konsertti", "a", 1),
+        make_event("Teatteri", "a", 2),
+        make_event("Konsertti", "a", 3),
+        make_event("Konsertti", "b", 4),
+    ]
+    linked = Importer.link_recurring_events(None, events)
+    assert [(e["instance"], e.get("children")) for e in linked] == [
+        (1, [1, 3]),
+        (2, None),
+        (4, None),
+    ]
+
+
+@pytest.mark.django_db
+def test_recurring_grouper_skips_unchanged_groups(event, data_source):
+    group = RecurringGrouper(FingerprintStore(data_source)).add(1, {"name": "a"})
+    RecurringGrouper(FingerprintStore(data_source)).mark_saved(group, event)
+
+    grouper = RecurringGrouper(FingerprintStore(data_source))
+    assert grouper.is_unchanged(grouper.add(1, {"name": "a"}), event)
+    assert not grouper.is_unchanged(grouper.add(2, {"name": "a"}), event)
+
+
+@pytest.mark.django_db
+def test_fingerprint_store_remembers_fingerprints(
+    event, data_source, django_assert_num_queries
+):
+    FingerprintStore(data_source).save(event, "1" * 40)
+
+    with django_assert_num_queries(1):
+        store = FingerprintStore(data_source)
+        assert store.is_unchanged(event, "1" * 40)
+        assert not store.is_unchanged(event, "2" * 40)
+        store.save(event, "1" * 40)
+
+    store.save(event, "2" * 40)
+    assert FingerprintStore(data_source).is_unchanged(event, "2" * 40)
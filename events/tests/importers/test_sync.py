@@ -0,0 +1,104 @@
+import pytest
+from django.db.models.signals import post_save
+
+from events.importer.sync import IdSyncher
+from events.models import Place
+
+
+@pytest.fixture
+def make_places(data_source, organization):
+    def _make_places(count):
+        return [
+            Place.objects.create(
+                id="%s:%d" % (data_source.id, i),
+                origin_id=str(i),
+                data_source=data_source,
+                publisher=organization,
+                name_fi="Paikka %d" % i,
+            )
+            for i in range(count)
+        ]
+
+    return _make_places
+
+
+@pytest.mark.django_db
+def test_id_syncher_loads_objects_lazily(make_places, django_assert_num_queries):
+    places = make_places(3)
+    syncher = IdSyncher(Place.objects.all(), "origin_id", {"deleted": True})
+
+    with django_assert_num_queries(1):
+        syncher.load(["0", "1", "missing"])
+        assert syncher.get("0") == places[0]
+        assert syncher.get("1") == places[1]
+    assert syncher.get("2") == places[2]
+    assert syncher.get("missing") is None
+    assert not syncher.get("0")._changed
+
+
+@pytest.mark.django_db
+def test_id_syncher_soft_deletes_unmarked_objects(make_places):
+    places = make_places(6)
+    deleted_ids = []
+    syncher = IdSyncher(
+        Place.objects.all(),
+        "origin_id",
+        {"deleted": True},
+        after_delete=deleted_ids.extend,
+    )
+
+    for place in places[1:]:
+        syncher.mark(place)
+    syncher.finish()
+
+    assert deleted_ids == [places[0].id]
+    assert list(Place.objects.filter(deleted=True)) == [places[0]]
+
+
+@pytest.mark.django_db
+def test_id_syncher_keeps_the_deletion_safety_check(make_places):
+    places = make_places(10)
+    syncher = IdSyncher(Place.objects.all(), "origin_id", {"deleted": True})
+
+    for place in places[:2]:
+        syncher.mark(place)
+    with pytest.raises(Exception):
+        syncher.finish()
+    assert not Place.objects.filter(deleted=True).exists()
+
+    syncher.finish(force=True)
+    assert Place.objects.filter(deleted=True).count() == 8
+
+
+@pytest.mark.django_db
+def test_id_syncher_leaves_objects_modified_during_import(make_places):
+    places = make_places(2)
+    syncher = IdSyncher(Place.objects.all(), "origin_id", {"deleted": True})
+
+    places[0].name_fi = "Muokattu"
+    places[0].save()
+    syncher.mark(places[1])
+    syncher.finish()
+
+    assert not Place.objects.filter(deleted=True).exists()
+
+
+@pytest.mark.django_db
+def test_id_syncher_sends_post_save_with_the_deleted_rows(make_places):
+    places = make_places(2)
+    saved = []
+
+    def receiver(instance, **kwargs):
+        saved.append(instance)
+
+    post_save.connect(receiver, sender=Place)
+    try:
+        syncher = IdSyncher(Place.objects.all(), "origin_id", {"deleted": True})
+        syncher.mark(places[1])
+        syncher.finish()
+    finally:
+        post_save.disconnect(receiver, sender=Place)
+
+    assert [place.id for place in saved] == [places[0].id]
+    assert saved[0].deleted
+    assert saved[0].name_fi == places[0].name_fi
@@ -0,0 +1,73 @@
+import pytest
+
+from events.importer.yso import ConceptCollector, parse_turtle, YsoImporter
+from events.models import Keyword, KeywordLabel
+
+TURTLE = """@prefix yso: <http://www.yso.fi/onto/yso/> .
+@prefix skos: <http://www.w3.org/2004/02/skos/core#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix dct: <http://purl.org/dc/terms/> .
+
+yso:p1 a skos:Concept ;
+    skos:prefLabel "kissa"@fi, "katt"@sv ;
+    skos:altLabel "kisu"@fi .
+
+yso:p2 a skos:Concept ;
+    skos:inScheme yso:aggregateconceptscheme ;
+    skos:prefLabel \"\"\"lemmikit
+ja muut.\"\"\"@fi .
+
+yso:p3 a skos:Concept ;
+    owl:deprecated true ;
+    dct:isReplacedBy yso:p1 .
+"""
+
+
+def parse(data):
+    collector = ConceptCollector()
+    parse_turtle(data.splitlines(), collector, chunk_lines=1)
+    return collector.concepts
+
+
+def test_parse_turtle_collects_concepts():
+    concepts = parse(TURTLE)
+
+    kissa = concepts["http://www.yso.fi/onto/yso/p1"]
+    assert kissa.is_concept and not kissa.deprecated and not kissa.aggregate
+    assert kissa.names == {"fi": "kissa", "sv": "katt"}
+    assert kissa.alt_labels == {("kisu", "fi")}
+    assert concepts["http://www.yso.fi/onto/yso/p2"].aggregate
+    assert concepts["http://www.yso.fi/onto/yso/p2"].names["fi"] == "lemmikit\nja muut."
+    assert concepts["http://www.yso.fi/onto/yso/p3"].deprecated
+    assert (
+        concepts["http://www.yso.fi/onto/yso/p3"].replaced_by
+        == "http://www.yso.fi/onto/yso/p1"
+    )
+
+
+@pytest.mark.django_db
+def test_save_keywords_applies_differences(languages):
+    importer = YsoImporter({"force": False})
+    old = Keyword.objects.create(
+        id="yso:p3",
+        name="vanha",
+        data_source=importer.data_source,
+        publisher=importer.organization,
+    )
+
+    importer.save_keywords(parse(TURTLE))
+
+    kissa = Keyword.objects.get(id="yso:p1")
+    assert (kissa.name_fi, kissa.name_sv) == ("kissa", "katt")
+    assert kissa.publisher == importer.organization
+    assert [label.name for label in kissa.alt_labels.all()] == ["kisu"]
+    assert Keyword.objects.get(id="yso:p2").aggregate
+    old.refresh_from_db()
+    assert old.deprecated
+    assert old.replaced_by == kissa
+
+    importer.save_keywords(parse(TURTLE.replace('"katt"@sv', '"kissan"@sv')))
+
+    kissa.refresh_from_db()
+    assert kissa.name_sv == "kissan"
+    assert KeywordLabel.objects.count() == 1
@@ -1,14 +1,17 @@
-from unittest.mock import MagicMock
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
 
 import pytest
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
 from django_orghierarchy.models import Organization
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from ..api import (
     EventSerializer,
+    EventViewSet,
     get_authenticated_data_source_and_publisher,
     OrganizationListSerializer,
 )
@@ -36,6 +39,35 @@ def test_api_page_size(api_client, event):
     assert len(resp.data["data"]) <= 100
 
 
+@pytest.mark.django_db
+def test_streamed_list_is_same_as_buffered(api_client, make_event, settings):
+    for i in range(5):
+        make_event("streamed_%d" % i, timezone.now() + timedelta(days=i + 1))
+    url = reverse("event-list") + "?sort=start_time&page_size=3&page=%d"
+    for page in (1, 2):
+        buffered = api_client.get(url % page)
+        assert not buffered.streaming
+        settings.STREAMING_PAGE_SIZE = 3
+        # the second page ends in the middle of a chunk
+        with patch.object(EventViewSet, "streaming_chunk_size", 2):
+            streamed = api_client.get(url % page)
+        settings.STREAMING_PAGE_SIZE = 0
+        assert streamed.status_code == 200
+        assert streamed.streaming
+        assert streamed["Content-Type"] == buffered["Content-Type"]
+        assert b"".join(streamed.streaming_content) == buffered.content
+
+
+@pytest.mark.django_db
+def test_list_is_not_streamed_below_page_size(api_client, event, settings):
+    settings.STREAMING_PAGE_SIZE = 50
+    response = api_client.get(reverse("event-list") + "?page_size=20")
+    assert not response.streaming
+    # invalid pages fail before the response starts
+    response = api_client.get(reverse("event-list") + "?page_size=50&page=2")
+    assert response.status_code == 404
+
+
 @pytest.mark.django_db
 def test_get_authenticated_data_source_and_publisher(data_source):
     org = Organization.objects.create(
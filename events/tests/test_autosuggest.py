@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from events.autosuggest import (
+    AUTOSUGGEST_SYNC_INTERVAL,
+    AutosuggestIndex,
+    get_autosuggest_index,
+    reset_autosuggest_index,
+)
+from events.models import Keyword
+
+
+@pytest.fixture(autouse=True)
+def autosuggest_index():
+    reset_autosuggest_index()
+    yield
+    reset_autosuggest_index()
+
+
+def suggest_ids(index, text, *args):
+    return [entry.id for entry in index.suggest(text, *args)]
+
+
+def load_index():
+    index = AutosuggestIndex()
+    index.load()
+    return index
+
+
+@pytest.mark.django_db
+def test_suggest_prefixes(keyword, place, event):
+    index = load_index()
+    assert suggest_ids(index, "avain") == [keyword.id]
+    assert suggest_ids(index, "TUNNETTU av") == [keyword.id]
+    assert suggest_ids(index, "paik") == [place.id]
+    assert suggest_ids(index, "tapaht", ["event"]) == [event.id]
+    assert suggest_ids(index, "tapaht", ["place"]) == []
+
+
+@pytest.mark.django_db
+def test_suggest_ranks_by_n_events(data_source, organization, make_keyword):
+    rare = make_keyword(data_source, organization, "konsertti")
+    common = make_keyword(data_source, organization, "konserttisali")
+    Keyword.objects.filter(id=common.id).update(n_events=5)
+    index = load_index()
+    assert suggest_ids(index, "konser") == [common.id, rare.id]
+
+
+@pytest.mark.django_db
+def test_suggest_fuzzy_matches(keyword):
+    index = load_index()
+    assert suggest_ids(index, "tunnettu avainsna") == [keyword.id]
+    assert suggest_ids(index, "xyzzy") == []
+
+
+@pytest.mark.django_db
+def test_suggest_reloads_queued_objects(keyword, keyword2):
+    index = load_index()
+    keyword2.deprecated = True
+    keyword2.save()
+    assert suggest_ids(index, "known") == [keyword2.id]
+    index.queue("keyword", [keyword2.id])
+    assert suggest_ids(index, "known") == []
+
+
+@pytest.mark.django_db
+def test_saved_objects_are_queued_on_commit(keyword):
+    index = get_autosuggest_index()
+    with patch(
+        "events.autosuggest.transaction.on_commit", side_effect=lambda func: func()
+    ):
+        keyword.name_fi = "uusi nimi"
+        keyword.save()
+    assert index.pending == {"keyword": {keyword.id}}
+    assert suggest_ids(index, "uusi") == [keyword.id]
+    assert index.pending == {}
+
+
+@pytest.mark.django_db
+def test_sync_drops_ended_events(event):
+    index = load_index()
+    assert ("event", event.id) in index.entries
+    index.sync_checked -= AUTOSUGGEST_SYNC_INTERVAL
+    index._queue_modified = lambda: None
+    with patch(
+        "events.autosuggest.timezone.now",
+        return_value=event.end_time + timedelta(minutes=1),
+    ):
+        index.refresh()
+    assert ("event", event.id) not in index.entries
+    assert index.expiry == []
+
+
+@pytest.mark.django_db
+def test_autosuggest_endpoint(api_client, place):
+    response = api_client.get("/v1/autosuggest/", {"input": "paik"}, format="json")
+    assert response.status_code == 200, str(response.content)
+    assert response.data["data"][0]["id"] == place.id
+    assert response.data["data"][0]["resource_type"] == "place"
+    assert response.data["data"][0]["@id"].endswith("/place/%s/" % place.id)
+
+    response = api_client.get(
+        "/v1/autosuggest/", {"input": "paik", "type": "organization"}, format="json"
+    )
+    assert response.status_code == 400
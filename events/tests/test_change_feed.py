@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from events import api
+from events.models import Event, Keyword, Place, PublicationStatus
+
+from .utils import get
+from .utils import versioned_reverse as reverse
+
+RESOURCE_TYPES = ["keyword", "place", "event"]
+
+
+@pytest.fixture(autouse=True)
+def no_settle_time(settings):
+    settings.CHANGE_FEED_SETTLE_TIME = 0
+
+
+def get_changes(api_client, data=None):
+    return get(api_client, reverse("change-list"), data=data)
+
+
+def touch(*objs, timestamp):
+    for obj in objs:
+        obj.__class__.objects.filter(id=obj.id).update(last_modified_time=timestamp)
+
+
+@pytest.mark.django_db
+def test_change_feed_pages_changes_with_equal_timestamps(
+    api_client, event, event2, keyword, keyword2
+):
+    timestamp = timezone.now() - timedelta(minutes=1)
+    objs = [event, event2, event.location, event2.location, keyword, keyword2]
+    touch(*objs, timestamp=timestamp)
+    expected = sorted(
+        ((obj._meta.model_name, obj.id) for obj in objs),
+        key=lambda change: (change[1], RESOURCE_TYPES.index(change[0])),
+    )
+
+    changes = []
+    data = {"page_size": 4}
+    while True:
+        response = get_changes(api_client, data)
+        changes += [
+            (item["resource_type"], item["id"]) for item in response.data["data"]
+        ]
+        data["since"] = response.data["meta"]["cursor"]
+        if not response.data["meta"]["has_more"]:
+            break
+    assert changes == expected
+
+    response = get_changes(api_client, data)
+    assert response.data["data"] == []
+    assert response.data["meta"]["cursor"] == data["since"]
+
+    touch(keyword, timestamp=timezone.now())
+    response = get_changes(api_client, data)
+    assert [item["id"] for item in response.data["data"]] == [keyword.id]
+
+
+@pytest.mark.django_db
+def test_change_feed_holds_back_recent_changes(api_client, keyword, settings):
+    settings.CHANGE_FEED_SETTLE_TIME = 60
+    touch(keyword, timestamp=timezone.now() - timedelta(seconds=30))
+    response = get_changes(api_client, {"type": "keyword"})
+    assert response.data["data"] == []
+
+    touch(keyword, timestamp=timezone.now() - timedelta(seconds=90))
+    response = get_changes(api_client, {"type": "keyword"})
+    assert [item["id"] for item in response.data["data"]] == [keyword.id]
+
+
+@pytest.mark.django_db
+def test_change_feed_returns_tombstones(api_client, event, place, place2, keyword):
+    Event.objects.filter(id=event.id).update(deleted=True)
+    Place.objects.filter(id=place.id).update(deleted=True, replaced_by=place2)
+    Keyword.objects.filter(id=keyword.id).update(deprecated=True)
+    touch(event, place, place2, keyword, timestamp=timezone.now())
+
+    response = get_changes(api_client, {"type": "event,place"})
+    changes = {item["id"]: item for item in response.data["data"]}
+    assert set(changes) == {event.id, place.id, place2.id}
+    assert changes[event.id]["deleted"] is True
+    assert changes[event.id]["replaced_by"] is None
+    assert changes[place.id]["replaced_by"].endswith(
+        reverse("place-detail", kwargs={"pk": place2.id})
+    )
+    assert changes[place2.id]["name"]["en"] == "Place 2"
+
+    response = get_changes(api_client, {"type": "keyword"})
+    assert response.data["data"][0]["deleted"] is True
+
+
+@pytest.mark.django_db
+def test_change_feed_hides_drafts_replicas_have_not_seen(api_client, event, event2):
+    Event.objects.filter(id__in=[event.id, event2.id]).update(
+        created_time=timezone.now() - timedelta(minutes=2)
+    )
+    touch(event, event2, timestamp=timezone.now() - timedelta(minutes=1))
+    cursor = get_changes(api_client, {"type": "event"}).data["meta"]["cursor"]
+
+    Event.objects.filter(id=event.id).update(
+        publication_status=PublicationStatus.DRAFT, last_modified_time=timezone.now()
+    )
+    Event.objects.filter(id=event2.id).update(
+        publication_status=PublicationStatus.DRAFT,
+        created_time=timezone.now(),
+        last_modified_time=timezone.now(),
+    )
+
+    response = get_changes(api_client, {"type": "event", "since": cursor})
+    assert [(item["id"], item["deleted"]) for item in response.data["data"]] == [
+        (event.id, True)
+    ]
+    assert "name" not in response.data["data"][0]
+    response = get_changes(api_client, {"type": "event"})
+    assert response.data["data"] == []
+
+
+@pytest.mark.django_db
+def test_change_feed_waits_for_new_changes(api_client, keyword, monkeypatch):
+    touch(keyword, timestamp=timezone.now() - timedelta(minutes=1))
+    cursor = get_changes(api_client, {"type": "keyword"}).data["meta"]["cursor"]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        touch(keyword, timestamp=timezone.now())
+
+    monkeypatch.setattr(api.time, "sleep", sleep)
+    response = get_changes(api_client, {"type": "keyword", "since": cursor, "wait": 5})
+    assert sleeps == [api.CHANGE_FEED_POLL_INTERVAL]
+    assert [item["id"] for item in response.data["data"]] == [keyword.id]
+
+
+@pytest.mark.django_db
+def test_change_feed_rejects_invalid_parameters(api_client):
+    response = api_client.get(reverse("change-list"), {"since": "not a cursor"})
+    assert response.status_code == 400
+    response = api_client.get(reverse("change-list"), {"type": "image"})
+    assert response.status_code == 400
@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from httmock import all_requests, HTTMock
+
+from events.exporter.city_sdk import citysdk_mock, CitySDKExporter, EVENTS_URL
+from events.models import Event, ExportInfo, Keyword, Place
+
+
+@pytest.fixture
+def citysdk_requests():
+    sent = []
+
+    @all_requests
+    def recording_mock(url, request):
+        sent.append((request.method, request.url))
+        return citysdk_mock(url, request)
+
+    with HTTMock(recording_mock):
+        yield sent
+
+
+def exported_ids(klass):
+    return set(
+        ExportInfo.objects.filter(
+            content_type=ContentType.objects.get_for_model(klass),
+            target_system=CitySDKExporter.name,
+        ).values_list("object_id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_citysdk_export_sends_only_changes(event, keyword, citysdk_requests):
+    event.keywords.add(keyword)
+    exporter = CitySDKExporter()
+
+    exporter.export_events()
+    assert exported_ids(Keyword) == {keyword.id}
+    assert exported_ids(Place) == {event.location_id}
+    assert exported_ids(Event) == {event.id}
+    assert sorted(method for method, _ in citysdk_requests) == ["GET"] + ["PUT"] * 3
+
+    del citysdk_requests[:]
+    exporter.export_events()
+    assert citysdk_requests == []
+
+    last_exported_time = ExportInfo.objects.get(object_id=event.id).last_exported_time
+
+    ExportInfo.objects.create(
+        content_type=ContentType.objects.get_for_model(Event),
+        object_id="test:deleted_event",
+        target_id="deleted",
+        target_system=CitySDKExporter.name,
+    )
+    Event.objects.filter(id=event.id).update(
+        last_modified_time=timezone.now() + timedelta(minutes=1)
+    )
+    exporter.export_events()
+    assert exported_ids(Event) == {event.id}
+    assert sorted(citysdk_requests) == [
+        ("DELETE", EVENTS_URL + "deleted"),
+        ("POST", EVENTS_URL),
+    ]
+    export_info = ExportInfo.objects.get(object_id=event.id)
+    assert export_info.last_exported_time > last_exported_time
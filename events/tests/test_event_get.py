@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 import pytest
 import pytz
@@ -7,8 +8,11 @@ from dateutil import parser
 from django.conf import settings
 from django.contrib.gis.gdal import CoordTransform, SpatialReference
 from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from freezegun import freeze_time
 
+from events.api import KeywordSerializer
 from events.models import Event, Language, PublicationStatus
 from events.tests.conftest import APIClient
 from events.tests.utils import assert_fields_exist, datetime_zone_aware, get
@@ -1064,3 +1068,48 @@ def test_private_datasource_events(
     other_data_source.save()
     get_list_and_assert_events("", [event, event3])
     get_list_and_assert_events(f"data_source={other_data_source.id}", [event2])
+
+
+@pytest.mark.django_db
+def test_event_list_sparse_fieldset(api_client, event):
+    with CaptureQueriesContext(connection) as queries:
+        response = get_list(api_client, data={"fields": "name,start_time,location"})
+    assert set(response.data["data"][0]) == {
+        "@id",
+        "@type",
+        "id",
+        "name",
+        "start_time",
+        "location",
+    }
+    sql = " ".join(query["sql"] for query in queries.captured_queries)
+    assert "description_fi" not in sql
+    assert "events_offer" not in sql
+
+
+@pytest.mark.django_db
+def test_event_list_exclude_fields(api_client, event):
+    response = get_list(api_client, data={"exclude_fields": "description,offers"})
+    data = response.data["data"][0]
+    assert "description" not in data
+    assert "offers" not in data
+    assert data["name"]["fi"] == event.name_fi
+
+    response = get_list_no_code_assert(api_client, data={"fields": "name,nonsense"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_event_list_expands_shared_keywords_once(api_client, event, event2, keyword):
+    event.keywords.add(keyword)
+    event2.keywords.add(keyword)
+    with patch.object(
+        KeywordSerializer,
+        "to_representation",
+        autospec=True,
+        side_effect=KeywordSerializer.to_representation,
+    ) as to_representation:
+        response = get_list(api_client, data={"include": "keywords"})
+    assert to_representation.call_count == 1
+    for data in response.data["data"]:
+        assert [kw["id"] for kw in data["keywords"]] == [keyword.id]
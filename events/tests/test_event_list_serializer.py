@@ -0,0 +1,104 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+from rest_framework.serializers import ListSerializer
+
+from events.api import EventListSerializer
+from events.models import Event, EventLink, Image, Offer, PublicationStatus, Video
+from events.tests.utils import versioned_reverse as reverse
+
+
+def get_list_content(client, version, query_string):
+    url = "%s?%s" % (reverse("event-list", version=version), query_string)
+    response = client.get(url, format="json")
+    assert response.status_code == 200, str(response.content)
+    return response.content
+
+
+def assert_same_as_drf(client, version="v1", query_string=""):
+    compiled = get_list_content(client, version, query_string)
+    with patch.object(
+        EventListSerializer, "to_representation", ListSerializer.to_representation
+    ):
+        drf = get_list_content(client, version, query_string)
+    assert compiled == drf
+
+
+@pytest.fixture
+def varied_events(
+    event, event2, make_event, keyword, keyword2, languages, data_source, organization
+):
+    event.keywords.add(keyword, keyword2)
+    event.audience.add(keyword2)
+    event.in_language.add(*languages)
+    event.images.add(
+        Image.objects.create(
+            name="image",
+            data_source=data_source,
+            publisher=organization,
+            url="http://fake.url/image/",
+        )
+    )
+    event.super_event_type = Event.SuperEventType.RECURRING
+    event.name_sv = "evenemang"
+    event.save()
+    event2.super_event = event
+    event2.save()
+    Offer.objects.create(event=event, is_free=False, price="5 €")
+    EventLink.objects.create(
+        event=event, language=languages[0], link="http://fake.url/link/"
+    )
+    Video.objects.create(event=event, url="http://fake.url/video/")
+    date_only = make_event(
+        "date_only",
+        timezone.now().replace(hour=0, minute=0) + timedelta(days=1),
+        timezone.now().replace(hour=0, minute=0) + timedelta(days=3),
+    )
+    date_only.has_start_time = False
+    date_only.has_end_time = False
+    date_only.save()
+    postponed = make_event("postponed")
+    postponed.publication_status = PublicationStatus.DRAFT
+    postponed.save()
+    deleted = make_event("deleted", timezone.now(), timezone.now())
+    deleted.soft_delete()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("version", ["v1", "v0.1"])
+@pytest.mark.parametrize(
+    "query_string",
+    [
+        "",
+        "include=location,keywords,audience,in_language,sub_events",
+        "fields=id,name,start_time,end_time,keywords",
+        "exclude_fields=description,offers",
+        "show_deleted=true",
+        "sort=start_time&start=today",
+    ],
+)
+def test_list_is_serialized_as_with_drf(
+    api_client, varied_events, version, query_string
+):
+    assert_same_as_drf(api_client, version, query_string)
+
+
+@pytest.mark.django_db
+def test_list_is_serialized_as_with_drf_for_admins(user_api_client, varied_events):
+    # admins see drafts and the admin-only fields of their events
+    assert_same_as_drf(user_api_client, query_string="show_all=true")
+    assert b"last_modified_by" in get_list_content(
+        user_api_client, "v1", "show_all=true"
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_writes_use_drf(user_api_client, minimal_event_dict):
+    with patch("events.api.compile_representation") as compile_representation:
+        response = user_api_client.post(
+            reverse("event-list"), [minimal_event_dict], format="json"
+        )
+    assert response.status_code == 201, str(response.content)
+    compile_representation.assert_not_called()
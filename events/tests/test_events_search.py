@@ -6,11 +6,13 @@ import datetime
 import haystack
 from django.conf import settings
 from django.test import TestCase
+from haystack.models import SearchResult
 from pytz import timezone
 
 # from haystack.management.commands import rebuild_index, clear_index
 from rest_framework.test import APIClient
 
+from ..api import hydrate_search_results
 from ..models import Event
 from .common import TestDataMixin
 
@@ -66,6 +68,16 @@ class EventSearchTests(TestCase, TestDataMixin):
         self.assertEqual(response.status_code, 200, msg=response.content)
         self.assertTrue(response.data["meta"]["count"] == 0)
 
+    def test__search_results_are_hydrated_in_order(self):
+        results = [
+            SearchResult("events", "event", "test:missing", 2.0),
+            SearchResult("events", "event", self.dummy.pk, 1.0),
+        ]
+        with self.assertLogs("events.api", level="WARNING") as logs:
+            hydrated = hydrate_search_results(results)
+        self.assertEqual([result.object for result in hydrated], [self.dummy])
+        self.assertIn("1 search results dropped", logs.output[0])
+
     # simple backend doesn't have an index, so we cannot test index updates
     # def test__search_shouldnt_return_deleted_matches(self):
     #     self.dummy.deleted = True
@@ -1,6 +1,13 @@
+import io
+
 import pytest
 
-from events.importer.util import replace_location
+from events.importer.util import (
+    chunked,
+    iterparse_elements,
+    merge_by_id,
+    replace_location,
+)
 from events.models import Event
 
 
@@ -12,3 +19,30 @@ def test_replace_location_by_different_source(place, place2, other_data_source,
     replace_location(replace=place, by_source=other_data_source.id)
     updated_event = Event.objects.get(id=event.id)
     assert updated_event.location == place2
+
+
+def test_iterparse_elements_detaches_parsed_elements():
+    source = io.BytesIO(
+        b"<eventdata><meta/><event id='1'><title>a</title></event>"
+        b"<event id='2'/></eventdata>"
+    )
+    seen = []
+    for element in iterparse_elements(source, "event"):
+        assert element.getparent() is None
+        seen.append((element.attrib["id"], element.findtext("title")))
+    assert seen == [("1", "a"), ("2", None)]
+
+
+def test_merge_by_id_merges_languages_in_stream_order():
+    streams = [("fi", [1, 2, 3]), ("sv", [2, 1]), ("en", [1, 4])]
+    merged = list(merge_by_id(streams, lambda item: item))
+    assert merged == [
+        (1, [("fi", 1), ("sv", 1), ("en", 1)]),
+        (2, [("fi", 2), ("sv", 2)]),
+        (4, [("en", 4)]),
+        (3, [("fi", 3)]),
+    ]
+
+
+def test_chunked():
+    assert list(chunked(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
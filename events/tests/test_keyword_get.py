@@ -141,3 +141,38 @@ def test_get_keyword_free_search(api_client, keyword, keyword2, keyword3):
     response = get_list(api_client, data={"free_text": "cheeese"})
     ids = [entry["id"] for entry in response.data["data"]]
     assert ids == [keyword.id, keyword2.id, keyword3.id]
+
+
+@pytest.mark.django_db
+def test_get_keyword_free_search_is_remembered(api_client, keyword, keyword2):
+    keyword.name_fi = "cheese"
+    keyword.save()
+
+    response = get_list(api_client, data={"free_text": "cheese"})
+    assert [entry["id"] for entry in response.data["data"]] == [keyword.id]
+
+    Keyword.objects.filter(id=keyword2.id).update(name_fi="cheese")
+    response = get_list(api_client, data={"free_text": "cheese"})
+    assert [entry["id"] for entry in response.data["data"]] == [keyword.id]
+
+    # saving a keyword forgets the remembered matches
+    keyword2.name_fi = "cheese"
+    keyword2.save()
+    response = get_list(api_client, data={"free_text": "cheese"})
+    assert {entry["id"] for entry in response.data["data"]} == {
+        keyword.id,
+        keyword2.id,
+    }
+
+
+@pytest.mark.django_db
+def test_get_keyword_list_sparse_fieldset(api_client, keyword):
+    response = get_list(
+        api_client,
+        data={"show_all_keywords": True, "exclude_fields": "alt_labels,image"},
+    )
+    data = response.data["data"][0]
+    assert data["id"] == keyword.id
+    assert "name" in data
+    assert "alt_labels" not in data
+    assert "image" not in data
@@ -1,7 +1,14 @@
 import pytest
 from django.contrib.postgres.search import SearchQuery
 
-from events.keywords import KeywordMatcher
+from events.keywords import (
+    InMemoryKeywordMatcher,
+    KeywordMatcher,
+    parse_tsquery,
+    parse_tsvector,
+    trigram_similarity,
+    trigrams,
+)
 from events.models import KeywordLabel, Language
 
 
@@ -70,3 +77,52 @@ def test_keyword_match_trgrm(languages, data_source, organization, keyword, keyw
 
     matcher = KeywordMatcher()
     assert set([keyword2]) == set(matcher.match("asdfghe"))
+
+
+def test_parse_tsvector_and_tsquery():
+    assert parse_tsvector("'foo-bar':1 'foo':2,5A 'it''s':3") == {
+        "foo-bar": [1],
+        "foo": [2, 5],
+        "it's": [3],
+    }
+    assert parse_tsquery("'foo-bar' <-> 'foo' <-> 'bar' & 'baz'") == [
+        [(0, "foo-bar"), (1, "foo"), (2, "bar")],
+        [(0, "baz")],
+    ]
+    assert parse_tsquery("") == []
+
+
+def test_trigram_similarity_matches_pg_trgm():
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    # SELECT similarity('asdfg', 'asdfghe') = 0.5555556
+    assert trigram_similarity(trigrams("asdfg"), trigrams("asdfghe")) == 5 / 9
+
+
+@pytest.mark.django_db
+def test_in_memory_keyword_match_equals_keyword_matcher(
+    languages, data_source, organization, keyword, keyword2, django_assert_num_queries
+):
+    for name, language, kw in [
+        ("lapsi", "fi", keyword),
+        ("teatteri", "fi", keyword2),
+        ("asdfg", "fi", keyword),
+        ("asdfgh", "en", keyword2),
+    ]:
+        label = KeywordLabel.objects.create(
+            language=Language.objects.get(id=language), name=name
+        )
+        kw.alt_labels.add(label)
+
+    texts = ["[lapsi!,teatteriin}", "asdfghe", "lapset", "ei mitään"]
+    matcher = KeywordMatcher()
+    in_memory = InMemoryKeywordMatcher()
+    for language in (None, "fi", "en"):
+        in_memory.prime(texts, language=language)
+        for text in texts:
+            expected = matcher.match(text, language=language)
+            with django_assert_num_queries(0):
+                result = in_memory.match(text, language=language)
+            if expected is None:
+                assert result is None
+            else:
+                assert set(result) == set(expected)
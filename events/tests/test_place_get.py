@@ -198,3 +198,13 @@ def test_get_place_with_upcoming_events(api_client, place, place2, event, past_e
     ids = [entry["id"] for entry in response.data["data"]]
     assert place.id in ids
     assert place2.id in ids
+
+
+@pytest.mark.django_db
+def test_get_place_list_sparse_fieldset(api_client, place):
+    response = get_list(
+        api_client, data={"show_all_places": True, "fields": "name,position"}
+    )
+    data = response.data["data"][0]
+    assert set(data) == {"@id", "@type", "id", "name", "position"}
+    assert data["position"]["type"] == "Point"
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from events.models import Event
+
+
+@pytest.fixture(autouse=True)
+def postgres_search_engine(settings):
+    settings.SEARCH_ENGINE = "postgres"
+
+
+def get_search(api_client, **params):
+    response = api_client.get("/v1/search/", params, format="json")
+    assert response.status_code == 200, str(response.content)
+    return response.data
+
+
+def result_ids(data):
+    return [(result["resource_type"], result["id"]) for result in data["data"]]
+
+
+@pytest.mark.django_db
+def test_search_finds_upcoming_events(api_client, event, past_event):
+    data = get_search(api_client, q="tapahtuma", type="event")
+    assert result_ids(data) == [("event", event.id)]
+    assert data["data"][0]["score"] > 0
+
+
+@pytest.mark.django_db
+def test_search_start_filter_includes_past_events(api_client, event, past_event):
+    start = (timezone.now() - timedelta(days=1)).isoformat()
+    data = get_search(api_client, q="tapahtuma", type="event", start=start)
+    assert {result_id for _, result_id in result_ids(data)} == {
+        event.id,
+        past_event.id,
+    }
+
+
+@pytest.mark.django_db
+def test_search_score_decays_with_end_time(api_client, event, data_source, place):
+    later_event = Event.objects.create(
+        id=data_source.id + ":later_test_event",
+        location=place,
+        data_source=data_source,
+        publisher=event.publisher,
+        start_time=timezone.now() + timedelta(days=60),
+        end_time=timezone.now() + timedelta(days=61),
+        name="tapahtuma",
+    )
+    data = get_search(api_client, q="tapahtuma", type="event")
+    assert result_ids(data) == [("event", event.id), ("event", later_event.id)]
+    # ends two scales from now
+    assert data["data"][1]["score"] < data["data"][0]["score"] / 10
+
+
+@pytest.mark.django_db
+def test_search_filters_places_by_division(api_client, place, administrative_division):
+    division = administrative_division.ocd_id
+    place.divisions.clear()
+    data = get_search(api_client, q="paikka", type="place", division=division)
+    assert result_ids(data) == []
+    place.divisions.add(administrative_division)
+    data = get_search(api_client, q="paikka", type="place", division=division)
+    assert result_ids(data) == [("place", place.id)]
+
+
+@pytest.mark.django_db
+def test_search_autocomplete_matches_prefixes(api_client, event):
+    data = get_search(api_client, input="tapah")
+    assert result_ids(data) == [("event", event.id)]
+
+
+@pytest.mark.django_db
+def test_search_unsupported_language(api_client, event):
+    response = api_client.get(
+        "/v1/search/", {"q": "tapahtuma", "language": "ru"}, format="json"
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_search_vectors_are_not_in_place_api(api_client, place):
+    detail = api_client.get("/v1/place/%s/" % place.id, format="json")
+    listing = api_client.get("/v1/place/", format="json")
+    assert detail.status_code == 200 and listing.status_code == 200
+    for data in [detail.data] + listing.data["data"]:
+        assert not [key for key in data if key.startswith("search_vector")]
@@ -0,0 +1,40 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from haystack import connection_router, connections
+
+from events.models import Event, Place, SearchIndexQueueItem
+from events.search_queue import QueuedSignalProcessor, update_search_index
+
+
+@pytest.fixture(autouse=True)
+def queued_signal_processor():
+    # the realtime signal processor is the default
+    signal_processor = QueuedSignalProcessor(connections, connection_router)
+    yield
+    signal_processor.teardown()
+
+
+def queued(model):
+    return set(
+        SearchIndexQueueItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(model)
+        ).values_list("object_id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_saved_objects_are_queued_for_indexing(event, organization):
+    assert queued(Event) == {event.id}
+    assert queued(Place) == {event.location_id}
+    assert not SearchIndexQueueItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(organization)
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_update_search_index_drains_queue(event):
+    event.deleted = True
+    event.save()
+
+    assert update_search_index() == (1, 1)
+    assert not SearchIndexQueueItem.objects.exists()
@@ -0,0 +1,26 @@
+import pytest
+
+from events.models import Place
+from events.search_rebuild import iter_chunks, rebuild_language, search_languages
+
+
+@pytest.mark.django_db
+def test_iter_chunks_pages_by_primary_key(place, place2, place3):
+    chunks = list(iter_chunks(Place.objects.all(), 2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert {obj.pk for chunk in chunks for obj in chunk} == {
+        place.pk,
+        place2.pk,
+        place3.pk,
+    }
+
+
+def test_search_languages_have_backends():
+    assert {"fi", "sv", "en"} <= set(search_languages())
+
+
+@pytest.mark.django_db
+def test_rebuild_language_counts_indexed_objects(event):
+    result = rebuild_language("fi", batch_size=1)
+    assert result.error is None
+    assert result.counts == {"event": 1, "place": 1}
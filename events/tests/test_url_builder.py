@@ -0,0 +1,41 @@
+import pytest
+from django.urls import NoReverseMatch
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+
+from events.url_builder import get_url_builder
+
+
+def make_request(version="v1"):
+    request = APIRequestFactory().get("/", HTTP_HOST="testserver:8000")
+    request.versioning_scheme = api_settings.DEFAULT_VERSIONING_CLASS()
+    request.version = version
+    return request
+
+
+@pytest.mark.parametrize("version", ["v1", "v0.1"])
+@pytest.mark.parametrize(
+    "pk", ["system:1", "helsinki:agg-1", "a b", "x%y?z#", "ääkköset", 12]
+)
+def test_builder_matches_reverse(version, pk):
+    request = make_request(version)
+    assert get_url_builder(request).build("event-detail", pk) == reverse(
+        "event-detail", kwargs={"pk": pk}, request=request
+    )
+
+
+def test_builder_is_cached_per_request():
+    request = make_request()
+    builder = get_url_builder(request)
+    assert get_url_builder(request) is builder
+    assert get_url_builder(make_request()) is not builder
+
+
+@pytest.mark.parametrize(
+    "view_name,pk", [("event-detail", "a.b"), ("no-such-view", "1")]
+)
+def test_builder_raises_like_reverse(view_name, pk):
+    request = make_request()
+    with pytest.raises(NoReverseMatch):
+        get_url_builder(request).build(view_name, pk)
@@ -0,0 +1,63 @@
+from urllib.parse import quote
+
+from django.urls import NoReverseMatch
+from rest_framework.reverse import reverse
+
+# Stands in for the pk while the URL of a view is resolved
+PK_PLACEHOLDER = "__pk__"
+# Characters left unquoted in URL path segments, as in django.urls.reverse
+SAFE_URL_CHARACTERS = "!$&'()*+,;=" + "/~:@"
+# Characters the router's default lookup regex [^/.]+ does not accept
+INVALID_PK_CHARACTERS = "/.\n"
+
+
+class DetailUrlBuilder(object):
+    """
+    Builds the absolute URLs of detail views by concatenating the pk to the
+    URL prefix of the view, which is resolved once for the request so that
+    the API version and host of the request are honored as in reverse().
+    """
+
+    def __init__(self, request):
+        self.request = request
+        # view name -> (prefix, suffix), or None if the view has no detail URL
+        self.templates = {}
+
+    def _get_template(self, view_name):
+        try:
+            return self.templates[view_name]
+        except KeyError:
+            pass
+        try:
+            url = reverse(
+                view_name, kwargs={"pk": PK_PLACEHOLDER}, request=self.request
+            )
+        except NoReverseMatch:
+            template = None
+        else:
+            prefix, _, suffix = url.rpartition(PK_PLACEHOLDER)
+            template = (prefix, suffix)
+        self.templates[view_name] = template
+        return template
+
+    def build(self, view_name, pk):
+        """Returns the URL of the object, or raises NoReverseMatch like reverse()."""
+        pk = str(pk)
+        template = self._get_template(view_name)
+        if template is None:
+            raise NoReverseMatch("No detail URL for view %s" % view_name)
+        if not pk or any(char in pk for char in INVALID_PK_CHARACTERS):
+            # let the URL resolver decide
+            return reverse(view_name, kwargs={"pk": pk}, request=self.request)
+        return template[0] + quote(pk, safe=SAFE_URL_CHARACTERS) + template[1]
+
+
+def get_url_builder(request):
+    """Returns the URL builder of the request, creating it on first use."""
+    if request is None:
+        return DetailUrlBuilder(None)
+    builder = getattr(request, "_detail_url_builder", None)
+    if builder is None:
+        builder = DetailUrlBuilder(request)
+        request._detail_url_builder = builder
+    return builder
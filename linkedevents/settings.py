@@ -45,12 +45,14 @@ env = environ.Env(
     ADMINS=(list, []),
     ALLOWED_HOSTS=(list, []),
     AUTO_ENABLED_EXTENSIONS=(list, []),
+    CHANGE_FEED_SETTLE_TIME=(int, 300),
     COOKIE_PREFIX=(str, "linkedevents"),
     DATABASE_URL=(str, "postgis:///linkedevents"),
     DEBUG=(bool, False),
     ELASTICSEARCH_URL=(str, None),
     EXTRA_INSTALLED_APPS=(list, []),
     INSTANCE_NAME=(str, "Linked Events"),
+    IMPORTER_CACHE_DIR=(str, ""),
     INTERNAL_IPS=(list, []),
     LANGUAGES=(list, ["fi", "sv", "en", "zh-hans", "ru", "ar"]),
     LIPPUPISTE_EVENT_API_URL=(str, None),
@@ -60,12 +62,15 @@ env = environ.Env(
     MEDIA_ROOT=(environ.Path(), root("media")),
     MEDIA_URL=(str, "/media/"),
     MEMCACHED_URL=(str, "127.0.0.1:11211"),
+    SEARCH_ENGINE=(str, "haystack"),
+    SEARCH_INDEX_UPDATES=(str, "realtime"),
     SECRET_KEY=(str, ""),
     SECURE_PROXY_SSL_HEADER=(tuple, None),
     SENTRY_DSN=(str, ""),
     SENTRY_ENVIRONMENT=(str, "development"),
     STATIC_ROOT=(environ.Path(), root("static")),
     STATIC_URL=(str, "/static/"),
+    STREAMING_PAGE_SIZE=(int, 0),
     SUPPORT_EMAIL=(str, ""),
     SYSTEM_DATA_SOURCE_ID=(str, "system"),
     TOKEN_AUTH_ACCEPTED_AUDIENCE=(str, "https://api.hel.fi/auth/linkedevents"),
@@ -349,6 +354,10 @@ CITYSDK_API_SETTINGS = {
 # Used in Lippupiste importer
 LIPPUPISTE_EVENT_API_URL = env("LIPPUPISTE_EVENT_API_URL")
 
+# Directory for the importer response cache. Importers revalidate cached
+# responses and skip processing feeds that have not changed since the last import.
+IMPORTER_CACHE_DIR = env("IMPORTER_CACHE_DIR")
+
 
 def haystack_connection_for_lang(language_code):
     if language_code == "fi":
@@ -397,7 +406,12 @@ def dummy_haystack_connection_for_lang(language_code):
     }
 
 
-HAYSTACK_SIGNAL_PROCESSOR = "haystack.signals.RealtimeSignalProcessor"
+# Saved objects are indexed during the save ("realtime"), or queued and indexed
+# by the update_search_index command ("queued")
+HAYSTACK_SIGNAL_PROCESSOR = {
+    "realtime": "haystack.signals.RealtimeSignalProcessor",
+    "queued": "events.search_queue.QueuedSignalProcessor",
+}[env("SEARCH_INDEX_UPDATES")]
 
 CUSTOM_MAPPINGS = {
     "autosuggest": {
@@ -421,6 +435,19 @@ for language in [l[0] for l in LANGUAGES]:
         connection = dummy_haystack_connection_for_lang(language)
     HAYSTACK_CONNECTIONS.update(connection)
 
+# Engine of the /search/ endpoint: "haystack" (Elasticsearch) or "postgres",
+# which uses the full-text search vectors of events and places
+SEARCH_ENGINE = env("SEARCH_ENGINE")
+
+# List pages of at least this many objects are encoded and sent while they are
+# serialized. A streamed response cannot be turned into an error response once
+# it has started, so streaming is disabled (0) by default
+STREAMING_PAGE_SIZE = env("STREAMING_PAGE_SIZE")
+
+# Seconds before a change enters the /change/ feed. last_modified_time is set
+# before the change is committed, so a transaction that takes longer than this
+# may be skipped by replicas that have already read past its timestamp
+CHANGE_FEED_SETTLE_TIME = env("CHANGE_FEED_SETTLE_TIME")
 
 BLEACH_ALLOWED_TAGS = bleach.ALLOWED_TAGS + ["p", "div", "br"]
 